@@ -0,0 +1,261 @@
+"""Streaming, optionally compressed JSONL backups with incremental chains.
+
+A backup file holds one serialized note per line. Files ending in .gz are
+gzip-compressed and files ending in .zst are zstd-compressed (this needs the
+optional ``zstandard`` package). Every backup is written to a temporary file
+and renamed into place, so an interrupted run never leaves a partial backup.
+
+Incremental backups are tracked by a manifest next to the backup files. It
+records each note's last-seen ``timestamps.updated`` and the chain of files
+since the last full snapshot. An incremental backup writes only notes that
+are new or changed since the manifest, plus a ``{"id": ..., "removed": true}``
+line for each note that has disappeared. Compacting folds the chain back into
+one full snapshot; the fold goes through the same bounded external sort as
+comparisons, so it never holds the whole chain in memory.
+
+Two backups are compared by sorting each by note ID (in bounded chunks spilled
+to temporary files when large) and merge-joining the sorted streams.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import gzip
+import heapq
+import io
+import itertools
+import json
+import os
+import tempfile
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import IO, Any, NamedTuple
+
+MANIFEST_NAME = "keep-backup-manifest.json"
+MANIFEST_VERSION = 1
+
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+# Records sorted in memory at once; larger inputs spill sorted runs to disk.
+SORT_CHUNK_RECORDS = 5000
+
+
+class NoteChange(NamedTuple):
+    """A note that differs between two backups."""
+
+    kind: str  # "added", "removed", or "changed"
+    old: dict[str, Any] | None
+    new: dict[str, Any] | None
+
+
+def compression_for(path: Path) -> str | None:
+    """Infer the compression of a backup file from its suffix."""
+    for compression, suffix in COMPRESSION_SUFFIXES.items():
+        if path.suffix == suffix:
+            return compression
+    return None
+
+
+def _import_zstandard() -> Any:
+    try:
+        import zstandard  # type: ignore[import-not-found]
+    except ImportError as exc:
+        raise ValueError(
+            "zstd backups need the 'zstandard' package; use .gz or install it."
+        ) from exc
+    return zstandard
+
+
+@contextlib.contextmanager
+def open_backup_writer(path: Path, compression: str | None) -> Iterator[IO[str]]:
+    """Open a text stream that atomically becomes the backup at path on success."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "wb") as raw, contextlib.ExitStack() as stack:
+            binary: Any
+            if compression == "gzip":
+                binary = stack.enter_context(
+                    gzip.GzipFile(filename=path.name, mode="wb", fileobj=raw)
+                )
+            elif compression == "zstd":
+                binary = stack.enter_context(
+                    _import_zstandard().ZstdCompressor().stream_writer(raw)
+                )
+            else:
+                binary = raw
+            text = stack.enter_context(
+                io.TextIOWrapper(binary, encoding="utf-8", newline="\n")
+            )
+            yield text
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def read_backup_lines(path: Path) -> Iterator[dict[str, Any]]:
+    """Stream the records of a (possibly compressed) backup file."""
+    compression = compression_for(path)
+    with open(path, "rb") as raw, contextlib.ExitStack() as stack:
+        binary: Any
+        if compression == "gzip":
+            binary = stack.enter_context(gzip.GzipFile(fileobj=raw, mode="rb"))
+        elif compression == "zstd":
+            binary = stack.enter_context(
+                _import_zstandard().ZstdDecompressor().stream_reader(raw)
+            )
+        else:
+            binary = raw
+        for line in io.TextIOWrapper(binary, encoding="utf-8"):
+            if line.strip():
+                yield json.loads(line)
+
+
+def write_records(out: IO[str], records: Iterable[dict[str, Any]]) -> int:
+    """Write records as sorted-key JSON lines, returning how many were written."""
+    count = 0
+    for record in records:
+        out.write(json.dumps(record, sort_keys=True))
+        out.write("\n")
+        count += 1
+    return count
+
+
+def load_manifest(directory: Path) -> dict[str, Any] | None:
+    """Load the backup manifest in a directory, if there is a usable one."""
+    try:
+        manifest = json.loads((directory / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def save_manifest(directory: Path, manifest: dict[str, Any]) -> None:
+    """Atomically write the backup manifest."""
+    path = directory / MANIFEST_NAME
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp_path.write_text(
+            json.dumps(manifest, indent=2, sort_keys=True) + "\n", encoding="utf-8"
+        )
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def new_manifest(scope: str) -> dict[str, Any]:
+    """Create an empty manifest for a backup scope ("inbox" or "all")."""
+    return {"version": MANIFEST_VERSION, "scope": scope, "updated": {}, "files": []}
+
+
+def fold_chain(
+    directory: Path, manifest: dict[str, Any], chunk_size: int = SORT_CHUNK_RECORDS
+) -> Iterator[dict[str, Any]]:
+    """Yield the current note records from the manifest's full + incremental chain.
+
+    Later files win over earlier ones and removal markers drop the note.
+    Records come out in note ID order: the chain is sorted with sorted_by_id,
+    which keeps equal IDs in chain order, so memory stays bounded by
+    chunk_size records.
+    """
+    records = itertools.chain.from_iterable(
+        read_backup_lines(directory / entry["path"]) for entry in manifest["files"]
+    )
+    for _, versions in itertools.groupby(
+        sorted_by_id(records, chunk_size), key=_record_id
+    ):
+        *_, latest = versions
+        if not latest.get("removed"):
+            yield latest
+
+
+def read_backup(path: Path) -> Iterator[dict[str, Any]]:
+    """Stream the notes of a backup file, or of the chain in a backup directory."""
+    if path.is_dir():
+        manifest = load_manifest(path)
+        if manifest is None:
+            raise ValueError(f"no backup manifest in {path}")
+        yield from fold_chain(path, manifest)
+        return
+    for record in read_backup_lines(path):
+        if not record.get("removed"):
+            yield record
+
+
+def sorted_by_id(
+    records: Iterable[dict[str, Any]], chunk_size: int = SORT_CHUNK_RECORDS
+) -> Iterator[dict[str, Any]]:
+    """Yield records in note ID order, holding at most chunk_size in memory.
+
+    The sort is stable: records with the same ID keep their input order.
+    """
+    remaining = iter(records)
+    chunk = sorted(itertools.islice(remaining, chunk_size), key=_record_id)
+    if len(chunk) < chunk_size:
+        yield from chunk
+        return
+    with tempfile.TemporaryDirectory(prefix="keep-cli-sort-") as tmp:
+        runs: list[Path] = []
+        while chunk:
+            run = Path(tmp) / f"run-{len(runs)}.jsonl"
+            with open(run, "w", encoding="utf-8") as out:
+                write_records(out, chunk)
+            runs.append(run)
+            chunk = sorted(itertools.islice(remaining, chunk_size), key=_record_id)
+        with contextlib.ExitStack() as stack:
+            streams = [
+                map(json.loads, stack.enter_context(open(run, encoding="utf-8")))
+                for run in runs
+            ]
+            yield from heapq.merge(*streams, key=_record_id)
+
+
+def diff_records(
+    old: Iterable[dict[str, Any]], new: Iterable[dict[str, Any]]
+) -> Iterator[NoteChange]:
+    """Merge-join two ID-sorted record streams into note changes."""
+    olds, news = iter(old), iter(new)
+    before, after = next(olds, None), next(news, None)
+    while before is not None or after is not None:
+        if after is None or (before is not None and before["id"] < after["id"]):
+            yield NoteChange("removed", before, None)
+            before = next(olds, None)
+        elif before is None or after["id"] < before["id"]:
+            yield NoteChange("added", None, after)
+            after = next(news, None)
+        else:
+            if before != after:
+                yield NoteChange("changed", before, after)
+            before, after = next(olds, None), next(news, None)
+
+
+def changed_fields(old: dict[str, Any], new: dict[str, Any]) -> list[str]:
+    """List the top-level note fields, other than items, that differ."""
+    return sorted(
+        name
+        for name in old.keys() | new.keys()
+        if name != "items" and old.get(name) != new.get(name)
+    )
+
+
+def item_changes(old: dict[str, Any], new: dict[str, Any]) -> dict[str, list[str]]:
+    """Compare two records' checklist items by ID."""
+    old_items = {item["id"]: item for item in old.get("items") or []}
+    new_items = {item["id"]: item for item in new.get("items") or []}
+    return {
+        "added": [item_id for item_id in new_items if item_id not in old_items],
+        "removed": [item_id for item_id in old_items if item_id not in new_items],
+        "changed": [
+            item_id
+            for item_id, item in new_items.items()
+            if item_id in old_items and old_items[item_id] != item
+        ],
+    }
+
+
+def _record_id(record: dict[str, Any]) -> str:
+    return record["id"]
@@ -0,0 +1,206 @@
+"""Benchmark keep-cli commands against the fake Keep backend.
+
+For each account size this generates a fake account in a scratch cache
+directory, then times every read and mutation command end to end through
+main() (login from cached state, fake sync, indexes, output) and records the
+peak Python heap of one extra run with tracemalloc. Results are printed as
+JSON, or written to --output, for regression tracking:
+
+    python benchmark.py --sizes 100,10000 --repeat 5 --output bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Any
+
+import fake_keep  # type: ignore[import-not-found]
+import main as keep_cli  # type: ignore[import-not-found]
+
+EMAIL = "bench@example.invalid"
+DEFAULT_SIZES = (100, 10_000, 100_000)
+APPLY_BATCH = 50
+
+
+class Targets:
+    """Note and item IDs picked from a generated account."""
+
+    def __init__(self, keep: Any, scratch: Path) -> None:
+        active = [note for note in keep.all() if not note.trashed]
+        lists = [note for note in active if hasattr(note, "items") and note.items]
+        self.note = next(note.id for note in active if not hasattr(note, "items"))
+        self.list = lists[0].id
+        self.item = lists[0].items[0].id
+        # item-delete consumes one item per run, so hand out the rest in turn.
+        self.spare_items = [
+            (note.id, item.id) for note in lists[1:] for item in note.items
+        ]
+        self.scratch = scratch
+        self.batch = [
+            {"op": "check", "note": note.id, "item": note.items[0].id}
+            for note in lists[:APPLY_BATCH]
+        ]
+
+    def spare_item(self) -> list[str]:
+        return list(self.spare_items.pop())
+
+    def apply_ops(self) -> str:
+        path = self.scratch / "ops.jsonl"
+        path.write_text(
+            "".join(json.dumps(op) + "\n" for op in self.batch), encoding="utf-8"
+        )
+        return str(path)
+
+
+Command = tuple[str, str, Callable[[Targets], list[str]]]
+
+COMMANDS: list[Command] = [
+    ("inbox", "read", lambda t: ["inbox"]),
+    ("inbox --json", "read", lambda t: ["inbox", "--json"]),
+    ("inbox --offline", "read", lambda t: ["inbox", "--offline"]),
+    ("show", "read", lambda t: ["show", t.note]),
+    ("show --offline", "read", lambda t: ["show", t.note, "--offline"]),
+    ("find", "read", lambda t: ["find", "milk bread"]),
+    ("find --offline", "read", lambda t: ["find", "milk bread", "--offline"]),
+    (
+        "find --fuzzy --limit 20",
+        "read",
+        lambda t: ["find", "mlk bred", "--fuzzy", "--limit", "20", "--offline"],
+    ),
+    ("items", "read", lambda t: ["items", t.list]),
+    ("backup", "read", lambda t: ["backup", "-o", str(t.scratch / "b.jsonl")]),
+    ("edit", "mutation", lambda t: ["edit", t.note, "--title", "Benchmarked"]),
+    ("archive", "mutation", lambda t: ["archive", t.note]),
+    ("unarchive", "mutation", lambda t: ["unarchive", t.note]),
+    ("trash", "mutation", lambda t: ["trash", t.note]),
+    ("restore", "mutation", lambda t: ["restore", t.note]),
+    ("check", "mutation", lambda t: ["check", t.list, t.item]),
+    ("uncheck", "mutation", lambda t: ["uncheck", t.list, t.item]),
+    ("item-edit", "mutation", lambda t: ["item-edit", t.list, t.item, "--text", "x"]),
+    ("item-delete", "mutation", lambda t: ["item-delete", *t.spare_item()]),
+    ("apply", "mutation", lambda t: ["apply", t.apply_ops()]),
+]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark keep-cli commands against the fake Keep backend."
+    )
+    parser.add_argument(
+        "--sizes",
+        type=parse_sizes,
+        default=DEFAULT_SIZES,
+        help="Comma-separated account sizes in notes. Defaults to 100,10000,100000.",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Timed runs per command. Defaults to 5."
+    )
+    parser.add_argument(
+        "--only", action="append", help="Benchmark only this command (repeatable)"
+    )
+    parser.add_argument("--output", type=Path, help="Write JSON results here")
+    args = parser.parse_args(argv)
+
+    commands = [c for c in COMMANDS if not args.only or c[0] in args.only]
+    results = []
+    for size in args.sizes:
+        results.extend(run_size(size, commands, args.repeat))
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "date": datetime.datetime.now(datetime.UTC).isoformat(timespec="seconds"),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2) + "\n"
+    if args.output:
+        args.output.write_text(text, encoding="utf-8")
+    else:
+        sys.stdout.write(text)
+    return 0
+
+
+def parse_sizes(value: str) -> list[int]:
+    try:
+        return [int(part) for part in value.split(",")]
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(f"invalid sizes: {value}") from exc
+
+
+def run_size(size: int, commands: list[Command], repeat: int) -> list[dict[str, Any]]:
+    with tempfile.TemporaryDirectory() as scratch, fake_account(size, Path(scratch)):
+        started = time.perf_counter()
+        run_command(["inbox"])
+        setup = time.perf_counter() - started
+        targets = Targets(keep_cli.load_cached_keep(EMAIL), Path(scratch))
+        print(f"{size} notes: generated in {setup:.2f}s", file=sys.stderr)
+
+        results = []
+        for name, kind, build_argv in commands:
+            timings = [run_command(build_argv(targets)) for _ in range(repeat)]
+            tracemalloc.start()
+            try:
+                run_command(build_argv(targets))
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            results.append(
+                {
+                    "notes": size,
+                    "command": name,
+                    "kind": kind,
+                    "median_seconds": statistics.median(timings),
+                    "min_seconds": min(timings),
+                    "max_seconds": max(timings),
+                    "peak_memory_bytes": peak,
+                }
+            )
+            print(f"  {name}: {statistics.median(timings):.4f}s", file=sys.stderr)
+        return results
+
+
+@contextlib.contextmanager
+def fake_account(size: int, cache_dir: Path) -> Iterator[None]:
+    env = {
+        "XDG_CACHE_HOME": str(cache_dir),
+        "KEEP_CLI_EMAIL": EMAIL,
+        "KEEP_CLI_NO_DAEMON": "1",
+        fake_keep.FAKE_NOTES_ENV: str(size),
+    }
+    saved = {name: os.environ.get(name) for name in env}
+    os.environ.update(env)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def run_command(argv: list[str]) -> float:
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        with contextlib.redirect_stdout(devnull):
+            started = time.perf_counter()
+            exit_code = keep_cli.main(argv)
+            elapsed = time.perf_counter() - started
+    if exit_code != 0:
+        raise RuntimeError(f"keep-cli {' '.join(argv)} exited with {exit_code}")
+    return elapsed
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""Note and checklist item change events for `keep-cli watch`.
+
+The watcher keeps the last state it reported in a cursor: the serialized
+record of every note, keyed by ID, plus the keep_version it was taken at.
+After each sync the live notes are compared against the cursor and every
+difference becomes one event, at the note level (created, edited, archived,
+trashed, deleted, ...) or the checklist item level (created, edited,
+checked, unchecked, deleted). The cursor is saved only after the events
+are written, so a restart resumes from the last reported state and nothing
+is lost, though the last batch may be reported twice.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any, NamedTuple
+
+SCHEMA_VERSION = 1
+
+# Note fields whose change is reported as its own event: field -> (on, off)
+_STATE_EVENTS = {
+    "archived": ("archived", "unarchived"),
+    "trashed": ("trashed", "restored"),
+    "pinned": ("pinned", "unpinned"),
+}
+# Fields that never produce an "edited" event on their own. A checklist's
+# text is its items joined, which item events already cover.
+_QUIET_FIELDS = {"id", "items", "deleted", *_STATE_EVENTS}
+_ITEM_FIELDS = ("text", "indented", "parent_item_id")
+
+
+class Cursor(NamedTuple):
+    """The note records last reported, as of keep_version."""
+
+    keep_version: str | None
+    notes: dict[str, dict[str, Any]]
+
+
+class Backoff:
+    """Adaptive poll interval.
+
+    The interval starts at minimum and returns to it whenever a sync brings
+    changes. Quiet syncs stretch it by growth, and failed syncs double it,
+    both up to maximum.
+    """
+
+    def __init__(self, minimum: float, maximum: float, growth: float = 1.5) -> None:
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.growth = growth
+        self.interval = minimum
+
+    def next_interval(self, changed: bool = False, failed: bool = False) -> float:
+        """Get the delay before the next sync, given how the last one went."""
+        if failed:
+            self.interval = min(self.maximum, self.interval * 2)
+        elif changed:
+            self.interval = self.minimum
+        else:
+            self.interval = min(self.maximum, self.interval * self.growth)
+        return self.interval
+
+
+def load_cursor(path: Path) -> Cursor | None:
+    """Load a saved cursor, or None if there is no usable one."""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != SCHEMA_VERSION:
+        return None
+    return Cursor(data.get("keep_version"), data["notes"])
+
+
+def dump_cursor(cursor: Cursor) -> str:
+    """Serialize a cursor for saving."""
+    return json.dumps(
+        {
+            "version": SCHEMA_VERSION,
+            "keep_version": cursor.keep_version,
+            "notes": cursor.notes,
+        },
+        sort_keys=True,
+    )
+
+
+def note_changes(
+    old: dict[str, dict[str, Any]], new: Iterable[dict[str, Any]]
+) -> Iterator[dict[str, Any]]:
+    """Yield events for the differences between old records and new ones.
+
+    Notes in old but not in new are reported as deleted.
+    """
+    seen: set[str] = set()
+    for record in new:
+        seen.add(record["id"])
+        before = old.get(record["id"])
+        if before is None:
+            yield _event("created", record)
+        elif before != record:
+            yield from _record_changes(before, record)
+    for note_id, record in old.items():
+        if note_id not in seen:
+            yield _event("deleted", record)
+
+
+def _record_changes(
+    old: dict[str, Any], new: dict[str, Any]
+) -> Iterator[dict[str, Any]]:
+    quiet = _QUIET_FIELDS | ({"text"} if new.get("type") == "list" else set())
+    fields = sorted(
+        name
+        for name in old.keys() | new.keys()
+        if name not in quiet and old.get(name) != new.get(name)
+    )
+    if fields:
+        yield _event("edited", new, fields=fields)
+    for field, (on, off) in _STATE_EVENTS.items():
+        if bool(old.get(field)) != bool(new.get(field)):
+            yield _event(on if new.get(field) else off, new)
+
+    old_items = {item["id"]: item for item in old.get("items") or []}
+    for item in new.get("items") or []:
+        before = old_items.pop(item["id"], None)
+        if before is None:
+            yield _item_event("created", new, item)
+            continue
+        fields = [name for name in _ITEM_FIELDS if before.get(name) != item.get(name)]
+        if fields:
+            yield _item_event("edited", new, item, fields=fields)
+        if before.get("checked") != item.get("checked"):
+            yield _item_event("checked" if item["checked"] else "unchecked", new, item)
+    for item in old_items.values():
+        yield _item_event("deleted", new, item)
+
+
+def _event(kind: str, note: dict[str, Any], **extra: Any) -> dict[str, Any]:
+    return {
+        "event": kind,
+        "note_id": note["id"],
+        "item_id": None,
+        "title": note.get("title") or "",
+        **extra,
+    }
+
+
+def _item_event(
+    kind: str, note: dict[str, Any], item: dict[str, Any], **extra: Any
+) -> dict[str, Any]:
+    return _event(
+        kind,
+        note,
+        item_id=item["id"],
+        text=item.get("text") or "",
+        checked=bool(item.get("checked")),
+        **extra,
+    )
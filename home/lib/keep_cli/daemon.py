@@ -0,0 +1,180 @@
+"""Unix socket daemon that runs keep-cli commands against one warm session.
+
+`keep-cli serve` logs in once and keeps the synced session in memory. Each
+client connection sends one JSON request line and receives one JSON response
+line. Read requests run as they arrive. Mutations go through a single writer
+queue, which also runs the periodic refresh, so writes apply one at a time and
+in order. Every request holds the session lock while it runs, so no request
+ever sees a half-synced tree.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import queue
+import socket
+import socketserver
+import sys
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any
+
+Request = dict[str, Any]
+Response = dict[str, Any]
+
+# Client connect timeout; the response itself may take as long as a sync.
+CONNECT_TIMEOUT = 1.0
+# Pending connections the daemon queues before clients must retry.
+LISTEN_BACKLOG = 128
+
+
+def send_request(path: Path, request: Request) -> Response | None:
+    """Send a request to the daemon at path, or return None if none is running."""
+    client = _connect(path)
+    if client is None:
+        return None
+    try:
+        client.settimeout(None)
+        client.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        client.shutdown(socket.SHUT_WR)
+        with client.makefile("rb") as reader:
+            line = reader.readline()
+    finally:
+        client.close()
+    if not line:
+        raise ConnectionError("keep-cli daemon closed the connection")
+    return json.loads(line)
+
+
+def _connect(path: Path) -> socket.socket | None:
+    deadline = time.monotonic() + CONNECT_TIMEOUT
+    while True:
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.settimeout(CONNECT_TIMEOUT)
+        try:
+            client.connect(os.fspath(path))
+            return client
+        except (FileNotFoundError, ConnectionRefusedError, TimeoutError):
+            client.close()
+            return None
+        except BlockingIOError:
+            # The listen backlog is full: the daemon is busy, not gone.
+            client.close()
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.01)
+        except BaseException:
+            client.close()
+            raise
+
+
+class SessionDaemon:
+    """Serves requests over a Unix socket with one writer thread."""
+
+    def __init__(
+        self,
+        path: Path,
+        run: Callable[[Request], Response],
+        is_mutation: Callable[[Request], bool],
+        refresh: Callable[[], None],
+        refresh_interval: float,
+    ) -> None:
+        self.path = path
+        self.run = run
+        self.is_mutation = is_mutation
+        self.refresh = refresh
+        self.refresh_interval = refresh_interval
+        self.lock = threading.Lock()
+        self.writes: queue.Queue[tuple[Request, Future[Response]] | None] = (
+            queue.Queue()
+        )
+        self.server: socketserver.ThreadingUnixStreamServer | None = None
+
+    def serve_forever(self) -> None:
+        """Serve until interrupted, then remove the socket."""
+        self._claim_socket_path()
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self) -> None:
+                line = self.rfile.readline()
+                try:
+                    response = daemon.dispatch(json.loads(line))
+                except ValueError as exc:
+                    response = {"exit": 2, "stdout": "", "stderr": f"Error: {exc}\n"}
+                self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+        class Server(socketserver.ThreadingUnixStreamServer):
+            daemon_threads = True
+            request_queue_size = LISTEN_BACKLOG
+
+        old_umask = os.umask(0o177)
+        try:
+            server = Server(os.fspath(self.path), Handler)
+        finally:
+            os.umask(old_umask)
+        self.server = server
+        writer = threading.Thread(target=self._write_loop, daemon=True)
+        writer.start()
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            self.writes.put(None)
+            self.path.unlink(missing_ok=True)
+
+    def shutdown(self) -> None:
+        """Stop serve_forever from another thread."""
+        if self.server is not None:
+            self.server.shutdown()
+
+    def dispatch(self, request: Request) -> Response:
+        """Run a request: reads directly, mutations through the writer queue."""
+        if self.is_mutation(request):
+            future: Future[Response] = Future()
+            self.writes.put((request, future))
+            return future.result()
+        with self.lock:
+            return self.run(request)
+
+    def _write_loop(self) -> None:
+        next_refresh = time.monotonic() + self.refresh_interval
+        while True:
+            timeout = max(0.0, next_refresh - time.monotonic())
+            try:
+                job = self.writes.get(timeout=timeout)
+            except queue.Empty:
+                with self.lock:
+                    try:
+                        self.refresh()
+                    except Exception as exc:
+                        print(f"Warning: refresh failed: {exc}", file=sys.stderr)
+                next_refresh = time.monotonic() + self.refresh_interval
+                continue
+            if job is None:
+                return
+            request, future = job
+            with self.lock:
+                try:
+                    future.set_result(self.run(request))
+                except BaseException as exc:
+                    future.set_exception(exc)
+
+    def _claim_socket_path(self) -> None:
+        self.path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        if not self.path.exists():
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(os.fspath(self.path))
+        except OSError:
+            # Left behind by a daemon that did not shut down cleanly.
+            self.path.unlink(missing_ok=True)
+            return
+        finally:
+            probe.close()
+        raise FileExistsError(f"a keep-cli daemon is already serving {self.path}")
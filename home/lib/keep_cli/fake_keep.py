@@ -0,0 +1,109 @@
+"""In-process fake Google Keep backend for running keep-cli without an account.
+
+Set KEEP_CLI_FAKE_NOTES=N and keep-cli skips authentication and talks to a
+gkeepapi.Keep whose sync never leaves the process. The first sync of an
+empty tree "downloads" N generated notes and checklists, seeded by
+KEEP_CLI_FAKE_SEED so runs are reproducible. Later syncs accept local
+changes and bump the keep_version like the server would.
+
+Everything after login (cached state, ID and search indexes, serialization,
+tables) runs the real code paths. The caches are named under a namespace
+for the fake account's size and seed, so they never overwrite the real
+account's, and commands never go to a running `keep-cli serve` daemon.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+from typing import Any
+
+FAKE_NOTES_ENV = "KEEP_CLI_FAKE_NOTES"
+FAKE_SEED_ENV = "KEEP_CLI_FAKE_SEED"
+
+# Shares of generated notes that are checklists, archived, trashed, pinned,
+# and labeled; checklists get between 2 and 15 items.
+LIST_SHARE = 0.3
+ARCHIVED_SHARE = 0.1
+TRASHED_SHARE = 0.03
+PINNED_SHARE = 0.05
+LABELED_SHARE = 0.2
+LIST_ITEMS = (2, 15)
+
+LABELS = ("Work", "Home", "Groceries", "Travel", "Ideas", "Reading")
+WORDS = (
+    "apple bread budget call coffee dentist draft eggs email errand flight "
+    "garden gift groceries gym hotel invoice keys laundry letter meeting milk "
+    "movie notes oats package paint passport pasta plan plumber podcast rent "
+    "receipt recipe report review rice school snacks soap spinach taxes tea "
+    "ticket tomatoes train update vacation visa water weekend yoga"
+).split()
+
+
+def fake_note_count() -> int | None:
+    """Get the fake account size from the environment, or None if unset."""
+    value = os.environ.get(FAKE_NOTES_ENV)
+    if not value:
+        return None
+    count = int(value)
+    if count < 0:
+        raise ValueError(f"{FAKE_NOTES_ENV} must not be negative")
+    return count
+
+
+def fake_cache_namespace() -> str | None:
+    """Get the cache file namespace of the fake account, or None if unset."""
+    count = os.environ.get(FAKE_NOTES_ENV)
+    if not count:
+        return None
+    return f"fake{count}-seed{os.environ.get(FAKE_SEED_ENV) or 0}"
+
+
+def create_fake_keep(gkeepapi: Any, count: int, seed: int | None = None) -> Any:
+    """Create a Keep session backed by the fake in-process server."""
+    fake_seed = int(os.environ.get(FAKE_SEED_ENV) or 0) if seed is None else seed
+
+    class FakeKeep(gkeepapi.Keep):
+        """Keep whose sync generates the account once, then accepts changes."""
+
+        _keep_version: str | None
+
+        def sync(self, resync: bool = False) -> None:
+            if resync:
+                self._clear()
+            if self._keep_version is None:
+                populate(self, count, fake_seed)
+                self._keep_version = "fake-0"
+            dirty = self._findDirtyNodes()
+            for node in dirty:
+                node.save(clean=True)
+            if dirty:
+                self._keep_version = f"fake-{int(self._keep_version[5:]) + 1}"
+
+    return FakeKeep()
+
+
+def populate(keep: Any, count: int, seed: int) -> None:
+    """Add count generated notes and checklists to a Keep tree."""
+    rng = random.Random(seed)
+    labels = [keep.createLabel(name) for name in LABELS]
+    for index in range(count):
+        title = f"{_words(rng, 1, 4).capitalize()} {index}"
+        if rng.random() < LIST_SHARE:
+            items = [
+                (_words(rng, 1, 4), rng.random() < 0.4)
+                for _ in range(rng.randint(*LIST_ITEMS))
+            ]
+            note = keep.createList(title, items)
+        else:
+            note = keep.createNote(title, _words(rng, 5, 60))
+        note.pinned = rng.random() < PINNED_SHARE
+        note.archived = rng.random() < ARCHIVED_SHARE
+        if rng.random() < TRASHED_SHARE:
+            note.trash()
+        if rng.random() < LABELED_SHARE:
+            note.labels.add(rng.choice(labels))
+
+
+def _words(rng: random.Random, low: int, high: int) -> str:
+    return " ".join(rng.choices(WORDS, k=rng.randint(low, high)))
@@ -0,0 +1,105 @@
+"""Sorted note and checklist item ID index for ID-prefix resolution.
+
+Commands that take a note or item ID accept any unambiguous prefix. Rather
+than scanning every note on each run, the IDs are kept sorted (by their
+casefolded form) so an exact ID or a prefix range is found with bisect. The
+index is built once per synced keep_version and cached next to the note
+state, so runs that sync no changes load it instead of rebuilding it.
+"""
+
+from __future__ import annotations
+
+import json
+from bisect import bisect_left
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any, NamedTuple
+
+SCHEMA_VERSION = 1
+
+# Sorts after any character that can appear in an ID, closing a prefix range
+_PREFIX_END = "\U0010ffff"
+
+
+class PrefixMatch(NamedTuple):
+    """IDs matching an ID or prefix: the exact ID alone, or a prefix range."""
+
+    ids: list[str]
+    total: int
+
+
+class SortedIds:
+    """IDs sorted by casefolded value for bisect lookups."""
+
+    def __init__(self, ids: Iterable[str]) -> None:
+        pairs = sorted((node_id.casefold(), node_id) for node_id in ids)
+        self.keys = [key for key, _ in pairs]
+        self.ids = [node_id for _, node_id in pairs]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def lookup(self, id_or_prefix: str, limit: int = 8) -> PrefixMatch:
+        """Find an exact (case-insensitive) ID, else the IDs with this prefix.
+
+        At most limit IDs are returned; total is the full number of matches.
+        """
+        target = id_or_prefix.casefold()
+        start = bisect_left(self.keys, target)
+        if start < len(self.keys) and self.keys[start] == target:
+            return PrefixMatch([self.ids[start]], 1)
+        end = bisect_left(self.keys, target + _PREFIX_END, lo=start)
+        return PrefixMatch(self.ids[start : min(end, start + limit)], end - start)
+
+
+class IdIndex(NamedTuple):
+    """Note IDs, and the item IDs of each checklist, for one keep_version."""
+
+    keep_version: str | None
+    notes: SortedIds
+    items: dict[str, SortedIds]
+
+
+def build_id_index(keep_version: str | None, notes: Iterable[Any]) -> IdIndex:
+    """Build the index from (non-deleted) notes."""
+    note_ids: list[str] = []
+    items: dict[str, SortedIds] = {}
+    for note in notes:
+        note_ids.append(note.id)
+        note_items = getattr(note, "items", None)
+        if note_items is not None:
+            items[note.id] = SortedIds(item.id for item in note_items)
+    return IdIndex(keep_version, SortedIds(note_ids), items)
+
+
+def load_id_index(path: Path, keep_version: str | None) -> IdIndex | None:
+    """Load a cached index if it was built for this keep_version."""
+    if keep_version is None:
+        return None
+    try:
+        data = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+    if (
+        not isinstance(data, dict)
+        or data.get("version") != SCHEMA_VERSION
+        or data.get("keep_version") != keep_version
+    ):
+        return None
+    return IdIndex(
+        keep_version,
+        SortedIds(data["notes"]),
+        {note_id: SortedIds(ids) for note_id, ids in data["items"].items()},
+    )
+
+
+def dump_id_index(index: IdIndex) -> str:
+    """Serialize an index for the cache."""
+    return json.dumps(
+        {
+            "version": SCHEMA_VERSION,
+            "keep_version": index.keep_version,
+            "notes": index.notes.ids,
+            "items": {note_id: ids.ids for note_id, ids in index.items.items()},
+        }
+    )
@@ -5,19 +5,68 @@ from __future__ import annotations
 
 import argparse
 import datetime as _datetime
+import functools
 import getpass
+import hashlib
+import heapq
+import io
+import itertools
 import json
 import os
 import re
 import secrets
 import shutil
+import signal
+import sqlite3
 import sys
-from collections.abc import Callable, Iterable
+import time
+import uuid
+import weakref
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import (
+    AbstractContextManager,
+    closing,
+    nullcontext,
+    redirect_stderr,
+    redirect_stdout,
+)
 from pathlib import Path
-from typing import Any
+from typing import Any, ParamSpec, TypeVar
+
+import backups  # type: ignore[import-not-found]
+import change_feed  # type: ignore[import-not-found]
+import daemon  # type: ignore[import-not-found]
+import fake_keep  # type: ignore[import-not-found]
+import id_index  # type: ignore[import-not-found]
+import profiling  # type: ignore[import-not-found]
+import search_index  # type: ignore[import-not-found]
 
 DEFAULT_KEYRING_SERVICE = "keep-cli"
 
+# The Keep Android app identity gkeepapi uses when exchanging the master token.
+KEEP_OAUTH_APP = "com.google.android.keep"
+KEEP_OAUTH_CLIENT_SIG = "38918a453d07199354f8b19af05ec6562ced5788"
+# Assumed auth token lifetime when Google's response carries no Expiry.
+DEFAULT_AUTH_TOKEN_LIFETIME = 3600
+# Refresh cached auth tokens this many seconds before they expire.
+AUTH_TOKEN_EXPIRY_MARGIN = 60
+
+# Table column widths are measured over this many rows.
+TABLE_WIDTH_SAMPLE = 100
+
+# The warm (email, Keep) session while running `keep-cli serve`.
+_served_session: tuple[str, Any] | None = None
+
+# Note/item ID index per logged-in Keep session, refreshed whenever it syncs.
+_keep_id_indexes: weakref.WeakKeyDictionary[Any, Any] = weakref.WeakKeyDictionary()
+
+# Phase timing for the running command under --profile or KEEP_CLI_PROFILE.
+_profile: profiling.Profile | None = None
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
 
 class KeepCliError(Exception):
     """A user-facing CLI error."""
@@ -26,8 +75,16 @@ class KeepCliError(Exception):
 def main(argv: list[str] | None = None) -> int:
     parser = build_parser()
     args = parser.parse_args(argv)
+    return run_command(args, sys.argv[1:] if argv is None else argv)
+
+
+def run_command(args: argparse.Namespace, daemon_argv: list[str] | None = None) -> int:
     try:
-        return args.func(args)
+        if daemon_argv is not None:
+            exit_code = run_in_daemon(args, daemon_argv)
+            if exit_code is not None:
+                return exit_code
+        return run_profiled(args)
     except BrokenPipeError:
         return 1
     except KeyboardInterrupt:
@@ -38,6 +95,46 @@ def main(argv: list[str] | None = None) -> int:
         return 1
 
 
+def run_profiled(args: argparse.Namespace) -> int:
+    global _profile
+    if not wants_profile(args):
+        return args.func(args)
+    previous, _profile = _profile, profiling.Profile()
+    try:
+        return args.func(args)
+    finally:
+        if wants_json(args) or getattr(args, "jsonl", False):
+            emit_json_metadata("_timing", _profile.report())
+        else:
+            print(_profile.format(), file=sys.stderr)
+        _profile = previous
+
+
+def wants_profile(args: argparse.Namespace) -> bool:
+    return bool(getattr(args, "profile", False) or os.environ.get("KEEP_CLI_PROFILE"))
+
+
+def timed(phase: str) -> AbstractContextManager[None]:
+    return _profile.phase(phase) if _profile is not None else nullcontext()
+
+
+def profiled(phase: str) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    def decorate(func: Callable[P, R]) -> Callable[P, R]:
+        @functools.wraps(func)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            with timed(phase):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def count_touched(notes: int = 0, items: int = 0) -> None:
+    if _profile is not None:
+        _profile.count(notes, items)
+
+
 def build_parser() -> argparse.ArgumentParser:
     common = argparse.ArgumentParser(add_help=False)
     common.add_argument(
@@ -50,6 +147,14 @@ def build_parser() -> argparse.ArgumentParser:
         default=argparse.SUPPRESS,
         help=f"Keyring service name. Defaults to {DEFAULT_KEYRING_SERVICE}.",
     )
+    common.add_argument(
+        "--profile",
+        action="store_true",
+        default=argparse.SUPPRESS,
+        help="Time each phase of the command and print a breakdown to stderr, "
+        'or a {"_timing": ...} JSON line there with --json or --jsonl. Also '
+        "enabled by KEEP_CLI_PROFILE=1.",
+    )
 
     json_parent = argparse.ArgumentParser(add_help=False)
     json_parent.add_argument(
@@ -72,6 +177,24 @@ def build_parser() -> argparse.ArgumentParser:
         default=argparse.SUPPRESS,
         help="Print structured JSON output.",
     )
+    # Lets `keep-cli serve` route these commands through its writer queue.
+    mutation_parent.set_defaults(mutates=True)
+
+    read_parent = argparse.ArgumentParser(add_help=False)
+    read_parent.add_argument(
+        "--offline",
+        action="store_true",
+        help="Answer from the note state cached by the last sync without "
+        'contacting Keep. With --json or --jsonl, a {"_staleness": ...} JSON '
+        "line on stderr says how old it is.",
+    )
+    read_parent.add_argument(
+        "--max-staleness",
+        type=parse_duration,
+        metavar="DURATION",
+        help="Answer from the cached note state if it was synced within "
+        "DURATION (e.g. 90s, 15m, 2h, 1d), and sync otherwise.",
+    )
 
     parser = argparse.ArgumentParser(
         prog="keep-cli",
@@ -81,6 +204,7 @@ def build_parser() -> argparse.ArgumentParser:
     subparsers = parser.add_subparsers(dest="command", required=True)
 
     auth = subparsers.add_parser("auth", help="Manage stored credentials")
+    auth.set_defaults(local_only=True)
     auth_subparsers = auth.add_subparsers(dest="auth_command", required=True)
 
     auth_status = auth_subparsers.add_parser(
@@ -110,24 +234,64 @@ def build_parser() -> argparse.ArgumentParser:
     )
     logout.set_defaults(func=cmd_auth_logout)
 
+    listing_parent = argparse.ArgumentParser(add_help=False)
+    listing_parent.add_argument(
+        "--limit", type=parse_count, metavar="N", help="Show at most N notes."
+    )
+    listing_parent.add_argument(
+        "--offset",
+        type=parse_count,
+        default=0,
+        metavar="N",
+        help="Skip the first N notes.",
+    )
+    listing_parent.add_argument(
+        "--sort",
+        choices=list(LISTING_SORT_KEYS),
+        help="Sort by updated or created time (newest first) or by title.",
+    )
+    listing_parent.add_argument(
+        "--reverse", action="store_true", help="Reverse the listing order."
+    )
+    listing_parent.add_argument(
+        "--fields",
+        type=parse_fields,
+        metavar="FIELD,...",
+        help="Only include these fields in JSON output: "
+        f"{', '.join(LISTING_FIELDS)} (snippet and rank are find only).",
+    )
+    listing_parent.add_argument(
+        "--jsonl",
+        action="store_true",
+        help="Stream one compact JSON object per note (JSON Lines).",
+    )
+
     inbox = subparsers.add_parser(
         "inbox",
         aliases=["ls"],
-        parents=[common, json_parent],
+        parents=[common, json_parent, read_parent, listing_parent],
         help="List non-archived, non-trashed notes",
     )
     inbox.set_defaults(func=cmd_inbox)
 
     show = subparsers.add_parser(
-        "show", parents=[common, json_parent], help="Show a note by ID or prefix"
+        "show",
+        parents=[common, json_parent, read_parent],
+        help="Show a note by ID or prefix",
     )
     show.add_argument("note", help="Full note ID or unambiguous ID prefix")
     show.set_defaults(func=cmd_show)
 
     find = subparsers.add_parser(
-        "find", parents=[common, json_parent], help="Search note titles and text"
+        "find",
+        parents=[common, json_parent, read_parent, listing_parent],
+        help="Search note titles and text",
+    )
+    find.add_argument(
+        "query",
+        help='Search terms (all must match). Supports "exact phrases", prefix* '
+        "terms, and OR.",
     )
-    find.add_argument("query", help="Case-insensitive query")
     find.add_argument(
         "--inbox",
         action="store_true",
@@ -148,6 +312,18 @@ def build_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Search archived and trashed notes too.",
     )
+    find.add_argument(
+        "--label",
+        action="append",
+        default=[],
+        help="Only match notes with this label. Repeat to require several.",
+    )
+    find.add_argument(
+        "--fuzzy",
+        action="store_true",
+        help="Match titles, checklist items, and lines of text by trigram "
+        "similarity, so typos still match. Hits name the best-matching item.",
+    )
     find.set_defaults(func=cmd_find)
 
     backup = subparsers.add_parser(
@@ -161,10 +337,57 @@ def build_parser() -> argparse.ArgumentParser:
     backup.add_argument(
         "--output",
         "-o",
-        help="Output JSONL path. Use '-' for stdout. Defaults to a timestamped file.",
+        help="Output JSONL path (.gz or .zst to compress). Use '-' for stdout. "
+        "Defaults to a timestamped file.",
+    )
+    backup.add_argument(
+        "--compress",
+        choices=sorted(backups.COMPRESSION_SUFFIXES),
+        help="Compress the backup. Defaults to the --output suffix.",
+    )
+    backup_mode = backup.add_mutually_exclusive_group()
+    backup_mode.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only write notes changed since the last backup in --backup-dir.",
+    )
+    backup_mode.add_argument(
+        "--compact",
+        action="store_true",
+        help="Fold the backups in --backup-dir into one full snapshot.",
+    )
+    backup.add_argument(
+        "--backup-dir",
+        type=Path,
+        help="Directory holding incremental backups and their manifest. "
+        "Defaults to the current directory.",
     )
     backup.set_defaults(func=cmd_backup)
 
+    diff = subparsers.add_parser(
+        "diff",
+        parents=[common, json_parent, read_parent],
+        help="Compare two backups, or a backup with the live account",
+        description="Report notes and checklist items added, removed, or changed "
+        "between two backups. Both are sorted by note ID in bounded memory and "
+        "merge-joined.",
+    )
+    diff.add_argument(
+        "old", type=Path, help="Backup file or incremental backup directory"
+    )
+    diff.add_argument(
+        "new",
+        type=Path,
+        nargs="?",
+        help="Backup to compare with. Defaults to the live account.",
+    )
+    diff.add_argument(
+        "--all",
+        action="store_true",
+        help="Compare with archived and trashed live notes too. Default is inbox only.",
+    )
+    diff.set_defaults(func=cmd_diff)
+
     edit = subparsers.add_parser(
         "edit",
         parents=[common, mutation_parent],
@@ -184,7 +407,6 @@ def build_parser() -> argparse.ArgumentParser:
         ("archive", cmd_archive, "Archive a note"),
         ("unarchive", cmd_unarchive, "Move a note out of the archive"),
         ("trash", cmd_trash, "Move a note to trash"),
-        ("restore", cmd_restore, "Move a note out of trash"),
     ]:
         p = subparsers.add_parser(
             name, parents=[common, mutation_parent], help=help_text
@@ -192,6 +414,30 @@ def build_parser() -> argparse.ArgumentParser:
         p.add_argument("note", help="Full note ID or unambiguous ID prefix")
         p.set_defaults(func=func)
 
+    restore = subparsers.add_parser(
+        "restore",
+        parents=[common, mutation_parent],
+        help="Move a note out of trash, or make the account match a backup",
+    )
+    restore.add_argument(
+        "note", nargs="?", help="Full note ID or unambiguous ID prefix"
+    )
+    restore.add_argument(
+        "--plan",
+        type=Path,
+        metavar="BACKUP",
+        help="Plan the fewest edits that make the live account match this backup "
+        "file or incremental backup directory, and apply them with one sync. "
+        "Notes missing from the account are recreated with new IDs; inbox notes "
+        "missing from the backup are trashed.",
+    )
+    restore.add_argument(
+        "--all",
+        action="store_true",
+        help="With --plan, also trash archived notes missing from the backup.",
+    )
+    restore.set_defaults(func=cmd_restore)
+
     delete = subparsers.add_parser(
         "delete",
         parents=[common, mutation_parent],
@@ -206,7 +452,7 @@ def build_parser() -> argparse.ArgumentParser:
 
     items = subparsers.add_parser(
         "items",
-        parents=[common, json_parent],
+        parents=[common, json_parent, read_parent],
         help="List checklist items for a Keep list",
     )
     items.add_argument("note", help="Full note ID or unambiguous ID prefix")
@@ -234,6 +480,87 @@ def build_parser() -> argparse.ArgumentParser:
     item_edit.add_argument("--text", required=True, help="Replacement item text")
     item_edit.set_defaults(func=cmd_item_edit)
 
+    apply = subparsers.add_parser(
+        "apply",
+        parents=[common, mutation_parent],
+        help="Apply a JSONL file of edits in one session with a single sync",
+        description=(
+            "Each line is a JSON object naming an op and its target, e.g. "
+            '{"op": "check", "note": "1a2b", "item": "3c4d"}. Ops: '
+            f"{', '.join(APPLY_OPERATION_FIELDS)}. All operations are validated "
+            "before any is applied."
+        ),
+    )
+    apply.add_argument(
+        "ops",
+        nargs="?",
+        default="-",
+        help="Operations JSONL path. Defaults to stdin.",
+    )
+    apply.add_argument(
+        "--yes", action="store_true", help="Confirm permanent delete operations"
+    )
+    apply.set_defaults(func=cmd_apply)
+
+    serve = subparsers.add_parser(
+        "serve",
+        parents=[common],
+        help="Keep a synced session warm for other keep-cli calls",
+        description=(
+            "Log in once and serve keep-cli commands over a Unix socket. While "
+            "it runs, other keep-cli calls for the same account are sent to it "
+            "instead of logging in and syncing themselves. Set KEEP_CLI_NO_DAEMON=1 "
+            "to bypass it."
+        ),
+    )
+    serve.add_argument(
+        "--refresh-interval",
+        type=parse_duration,
+        default=300.0,
+        metavar="DURATION",
+        help="How often to sync the session (default: 5m).",
+    )
+    serve.set_defaults(func=cmd_serve, local_only=True)
+
+    watch = subparsers.add_parser(
+        "watch",
+        parents=[common],
+        help="Stream note and checklist item changes as JSON lines",
+        description=(
+            "Keep a session open, sync it on an adaptive interval, and print one "
+            "JSON line per note or item change. The last reported state is saved "
+            "as a cursor, so a restarted watch first reports what changed while "
+            "it was stopped. Without a cursor it starts from the current state."
+        ),
+    )
+    watch.add_argument(
+        "--interval",
+        type=parse_duration,
+        default=30.0,
+        metavar="DURATION",
+        help="Shortest time between syncs, used again after any change (default: 30s).",
+    )
+    watch.add_argument(
+        "--max-interval",
+        type=parse_duration,
+        default=600.0,
+        metavar="DURATION",
+        help="Longest time between syncs as quiet or failing syncs back off "
+        "(default: 10m).",
+    )
+    watch.add_argument(
+        "--cursor",
+        type=Path,
+        help="Cursor file to resume from and update. Defaults to one per account "
+        "in the keep-cli cache.",
+    )
+    watch.add_argument(
+        "--once",
+        action="store_true",
+        help="Report changes since the cursor and exit instead of watching.",
+    )
+    watch.set_defaults(func=cmd_watch, local_only=True)
+
     return parser
 
 
@@ -313,14 +640,7 @@ def cmd_auth_exchange(args: argparse.Namespace) -> int:
     if not re.fullmatch(r"[0-9a-fA-F]+", android_id):
         raise KeepCliError("--android-id must be a hexadecimal string.")
 
-    try:
-        import gpsoauth  # type: ignore[import-not-found]
-    except ImportError as exc:
-        raise KeepCliError(
-            "Missing dependency 'gpsoauth'. Run through `pybash ~/lib/keep_cli` "
-            "or install lib/keep_cli/requirements.txt."
-        ) from exc
-
+    gpsoauth = import_gpsoauth()
     try:
         response = gpsoauth.exchange_token(email, args.oauth_token, android_id)
     except Exception as exc:  # pragma: no cover - depends on Google auth service.
@@ -338,6 +658,11 @@ def cmd_auth_exchange(args: argparse.Namespace) -> int:
 def cmd_auth_logout(args: argparse.Namespace) -> int:
     email = require_email(args)
     service = keyring_service(args)
+    delete_cache_file(state_cache_path(email))
+    delete_cache_file(auth_cache_path(email))
+    delete_cache_file(search_index_path(email))
+    delete_cache_file(id_index_path(email))
+    delete_cache_file(watch_cursor_path(email))
     token = get_keyring_token(email, service)
     if not token:
         print(f"No stored token for {email} in keyring service '{service}'.")
@@ -348,62 +673,286 @@ def cmd_auth_logout(args: argparse.Namespace) -> int:
 
 
 def cmd_inbox(args: argparse.Namespace) -> int:
-    keep = login_keep(args)
-    notes = list(active_notes(keep.find(archived=False, trashed=False)))
-    return emit_note_list(notes, args)
+    keep = read_keep(args)
+    return emit_note_list(active_notes(keep.find(archived=False, trashed=False)), args)
 
 
 def cmd_show(args: argparse.Namespace) -> int:
-    keep = login_keep(args)
+    keep = read_keep(args)
     note = resolve_note(keep, args.note)
+    count_touched(notes=1, items=len(note.items) if is_list_note(note) else 0)
     if wants_json(args):
-        emit_json(serialize_note(note))
+        with timed("serialize"):
+            data = serialize_note(note)
+        emit_read_json(data, args)
     else:
         print_note_detail(note)
+        print_staleness(args)
     return 0
 
 
 def cmd_find(args: argparse.Namespace) -> int:
     archived, trashed = find_scope(args)
-    keep = login_keep(args)
+    email = require_email(args)
+    cached = use_cached_state(args, email)
+    if not search_index.fts5_available():
+        if args.fuzzy:
+            raise KeepCliError("--fuzzy needs a Python whose SQLite has FTS5.")
+        keep = load_cached_keep(email) if cached else login_keep(args)
+        return find_by_scan(keep, archived, trashed, args)
+
+    if cached:
+        if not search_index_path(email).exists():
+            raise KeepCliError(
+                f"No local search index for {email} yet. Run `keep-cli find` "
+                "once without --offline."
+            )
+    else:
+        # Logging in syncs, which brings the index up to date.
+        login_keep(args)
+
+    # Ranked results page in SQL; other orders need every hit first.
+    in_sql = args.sort is None and not args.reverse
+    search = search_index.fuzzy_search if args.fuzzy else search_index.search
+    try:
+        with (
+            timed("search"),
+            closing(search_index.open_index(search_index_path(email))) as conn,
+        ):
+            hits = search(
+                conn,
+                args.query,
+                archived,
+                trashed,
+                args.label,
+                limit=args.limit if in_sql else None,
+                offset=args.offset if in_sql else 0,
+            )
+    except ValueError as exc:
+        raise KeepCliError(str(exc)) from exc
+    except sqlite3.Error as exc:
+        raise KeepCliError(f"Search index query failed: {exc}") from exc
+    return emit_search_hits(hits, args, paged=in_sql)
+
+
+def find_by_scan(
+    keep: Any, archived: bool | None, trashed: bool | None, args: argparse.Namespace
+) -> int:
     needle = args.query.casefold()
+    labels = {label.casefold() for label in args.label}
 
     def matches(note: Any) -> bool:
+        if labels and not labels <= {
+            label.name.casefold() for label in note.labels.all()
+        }:
+            return False
         return (
             needle in note.title.casefold()
             or needle in note_search_text(note).casefold()
         )
 
-    notes = list(
-        active_notes(keep.find(func=matches, archived=archived, trashed=trashed))
-    )
+    notes = active_notes(keep.find(func=matches, archived=archived, trashed=trashed))
     return emit_note_list(notes, args)
 
 
 def cmd_backup(args: argparse.Namespace) -> int:
+    if args.compact:
+        return compact_backups(args)
+    if args.incremental and args.output is not None:
+        raise KeepCliError(
+            "Incremental backups are named automatically; use --backup-dir "
+            "instead of --output."
+        )
+
     keep = login_keep(args)
     if args.all:
-        notes = list(active_notes(keep.find(archived=None, trashed=None)))
+        notes = active_notes(keep.find(archived=None, trashed=None))
     else:
-        notes = list(active_notes(keep.find(archived=False, trashed=False)))
+        notes = active_notes(keep.find(archived=False, trashed=False))
+    records = (serialize_note(note) for note in notes)
 
-    lines = [json.dumps(serialize_note(note), sort_keys=True) for note in notes]
     if args.output == "-":
-        for line in lines:
-            print(line)
+        backups.write_records(sys.stdout, records)
+        return 0
+    if args.incremental:
+        return write_incremental_backup(args, records)
+
+    path = Path(args.output) if args.output else default_backup_path(args.compress)
+    count = write_backup(path, args.compress or backups.compression_for(path), records)
+    count_touched(notes=count)
+    print(f"Wrote {count} notes to {path}.")
+    return 0
+
+
+def write_backup(
+    path: Path, compression: str | None, records: Iterable[dict[str, Any]]
+) -> int:
+    try:
+        with backups.open_backup_writer(path, compression) as out:
+            return backups.write_records(out, records)
+    except (OSError, ValueError) as exc:
+        raise KeepCliError(f"Could not write backup to {path}: {exc}") from exc
+
+
+def write_incremental_backup(
+    args: argparse.Namespace, records: Iterable[dict[str, Any]]
+) -> int:
+    directory = backup_dir(args)
+    scope = "all" if args.all else "inbox"
+    manifest = backups.load_manifest(directory)
+    # Start a new chain when there is none yet or it covers a different scope.
+    incremental = True
+    if manifest is None or manifest["scope"] != scope or not manifest["files"]:
+        manifest = backups.new_manifest(scope)
+        incremental = False
+    previous: dict[str, str | None] = manifest["updated"]
+    current: dict[str, str | None] = {}
+    removed = 0
+
+    def changed_records() -> Iterator[dict[str, Any]]:
+        nonlocal removed
+        for record in records:
+            updated = record["timestamps"]["updated"]
+            current[record["id"]] = updated
+            if (
+                incremental
+                and record["id"] in previous
+                and previous[record["id"]] == updated
+            ):
+                continue
+            yield record
+        if incremental:
+            for note_id in previous.keys() - current.keys():
+                removed += 1
+                yield {"id": note_id, "removed": True}
+
+    kind = "incremental" if incremental else "full"
+    path = new_backup_path(directory, kind, args.compress)
+    count = write_backup(path, args.compress, changed_records())
+
+    entry = {"path": path.name, "kind": kind, "created": utc_now(), "records": count}
+    manifest["files"] = [*manifest["files"], entry] if incremental else [entry]
+    manifest["updated"] = current
+    save_backup_manifest(directory, manifest)
+
+    if incremental:
+        print(
+            f"Wrote {count - removed} changed notes and {removed} removals to {path}."
+        )
+    else:
+        print(f"Wrote {count} notes to {path} (new incremental chain).")
+    return 0
+
+
+def compact_backups(args: argparse.Namespace) -> int:
+    directory = backup_dir(args)
+    manifest = backups.load_manifest(directory)
+    if manifest is None or not manifest["files"]:
+        raise KeepCliError(f"No backup manifest in {directory}.")
+    chain = manifest["files"]
+    if len(chain) == 1 and chain[0]["kind"] == "full":
+        print(f"Backups in {directory} are already compact.")
         return 0
 
-    path = Path(args.output) if args.output else default_backup_path()
+    compression = args.compress or backups.compression_for(directory / chain[0]["path"])
+    path = new_backup_path(directory, "full", compression)
+    count = write_backup(path, compression, backups.fold_chain(directory, manifest))
+
+    manifest["files"] = [
+        {"path": path.name, "kind": "full", "created": utc_now(), "records": count}
+    ]
+    save_backup_manifest(directory, manifest)
+    for entry in chain:
+        (directory / entry["path"]).unlink(missing_ok=True)
+    print(f"Compacted {len(chain)} backups into {path} ({count} notes).")
+    return 0
+
+
+def save_backup_manifest(directory: Path, manifest: dict[str, Any]) -> None:
     try:
-        path.parent.mkdir(parents=True, exist_ok=True)
-        path.write_text("\n".join(lines) + ("\n" if lines else ""), encoding="utf-8")
+        backups.save_manifest(directory, manifest)
     except OSError as exc:
-        raise KeepCliError(f"Could not write backup to {path}: {exc}") from exc
+        raise KeepCliError(
+            f"Could not update backup manifest in {directory}: {exc}"
+        ) from exc
+
+
+def cmd_diff(args: argparse.Namespace) -> int:
+    try:
+        old = backups.sorted_by_id(backups.read_backup(args.old))
+        if args.new is not None:
+            new = backups.sorted_by_id(backups.read_backup(args.new))
+        else:
+            new = live_records(read_keep(args), args.all)
+        return emit_backup_diff(backups.diff_records(old, new), args)
+    except BrokenPipeError:
+        raise
+    except (OSError, ValueError) as exc:
+        raise KeepCliError(f"Could not compare backups: {exc}") from exc
+
+
+def live_records(keep: Any, all_notes: bool) -> Iterator[dict[str, Any]]:
+    scope = None if all_notes else False
+    notes = active_notes(keep.find(archived=scope, trashed=scope))
+    return (serialize_note(note) for note in sorted(notes, key=lambda n: n.id))
+
+
+def emit_backup_diff(changes: Iterable[Any], args: argparse.Namespace) -> int:
+    summary = dict.fromkeys(["added", "removed", "changed"], 0)
+    items = dict.fromkeys(["added", "removed", "changed"], 0)
+    entries = []
+    for change in changes:
+        record = change.new if change.new is not None else change.old
+        entry: dict[str, Any] = {
+            "change": change.kind,
+            "id": record["id"],
+            "title": record.get("title") or "",
+        }
+        if change.kind == "changed":
+            entry["fields"] = backups.changed_fields(change.old, change.new)
+            entry["items"] = backups.item_changes(change.old, change.new)
+            for kind, item_ids in entry["items"].items():
+                items[kind] += len(item_ids)
+        summary[change.kind] += 1
+        count_touched(notes=1)
+        if wants_json(args):
+            entries.append(entry)
+        else:
+            print(format_diff_entry(entry))
 
-    print(f"Wrote {len(notes)} notes to {path}.")
+    if wants_json(args):
+        emit_read_json(
+            {"changes": entries, "summary": {**summary, "items": items}}, args
+        )
+        return 0
+    if not any(summary.values()):
+        print("No differences.")
+    else:
+        print(
+            f"{summary['added']} added, {summary['removed']} removed, "
+            f"{summary['changed']} changed notes; items in changed notes: "
+            f"{items['added']} added, {items['removed']} removed, "
+            f"{items['changed']} changed."
+        )
+    print_staleness(args)
     return 0
 
 
+def format_diff_entry(entry: dict[str, Any]) -> str:
+    marker = {"added": "+", "removed": "-", "changed": "~"}[entry["change"]]
+    line = f"{marker} {entry['id']}  {one_line(entry['title'] or '(untitled)')}"
+    if entry["change"] != "changed":
+        return line
+    details = list(entry["fields"])
+    item_counts = {kind: len(ids) for kind, ids in entry["items"].items()}
+    if any(item_counts.values()):
+        details.append(
+            f"items +{item_counts['added']} -{item_counts['removed']} "
+            f"~{item_counts['changed']}"
+        )
+    return f"{line}  ({', '.join(details)})"
+
+
 def cmd_edit(args: argparse.Namespace) -> int:
     text_value = read_edit_text(args)
     if args.title is None and text_value is None:
@@ -412,10 +961,7 @@ def cmd_edit(args: argparse.Namespace) -> int:
         )
 
     def mutate(note: Any) -> None:
-        if args.title is not None:
-            note.title = args.title
-        if text_value is not None:
-            note.text = text_value
+        edit_note(note, args.title, text_value)
 
     def validate(note: Any) -> None:
         if text_value is not None and is_list_note(note):
@@ -427,20 +973,43 @@ def cmd_edit(args: argparse.Namespace) -> int:
     return mutate_note(args, "edit", mutate, validate)
 
 
+# Single-note mutations shared by their commands and `apply`: op -> (action, mutator)
+NOTE_MUTATIONS: dict[str, tuple[str, Callable[[Any], None]]] = {
+    "archive": ("archive", lambda note: setattr(note, "archived", True)),
+    "unarchive": ("unarchive", lambda note: setattr(note, "archived", False)),
+    "trash": ("trash", lambda note: note.trash()),
+    "restore": ("restore", lambda note: note.untrash()),
+    "pin": ("pin", lambda note: setattr(note, "pinned", True)),
+    "unpin": ("unpin", lambda note: setattr(note, "pinned", False)),
+}
+
+ITEM_MUTATIONS: dict[str, tuple[str, Callable[[Any], None]]] = {
+    "check": ("check", lambda item: setattr(item, "checked", True)),
+    "uncheck": ("uncheck", lambda item: setattr(item, "checked", False)),
+    "item-delete": ("delete item", lambda item: item.delete()),
+}
+
+
 def cmd_archive(args: argparse.Namespace) -> int:
-    return mutate_note(args, "archive", lambda note: setattr(note, "archived", True))
+    return mutate_note(args, *NOTE_MUTATIONS["archive"])
 
 
 def cmd_unarchive(args: argparse.Namespace) -> int:
-    return mutate_note(args, "unarchive", lambda note: setattr(note, "archived", False))
+    return mutate_note(args, *NOTE_MUTATIONS["unarchive"])
 
 
 def cmd_trash(args: argparse.Namespace) -> int:
-    return mutate_note(args, "trash", lambda note: note.trash())
+    return mutate_note(args, *NOTE_MUTATIONS["trash"])
 
 
 def cmd_restore(args: argparse.Namespace) -> int:
-    return mutate_note(args, "restore", lambda note: note.untrash())
+    if args.plan is not None:
+        if args.note:
+            raise KeepCliError("Give either a note or --plan BACKUP, not both.")
+        return restore_from_backup(args)
+    if not args.note:
+        raise KeepCliError("restore needs a note ID, or --plan BACKUP.")
+    return mutate_note(args, *NOTE_MUTATIONS["restore"])
 
 
 def cmd_delete(args: argparse.Namespace) -> int:
@@ -448,32 +1017,34 @@ def cmd_delete(args: argparse.Namespace) -> int:
         raise KeepCliError("Permanent deletion requires both --permanent and --yes.")
     if args.permanent:
         return mutate_note(args, "permanently delete", lambda note: note.delete())
-    return mutate_note(args, "trash", lambda note: note.trash())
+    return mutate_note(args, *NOTE_MUTATIONS["trash"])
 
 
 def cmd_items(args: argparse.Namespace) -> int:
-    keep = login_keep(args)
+    keep = read_keep(args)
     note = resolve_note(keep, args.note)
     require_list_note(note)
     items = list(note.items)
+    count_touched(notes=1, items=len(items))
     if wants_json(args):
-        emit_json(
-            {
+        with timed("serialize"):
+            data = {
                 "note": serialize_note_summary(note),
                 "items": [serialize_item(item) for item in items],
             }
-        )
+        emit_read_json(data, args)
     else:
         print_item_table(items)
+        print_staleness(args)
     return 0
 
 
 def cmd_check(args: argparse.Namespace) -> int:
-    return mutate_item(args, "check", lambda item: setattr(item, "checked", True))
+    return mutate_item(args, *ITEM_MUTATIONS["check"])
 
 
 def cmd_uncheck(args: argparse.Namespace) -> int:
-    return mutate_item(args, "uncheck", lambda item: setattr(item, "checked", False))
+    return mutate_item(args, *ITEM_MUTATIONS["uncheck"])
 
 
 def cmd_item_edit(args: argparse.Namespace) -> int:
@@ -481,7 +1052,7 @@ def cmd_item_edit(args: argparse.Namespace) -> int:
 
 
 def cmd_item_delete(args: argparse.Namespace) -> int:
-    return mutate_item(args, "delete item", lambda item: item.delete())
+    return mutate_item(args, *ITEM_MUTATIONS["item-delete"])
 
 
 def mutate_note(
@@ -494,6 +1065,7 @@ def mutate_note(
     note = resolve_note(keep, args.note)
     if validator:
         validator(note)
+    count_touched(notes=1)
 
     before = serialize_note(note)
     before_summary = describe_note(note)
@@ -507,7 +1079,7 @@ def mutate_note(
         )
         return 0
 
-    sync_keep(keep, action)
+    sync_keep(keep, action, require_email(args))
     emit_note_change(action, before, after, before_summary, after_summary, False, args)
     return 0
 
@@ -520,7 +1092,8 @@ def mutate_item(
     keep = login_keep(args)
     note = resolve_note(keep, args.note)
     require_list_note(note)
-    item = resolve_item(note, args.item)
+    item = resolve_item(keep, note, args.item)
+    count_touched(notes=1, items=1)
 
     before_item = serialize_item(item)
     before_label = describe_item(item)
@@ -534,36 +1107,1037 @@ def mutate_item(
         )
         return 0
 
-    sync_keep(keep, action)
+    sync_keep(keep, action, require_email(args))
     emit_item_change(
         action, note, before_item, after_item, before_label, after_label, False, args
     )
     return 0
 
 
-def login_keep(args: argparse.Namespace) -> Any:
+# Fields each `apply` op accepts beyond "op"; ops with "item" target list items.
+APPLY_OPERATION_FIELDS: dict[str, dict[str, type]] = {
+    "edit": {"note": str, "title": str, "text": str},
+    "archive": {"note": str},
+    "unarchive": {"note": str},
+    "trash": {"note": str},
+    "restore": {"note": str},
+    "delete": {"note": str, "permanent": bool},
+    "check": {"note": str, "item": str},
+    "uncheck": {"note": str, "item": str},
+    "item-edit": {"note": str, "item": str, "text": str},
+    "item-delete": {"note": str, "item": str},
+    "pin": {"note": str},
+    "unpin": {"note": str},
+    "item-add": {"note": str, "text": str, "checked": bool},
+    # Lists are created with "items": [{"text": ..., "checked": ...}, ...].
+    "create": {
+        "title": str,
+        "text": str,
+        "items": list,
+        "archived": bool,
+        "pinned": bool,
+    },
+}
+
+
+class PlannedOperation:
+    """One `apply` operation, resolved against the session and then applied."""
+
+    def __init__(self, line: int, op: dict[str, Any]) -> None:
+        self.line = line
+        self.op = op
+        self.note: Any = None
+        self.item: Any = None
+        self.action = ""
+        self.mutator: Callable[[Any], None] = lambda _: None
+        # Set for "create", which makes its note instead of changing one.
+        self.create: Callable[[], Any] | None = None
+        self.before: dict[str, Any] = {}
+        self.after: dict[str, Any] = {}
+        self.before_label = ""
+        self.after_label = ""
+
+    def apply(self) -> None:
+        if self.create is not None:
+            self.note = self.create()
+            self.before, self.before_label = {}, "(none)"
+            self.after, self.after_label = (
+                serialize_note(self.note),
+                describe_note(self.note),
+            )
+            return
+        target = self.note if self.item is None else self.item
+        serialize, describe = (
+            (serialize_note, describe_note)
+            if self.item is None
+            else (serialize_item, describe_item)
+        )
+        self.before, self.before_label = serialize(target), describe(target)
+        self.mutator(target)
+        self.after, self.after_label = serialize(target), describe(target)
+
+    def record(self, status: str) -> dict[str, Any]:
+        record = {
+            "line": self.line,
+            "op": self.op["op"],
+            "action": self.action,
+            "status": status,
+            "before": self.before,
+            "after": self.after,
+        }
+        if self.item is not None:
+            record["note"] = serialize_note_summary(self.note)
+        return record
+
+
+def cmd_apply(args: argparse.Namespace) -> int:
+    operations = read_operations(args.ops)
+    if not operations:
+        raise KeepCliError("No operations to apply.")
+    permanent = [
+        op.line
+        for op in operations
+        if op.op["op"] == "delete" and op.op.get("permanent")
+    ]
+    if permanent and not args.yes:
+        raise KeepCliError(
+            "Permanent delete operations (line "
+            f"{', '.join(map(str, permanent))}) require --yes."
+        )
+
+    return run_operations(args, login_keep(args), operations)
+
+
+def run_operations(
+    args: argparse.Namespace, keep: Any, operations: list[PlannedOperation]
+) -> int:
+    errors = []
+    for operation in operations:
+        try:
+            plan_operation(keep, operation)
+        except KeepCliError as exc:
+            errors.append(f"line {operation.line}: {exc}")
+    if errors:
+        raise invalid_operations_error(errors)
+
+    # Snapshot every touched note before any operation runs, for the dry-run diff.
+    initial = {
+        op.note.id: serialize_note(op.note) for op in operations if op.note is not None
+    }
+    for operation in operations:
+        operation.apply()
+        if operation.create is not None:
+            initial[operation.note.id] = {}
+    count_touched(
+        notes=len({op.note.id for op in operations}),
+        items=len({op.item.id for op in operations if op.item is not None}),
+    )
+
+    dry_run = is_dry_run(args)
+    if not dry_run:
+        sync_keep(keep, f"apply {len(operations)} operations", require_email(args))
+    status = "planned" if dry_run else "applied"
+    diff = operations_diff(initial, keep) if dry_run else ""
+
+    if wants_json(args):
+        result: dict[str, Any] = {
+            "dry_run": dry_run,
+            "results": [operation.record(status) for operation in operations],
+        }
+        if dry_run:
+            result["diff"] = diff
+        emit_json(result)
+        return 0
+
+    for operation in operations:
+        verb = f"Would {operation.action}" if dry_run else past_tense(operation.action)
+        target = operation.after["id"]
+        if operation.item is not None:
+            target += f" in {format_note_ref(operation.note)}"
+        print(f"[{operation.line}] {verb}: {target}")
+        print(f"  before: {operation.before_label}")
+        print(f"  after:  {operation.after_label}")
+    if dry_run:
+        if diff:
+            print()
+            print(diff, end="")
+        print(f"Would apply {len(operations)} operations with one sync.")
+    else:
+        print(f"Applied {len(operations)} operations with one sync.")
+    return 0
+
+
+def restore_from_backup(args: argparse.Namespace) -> int:
+    keep = login_keep(args)
+    try:
+        ops = plan_restore(keep, backups.read_backup(args.plan), args.all)
+    except (OSError, ValueError, KeyError) as exc:
+        raise KeepCliError(f"Could not read backup {args.plan}: {exc}") from exc
+    if not ops:
+        if wants_json(args):
+            emit_json({"dry_run": is_dry_run(args), "results": []})
+        else:
+            print(f"Nothing to restore; the account already matches {args.plan}.")
+        return 0
+    operations = [PlannedOperation(step, op) for step, op in enumerate(ops, 1)]
+    problems = [
+        f"step {operation.line}: {problem}"
+        for operation in operations
+        if (problem := validate_operation(operation.op))
+    ]
+    if problems:
+        raise invalid_operations_error(problems)
+    return run_operations(args, keep, operations)
+
+
+def plan_restore(
+    keep: Any, records: Iterable[dict[str, Any]], all_notes: bool
+) -> list[dict[str, Any]]:
+    ops = []
+    in_backup = set()
+    missing = []
+    for record in records:
+        in_backup.add(record["id"])
+        note = keep.get(record["id"])
+        if note is not None and not getattr(note, "deleted", False):
+            ops.extend(restore_note_operations(note, record))
+        elif not record.get("trashed"):
+            # Trashed notes that are gone for good stay gone.
+            missing.append(record)
+
+    # An earlier restore recreated missing notes under new IDs; pair those by
+    # type and title so running the plan again does not duplicate them.
+    spare: defaultdict[tuple[str, str], list[Any]] = defaultdict(list)
+    for note in active_notes(keep.all()):
+        if note.id not in in_backup:
+            spare[note_kind(note), note.title].append(note)
+    for record in missing:
+        matches = spare.get((record.get("type") or "", record.get("title") or ""))
+        if matches:
+            ops.extend(restore_note_operations(matches.pop(0), record))
+        else:
+            ops.append(create_operation(record))
+
+    for notes in spare.values():
+        for note in notes:
+            if not note.trashed and (all_notes or not note.archived):
+                ops.append({"op": "trash", "note": note.id})
+    return ops
+
+
+def create_operation(record: dict[str, Any]) -> dict[str, Any]:
+    op: dict[str, Any] = {
+        "op": "create",
+        "title": record.get("title") or "",
+        "archived": bool(record.get("archived")),
+        "pinned": bool(record.get("pinned")),
+    }
+    if record.get("type") == "list":
+        op["items"] = [
+            {"text": item["text"], "checked": bool(item.get("checked"))}
+            for item in record.get("items") or []
+        ]
+    else:
+        op["text"] = record.get("text") or ""
+    return op
+
+
+def restore_note_operations(note: Any, record: dict[str, Any]) -> list[dict[str, Any]]:
+    ops: list[dict[str, Any]] = []
+    edit = {}
+    if note.title != (record.get("title") or ""):
+        edit["title"] = record.get("title") or ""
+    if not is_list_note(note) and note.text != (record.get("text") or ""):
+        edit["text"] = record.get("text") or ""
+    if edit:
+        ops.append({"op": "edit", "note": note.id, **edit})
+
+    if is_list_note(note):
+        wanted = {item["id"]: item for item in record.get("items") or []}
+        live = {item.id: item for item in note.items}
+        # Items re-added by an earlier restore have new IDs; pair them by text.
+        spare: defaultdict[str, list[Any]] = defaultdict(list)
+        for item in live.values():
+            if item.id not in wanted:
+                spare[item.text].append(item)
+        for item_id, item in wanted.items():
+            current = live.get(item_id)
+            if current is None and spare.get(item["text"]):
+                current = spare[item["text"]].pop(0)
+            if current is None:
+                ops.append(
+                    {
+                        "op": "item-add",
+                        "note": note.id,
+                        "text": item["text"],
+                        "checked": bool(item.get("checked")),
+                    }
+                )
+                continue
+            target = {"note": note.id, "item": current.id}
+            if current.text != item["text"]:
+                ops.append({"op": "item-edit", **target, "text": item["text"]})
+            if bool(current.checked) != bool(item.get("checked")):
+                ops.append(
+                    {"op": "check" if item.get("checked") else "uncheck", **target}
+                )
+        for items in spare.values():
+            for extra in items:
+                ops.append({"op": "item-delete", "note": note.id, "item": extra.id})
+
+    for flag, on, off in (
+        ("pinned", "pin", "unpin"),
+        ("archived", "archive", "unarchive"),
+        ("trashed", "trash", "restore"),
+    ):
+        if bool(getattr(note, flag)) != bool(record.get(flag)):
+            ops.append({"op": on if record.get(flag) else off, "note": note.id})
+    return ops
+
+
+def read_operations(source: str) -> list[PlannedOperation]:
+    try:
+        if source == "-":
+            text = sys.stdin.read()
+        else:
+            text = Path(source).read_text(encoding="utf-8")
+    except OSError as exc:
+        raise KeepCliError(f"Could not read operations from {source}: {exc}") from exc
+
+    operations = []
+    errors = []
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            op = json.loads(line)
+        except ValueError as exc:
+            errors.append(f"line {line_number}: invalid JSON: {exc}")
+            continue
+        problem = validate_operation(op)
+        if problem:
+            errors.append(f"line {line_number}: {problem}")
+        else:
+            operations.append(PlannedOperation(line_number, op))
+    if errors:
+        raise invalid_operations_error(errors)
+    return operations
+
+
+def invalid_operations_error(errors: list[str]) -> KeepCliError:
+    return KeepCliError(
+        "Nothing was applied; fix these operations first:\n  " + "\n  ".join(errors)
+    )
+
+
+def validate_operation(op: Any) -> str | None:
+    if not isinstance(op, dict):
+        return "expected a JSON object"
+    name = op.get("op")
+    fields = APPLY_OPERATION_FIELDS.get(name) if isinstance(name, str) else None
+    if fields is None:
+        return f"unknown op {name!r}; use one of {', '.join(APPLY_OPERATION_FIELDS)}"
+    unknown = sorted(set(op) - set(fields) - {"op"})
+    if unknown:
+        return f"unknown field(s) for {name}: {', '.join(unknown)}"
+    for field, field_type in fields.items():
+        if field in op and not isinstance(op[field], field_type):
+            return f"{field} must be a {field_type.__name__}"
+    required: list[str] = [field for field in ("note", "item") if field in fields]
+    if name == "item-edit":
+        required.append("text")
+    missing = [field for field in required if not op.get(field)]
+    if missing:
+        return f"{name} needs {', '.join(missing)}"
+    if name == "edit" and "title" not in op and "text" not in op:
+        return "edit needs title or text"
+    if name == "item-add" and "text" not in op:
+        return "item-add needs text"
+    if name == "create":
+        if "text" in op and "items" in op:
+            return "create takes text or items, not both"
+        for item in op.get("items", []):
+            if not (
+                isinstance(item, dict)
+                and isinstance(item.get("text"), str)
+                and isinstance(item.get("checked", False), bool)
+            ):
+                return 'create items must be {"text": str, "checked": bool} objects'
+    return None
+
+
+def plan_operation(keep: Any, operation: PlannedOperation) -> None:
+    op = operation.op
+    name = op["op"]
+    if name == "create":
+        operation.action = "create"
+        operation.create = lambda: create_note(keep, op)
+        return
+    operation.note = resolve_note(keep, op["note"])
+    if "item" in APPLY_OPERATION_FIELDS[name]:
+        require_list_note(operation.note)
+        operation.item = resolve_item(keep, operation.note, op["item"])
+
+    if name in NOTE_MUTATIONS:
+        operation.action, operation.mutator = NOTE_MUTATIONS[name]
+    elif name in ITEM_MUTATIONS:
+        operation.action, operation.mutator = ITEM_MUTATIONS[name]
+    elif name == "delete":
+        if op.get("permanent"):
+            operation.action = "permanently delete"
+            operation.mutator = lambda note: note.delete()
+        else:
+            operation.action, operation.mutator = NOTE_MUTATIONS["trash"]
+    elif name == "item-edit":
+        operation.action = "edit item"
+        operation.mutator = lambda item: setattr(item, "text", op["text"])
+    elif name == "item-add":
+        require_list_note(operation.note)
+        operation.action = "add item"
+        operation.mutator = lambda note: note.add(op["text"], op.get("checked", False))
+    else:
+        if "text" in op and is_list_note(operation.note):
+            raise KeepCliError(
+                "This is a checklist note. Use item-edit, check, uncheck, or "
+                "item-delete instead of replacing text."
+            )
+        operation.action = "edit"
+        operation.mutator = lambda note: edit_note(
+            note, op.get("title"), op.get("text")
+        )
+
+
+def create_note(keep: Any, op: dict[str, Any]) -> Any:
+    if "items" in op:
+        note = keep.createList(
+            op.get("title", ""),
+            [(item["text"], item.get("checked", False)) for item in op["items"]],
+        )
+    else:
+        note = keep.createNote(op.get("title", ""), op.get("text", ""))
+    note.archived = op.get("archived", False)
+    note.pinned = op.get("pinned", False)
+    return note
+
+
+def edit_note(note: Any, title: str | None, text: str | None) -> None:
+    if title is not None:
+        note.title = title
+    if text is not None:
+        note.text = text
+
+
+def operations_diff(initial: dict[str, dict[str, Any]], keep: Any) -> str:
+    import difflib
+
+    chunks: list[str] = []
+    for note_id, before in initial.items():
+        after = serialize_note(keep.get(note_id))
+        before_lines = json.dumps(before, indent=2, sort_keys=True).splitlines(True)
+        after_lines = json.dumps(after, indent=2, sort_keys=True).splitlines(True)
+        label = format_note_ref(keep.get(note_id))
+        chunks.extend(
+            difflib.unified_diff(before_lines, after_lines, f"a/{label}", f"b/{label}")
+        )
+    return "".join(chunks)
+
+
+def cmd_serve(args: argparse.Namespace) -> int:
+    global _served_session
+    email = require_email(args)
+    keep = login_keep(args)
+    _served_session = (email, keep)
+    path = daemon_socket_path(email)
+    server = daemon.SessionDaemon(
+        path,
+        run_served_request,
+        is_served_mutation,
+        lambda: sync_keep(keep, "refresh the served session", email),
+        args.refresh_interval,
+    )
+    # Unwind normally on SIGTERM so the socket is removed.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print(
+        f"Serving {email} on {path}, syncing every "
+        f"{format_age(args.refresh_interval)}.",
+        file=sys.stderr,
+    )
+    try:
+        server.serve_forever()
+    except FileExistsError as exc:
+        raise KeepCliError(str(exc)) from exc
+    finally:
+        _served_session = None
+    return 0
+
+
+def cmd_watch(args: argparse.Namespace) -> int:
+    if args.max_interval < args.interval:
+        raise KeepCliError("--max-interval must not be shorter than --interval.")
+    email = require_email(args)
+    path = args.cursor or watch_cursor_path(email)
+    keep = login_keep(args)
+    cursor = change_feed.load_cursor(path)
+    if cursor is None:
+        cursor, _ = report_changes(keep, change_feed.Cursor(None, {}), path, quiet=True)
+        print(f"No watch cursor at {path}; starting from now.", file=sys.stderr)
+    else:
+        # Changes made while no watch was running come first.
+        cursor, _ = report_changes(keep, cursor, path)
+    if args.once:
+        return 0
+    # Unwind normally on SIGTERM, as `serve` does.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    backoff = change_feed.Backoff(args.interval, args.max_interval)
+    delay = args.interval
+    while True:
+        time.sleep(delay)
+        try:
+            sync_keep(keep, "watch for changes", email)
+        except KeepCliError as exc:
+            delay = backoff.next_interval(failed=True)
+            print(f"Warning: {exc} (retrying in {format_age(delay)})", file=sys.stderr)
+            continue
+        cursor, reported = report_changes(keep, cursor, path)
+        delay = backoff.next_interval(changed=reported > 0)
+
+
+def report_changes(
+    keep: Any, cursor: Any, path: Path, quiet: bool = False
+) -> tuple[Any, int]:
+    # An unchanged keep_version means the sync fetched nothing new.
+    keep_version = getattr(keep, "_keep_version", None)
+    if keep_version is not None and keep_version == cursor.keep_version:
+        return cursor, 0
+    records = {
+        note.id: serialize_note_fields(note, WATCH_FIELDS)
+        for note in active_notes(keep.all())
+    }
+    events = change_feed.note_changes(cursor.notes, records.values())
+    reported = 0
+    if not quiet:
+        reported = backups.write_records(
+            sys.stdout, ({**event, "keep_version": keep_version} for event in events)
+        )
+        sys.stdout.flush()
+        count_touched(notes=len(records))
+    # Saved after the events are out, so a crash repeats them rather than
+    # losing them.
+    cursor = change_feed.Cursor(keep_version, records)
+    try:
+        write_private_file(path, change_feed.dump_cursor(cursor))
+    except OSError as exc:
+        print(f"Warning: could not save watch cursor: {exc}", file=sys.stderr)
+    return cursor, reported
+
+
+def run_in_daemon(args: argparse.Namespace, argv: list[str]) -> int | None:
+    if getattr(args, "local_only", False) or os.environ.get("KEEP_CLI_NO_DAEMON"):
+        return None
+    # A daemon serves a real account, never the fake one.
+    if fake_keep.fake_cache_namespace() is not None:
+        return None
+    email = configured_email(args)
+    if not email:
+        return None
+    path = daemon_socket_path(email)
+    if not path.exists():
+        return None
+
+    reads_stdin = getattr(args, "stdin", False) is True or (
+        getattr(args, "ops", None) == "-"
+    )
+    stdin = sys.stdin.read() if reads_stdin else None
+    request = {
+        "argv": argv,
+        # The daemon's own environment may name no account, or another one.
+        "email": email,
+        "cwd": os.getcwd(),
+        "stdin": stdin,
+        "columns": shutil.get_terminal_size((100, 24)).columns,
+        # The daemon times the command; KEEP_CLI_PROFILE is not in its env.
+        "profile": wants_profile(args),
+    }
+    try:
+        response = daemon.send_request(path, request)
+    except (OSError, ValueError) as exc:
+        raise KeepCliError(f"The keep-cli daemon at {path} failed: {exc}") from exc
+    if response is None or "refused" in response:
+        # Not running after all, or serving another account; run locally with
+        # whatever stdin was read.
+        if stdin is not None:
+            sys.stdin = io.StringIO(stdin)
+        return None
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    return int(response["exit"])
+
+
+def run_served_request(request: dict[str, Any]) -> dict[str, Any]:
+    served_email = _served_session[0] if _served_session is not None else None
+    if request.get("email") != served_email:
+        return {"refused": f"this daemon serves {served_email}"}
+    stdout, stderr = io.StringIO(), io.StringIO()
+    saved_cwd, saved_stdin = os.getcwd(), sys.stdin
+    saved_columns = os.environ.get("COLUMNS")
+    try:
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                os.chdir(request["cwd"])
+                os.environ["COLUMNS"] = str(request["columns"])
+                sys.stdin = io.StringIO(request.get("stdin") or "")
+                args = build_parser().parse_args(request["argv"])
+                # As if --email were given, so the account is the client's.
+                args.email = request["email"]
+                if request.get("profile"):
+                    args.profile = True
+                exit_code = run_command(args)
+            except SystemExit as exc:
+                exit_code = exc.code if isinstance(exc.code, int) else 1
+            except OSError as exc:
+                print(f"Error: {exc}", file=sys.stderr)
+                exit_code = 1
+    finally:
+        os.chdir(saved_cwd)
+        sys.stdin = saved_stdin
+        if saved_columns is None:
+            os.environ.pop("COLUMNS", None)
+        else:
+            os.environ["COLUMNS"] = saved_columns
+    return {"exit": exit_code, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+
+
+def is_served_mutation(request: dict[str, Any]) -> bool:
+    try:
+        with redirect_stderr(io.StringIO()):
+            args = build_parser().parse_args(request["argv"])
+    except SystemExit:
+        return False
+    return bool(getattr(args, "mutates", False))
+
+
+def read_keep(args: argparse.Namespace) -> Any:
     email = require_email(args)
-    token, _source = require_master_token(args, email)
+    if use_cached_state(args, email):
+        return load_cached_keep(email)
+    return login_keep(args)
+
+
+def use_cached_state(args: argparse.Namespace, email: str) -> bool:
+    offline = bool(getattr(args, "offline", False))
+    max_staleness: float | None = getattr(args, "max_staleness", None)
+    if max_staleness is None and not offline:
+        return False
+
+    try:
+        synced_at: float | None = state_cache_path(email).stat().st_mtime
+    except OSError:
+        synced_at = None
+    if offline and synced_at is None:
+        raise KeepCliError(
+            f"No cached note state for {email} yet. Run a command without "
+            "--offline once."
+        )
+    max_age = float("inf") if offline or max_staleness is None else max_staleness
+    if synced_at is not None and time.time() - synced_at <= max_age:
+        args.staleness = staleness_info("cache", synced_at)
+        return True
+    args.staleness = staleness_info("sync", time.time())
+    return False
+
+
+def staleness_info(source: str, synced_at: float) -> dict[str, Any]:
+    return {
+        "source": source,
+        "synced_at": _datetime.datetime.fromtimestamp(
+            synced_at, tz=_datetime.UTC
+        ).isoformat(timespec="seconds"),
+        "age_seconds": round(max(0.0, time.time() - synced_at), 1),
+    }
+
+
+def load_cached_keep(email: str) -> Any:
     gkeepapi = import_gkeepapi()
     keep = gkeepapi.Keep()
-    try:
-        keep.authenticate(email, token)
-    except Exception as exc:  # pragma: no cover - depends on Google auth service.
+    if not restore_keep_state(keep, load_keep_state(email)):
         raise KeepCliError(
-            f"Could not authenticate Google Keep as {email}: {exc}"
-        ) from exc
+            f"The cached note state for {email} is unreadable. Run a command "
+            "without --offline to sync it again."
+        )
+    update_id_index(keep, email, getattr(keep, "_keep_version", None))
+    return keep
+
+
+def parse_duration(value: str) -> float:
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*", value, re.IGNORECASE)
+    if not match:
+        raise argparse.ArgumentTypeError(
+            f"invalid duration {value!r}; use e.g. 90s, 15m, 2h, or 1d"
+        )
+    multiplier = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}
+    return float(match.group(1)) * multiplier[match.group(2).lower()]
+
+
+def parse_count(value: str) -> int:
+    try:
+        count = int(value)
+    except ValueError:
+        count = -1
+    if count < 0:
+        raise argparse.ArgumentTypeError(f"invalid count {value!r}; use 0 or more")
+    return count
+
+
+def parse_fields(value: str) -> list[str]:
+    fields = [field.strip() for field in value.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in LISTING_FIELDS]
+    if unknown or not fields:
+        raise argparse.ArgumentTypeError(
+            f"invalid fields {value!r}; choose from {', '.join(LISTING_FIELDS)}"
+        )
+    return fields
+
+
+def format_age(seconds: float) -> str:
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds >= size:
+            return f"{int(seconds // size)}{unit}"
+    return f"{int(seconds)}s"
+
+
+def login_keep(args: argparse.Namespace) -> Any:
+    email = require_email(args)
+    if _served_session is not None and _served_session[0] == email:
+        # Running inside `keep-cli serve`; its timer keeps the session synced.
+        # Dry runs change notes in memory, so they get a throwaway copy.
+        if is_dry_run(args):
+            return copy_keep(_served_session[1])
+        return _served_session[1]
+    gkeepapi = import_gkeepapi()
+    try:
+        fake_notes = fake_keep.fake_note_count()
+    except ValueError as exc:
+        raise KeepCliError(str(exc)) from exc
+    if fake_notes is not None:
+        keep = fake_keep.create_fake_keep(gkeepapi, fake_notes)
+    else:
+        keep = gkeepapi.Keep()
+        token, _source = require_master_token(args, email)
+        with timed("authenticate"):
+            try:
+                auth = build_keep_auth(gkeepapi, email, token)
+            except KeepCliError:
+                raise
+            except Exception as exc:  # pragma: no cover - depends on Google auth.
+                raise KeepCliError(
+                    f"Could not authenticate Google Keep as {email}: {exc}"
+                ) from exc
+            keep.load(auth, sync=False)
+
+    # Resume from the cached note state so the sync only fetches changes.
+    restored = restore_keep_state(keep, load_keep_state(email))
+    with timed("sync"):
+        try:
+            keep.sync()
+        except Exception as exc:  # pragma: no cover - depends on Google Keep service.
+            if not restored:
+                raise KeepCliError(f"Google Keep sync failed: {exc}") from exc
+            # The cached state may be too old to resume from; fall back to a full
+            # sync.
+            try:
+                keep.sync(resync=True)
+            except Exception as resync_exc:
+                raise KeepCliError(
+                    f"Google Keep sync failed: {resync_exc}"
+                ) from resync_exc
+    persist_synced_state(keep, email)
     return keep
 
 
-def sync_keep(keep: Any, action: str) -> None:
+def copy_keep(keep: Any) -> Any:
+    copy = import_gkeepapi().Keep()
+    copy.restore(keep.dump())
+    return copy
+
+
+def sync_keep(keep: Any, action: str, email: str) -> None:
+    with timed("sync"):
+        try:
+            keep.sync()
+        except Exception as exc:  # pragma: no cover - depends on Google Keep service.
+            raise KeepCliError(
+                f"Google Keep sync failed while trying to {action}: {exc}"
+            ) from exc
+    persist_synced_state(keep, email)
+
+
+def keep_cache_dir() -> Path:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(cache_home) / "keep-cli"
+
+
+def cache_file_name(kind: str, email: str, suffix: str = ".json") -> str:
+    # A fake account's caches must never replace the real account's.
+    namespace = fake_keep.fake_cache_namespace()
+    if namespace is not None:
+        email = f"{namespace}-{email}"
+    safe_email = re.sub(r"[^\w.@-]", "_", email)
+    return f"{kind}-{safe_email}{suffix}"
+
+
+def state_cache_path(email: str) -> Path:
+    return keep_cache_dir() / cache_file_name("state", email)
+
+
+def id_index_path(email: str) -> Path:
+    return keep_cache_dir() / cache_file_name("ids", email)
+
+
+def search_index_path(email: str) -> Path:
+    return keep_cache_dir() / cache_file_name("index", email, ".sqlite3")
+
+
+def watch_cursor_path(email: str) -> Path:
+    return keep_cache_dir() / cache_file_name("watch", email)
+
+
+def daemon_socket_path(email: str) -> Path:
+    return keep_cache_dir() / cache_file_name("serve", email, ".sock")
+
+
+def auth_cache_path(email: str) -> Path:
+    return keep_cache_dir() / cache_file_name("auth", email)
+
+
+def token_fingerprint(master_token: str) -> str:
+    return hashlib.sha256(master_token.encode("utf-8")).hexdigest()
+
+
+def load_cached_auth_token(email: str, master_token: str, device_id: str) -> str | None:
+    try:
+        cached = json.loads(auth_cache_path(email).read_text(encoding="utf-8"))
+        auth_token = cached["auth_token"]
+        expires_at = float(cached["expires_at"])
+        fingerprint = cached["master_token_sha256"]
+        cached_device_id = cached["device_id"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    # A token minted for another master token or device must not be reused.
+    if fingerprint != token_fingerprint(master_token) or cached_device_id != device_id:
+        return None
+    if time.time() >= expires_at - AUTH_TOKEN_EXPIRY_MARGIN:
+        return None
+    return auth_token if isinstance(auth_token, str) and auth_token else None
+
+
+def save_cached_auth_token(
+    email: str, master_token: str, device_id: str, auth_token: str, expires_at: float
+) -> None:
+    data = {
+        "auth_token": auth_token,
+        "expires_at": expires_at,
+        "master_token_sha256": token_fingerprint(master_token),
+        "device_id": device_id,
+    }
+    try:
+        write_private_file(auth_cache_path(email), json.dumps(data))
+    except OSError as exc:
+        print(f"Warning: could not cache auth token: {exc}", file=sys.stderr)
+
+
+@profiled("load state")
+def load_keep_state(email: str) -> dict[str, Any] | None:
+    try:
+        state = json.loads(state_cache_path(email).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return state if isinstance(state, dict) else None
+
+
+@profiled("load state")
+def restore_keep_state(keep: Any, state: dict[str, Any] | None) -> bool:
+    if state is None:
+        return False
+    try:
+        keep.restore(state)
+    except Exception:
+        # Ignore a corrupt or incompatible cache and start from an empty tree.
+        keep.restore({"keep_version": None, "labels": [], "nodes": []})
+        return False
+    return True
+
+
+def persist_synced_state(keep: Any, email: str) -> None:
+    with timed("save state"):
+        state = keep.dump()
+        save_keep_state(state, email)
+    update_search_index(keep, email, state.get("keep_version"))
+    update_id_index(keep, email, state.get("keep_version"))
+
+
+def save_keep_state(state: dict[str, Any], email: str) -> None:
+    try:
+        write_private_file(state_cache_path(email), json.dumps(state))
+    except (OSError, TypeError, ValueError) as exc:
+        print(f"Warning: could not cache Keep state: {exc}", file=sys.stderr)
+
+
+@profiled("search index")
+def update_search_index(keep: Any, email: str, keep_version: str | None) -> None:
+    if not search_index.fts5_available():
+        return
     try:
-        keep.sync()
-    except Exception as exc:  # pragma: no cover - depends on Google Keep service.
+        with closing(search_index.open_index(search_index_path(email))) as conn:
+            # Nothing changed since the last sync that updated the index.
+            if keep_version and search_index.get_meta(conn, "keep_version") == (
+                keep_version
+            ):
+                return
+            search_index.update_index(
+                conn,
+                (
+                    search_index.NoteSource(
+                        note.id,
+                        note_fingerprint(note),
+                        functools.partial(index_note, note),
+                    )
+                    for note in active_notes(keep.all())
+                ),
+                keep_version,
+            )
+    except (OSError, sqlite3.Error) as exc:
+        print(f"Warning: could not update search index: {exc}", file=sys.stderr)
+
+
+@profiled("id index")
+def update_id_index(keep: Any, email: str, keep_version: str | None) -> None:
+    path = id_index_path(email)
+    index = id_index.load_id_index(path, keep_version)
+    if index is None:
+        index = id_index.build_id_index(keep_version, active_notes(keep.all()))
+        try:
+            write_private_file(path, id_index.dump_id_index(index))
+        except OSError as exc:
+            print(f"Warning: could not cache note ID index: {exc}", file=sys.stderr)
+    _keep_id_indexes[keep] = index
+
+
+def note_fingerprint(note: Any) -> str:
+    # Labels, trashing, and checklist item edits don't touch the note's updated
+    # time, so they are part of the fingerprint too.
+    timestamps = note.timestamps
+    parts = [
+        datetime_to_str(timestamps.updated),
+        datetime_to_str(getattr(timestamps, "trashed", None)),
+        datetime_to_str(getattr(timestamps, "deleted", None)),
+        *sorted(label.id for label in note.labels.all()),
+    ]
+    if is_list_note(note):
+        # Children, unlike items, are not sorted on every access.
+        parts.extend(
+            f"{item.id}@{datetime_to_str(item.timestamps.updated)}"
+            f"@{datetime_to_str(item.timestamps.deleted)}"
+            for item in note.children
+        )
+    return "|".join(str(part) for part in parts)
+
+
+def index_note(note: Any) -> Any:
+    return search_index.IndexedNote(
+        id=note.id,
+        title=note.title,
+        body=note_search_text(note),
+        labels=[label.name for label in note.labels.all()],
+        archived=bool(note.archived),
+        trashed=bool(note.trashed),
+        data=serialize_note(note),
+        items=tuple((item.id, item.text) for item in note.items)
+        if is_list_note(note)
+        else (),
+    )
+
+
+def delete_cache_file(path: Path) -> None:
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+    except OSError as exc:
+        raise KeepCliError(f"Could not delete cache file {path}: {exc}") from exc
+
+
+def write_private_file(path: Path, data: str) -> None:
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def build_keep_auth(gkeepapi: Any, email: str, master_token: str) -> Any:
+    class CachedAPIAuth(gkeepapi.APIAuth):
+        """APIAuth that caches the auth token, including refreshes after a 401."""
+
+        def refresh(self) -> str:
+            auth_token, expires_at = fetch_auth_token(
+                self.getEmail(), self.getMasterToken(), self.getDeviceId(), self._scopes
+            )
+            self._auth_token = auth_token
+            save_cached_auth_token(
+                self.getEmail(),
+                self.getMasterToken(),
+                self.getDeviceId(),
+                auth_token,
+                expires_at,
+            )
+            return auth_token
+
+    # Same default device ID as gkeepapi's Keep.authenticate.
+    device_id = f"{uuid.getnode():x}"
+    auth = CachedAPIAuth(gkeepapi.Keep.OAUTH_SCOPES)
+    auth.setEmail(email)
+    auth.setMasterToken(master_token)
+    auth.setDeviceId(device_id)
+    cached_token = load_cached_auth_token(email, master_token, device_id)
+    if cached_token:
+        auth._auth_token = cached_token
+    else:
+        auth.refresh()
+    return auth
+
+
+def fetch_auth_token(
+    email: str, master_token: str, device_id: str, scopes: str
+) -> tuple[str, float]:
+    gpsoauth = import_gpsoauth()
+    response = gpsoauth.perform_oauth(
+        email,
+        master_token,
+        device_id,
+        service=scopes,
+        app=KEEP_OAUTH_APP,
+        client_sig=KEEP_OAUTH_CLIENT_SIG,
+    )
+    auth_token = response.get("Auth")
+    if not auth_token:
         raise KeepCliError(
-            f"Google Keep sync failed while trying to {action}: {exc}"
-        ) from exc
+            f"Could not authenticate Google Keep as {email}: "
+            f"{response.get('Error') or 'no auth token returned'}"
+        )
+    try:
+        expires_at = float(response["Expiry"])
+    except (KeyError, ValueError):
+        expires_at = time.time() + DEFAULT_AUTH_TOKEN_LIFETIME
+    return auth_token, expires_at
 
 
+@profiled("import")
 def import_gkeepapi() -> Any:
     try:
         import gkeepapi  # type: ignore[import-not-found]
@@ -626,6 +2200,17 @@ def require_master_token(args: argparse.Namespace, email: str) -> tuple[str, str
     )
 
 
+def import_gpsoauth() -> Any:
+    try:
+        import gpsoauth  # type: ignore[import-not-found]
+    except ImportError as exc:
+        raise KeepCliError(
+            "Missing dependency 'gpsoauth'. Run through `pybash ~/lib/keep_cli` "
+            "or install lib/keep_cli/requirements.txt."
+        ) from exc
+    return gpsoauth
+
+
 def import_keyring() -> Any:
     try:
         import keyring  # type: ignore[import-not-found]
@@ -637,6 +2222,7 @@ def import_keyring() -> Any:
     return keyring
 
 
+@profiled("keyring")
 def get_keyring_token(email: str, service: str) -> str | None:
     keyring = import_keyring()
     try:
@@ -688,44 +2274,71 @@ def read_edit_text(args: argparse.Namespace) -> str | None:
     return None
 
 
+@profiled("resolve")
 def resolve_note(keep: Any, note_id_or_prefix: str) -> Any:
-    target = note_id_or_prefix.casefold()
-    notes = list(active_notes(keep.find(archived=None, trashed=None)))
-    exact = [note for note in notes if note.id.casefold() == target]
-    if exact:
-        return exact[0]
-
-    matches = [note for note in notes if note.id.casefold().startswith(target)]
-    if not matches:
+    match = keep_id_index(keep).notes.lookup(note_id_or_prefix)
+    notes = [keep.get(note_id) for note_id in match.ids]
+    if not all(
+        note is not None and not getattr(note, "deleted", False) for note in notes
+    ):
+        # Notes changed locally since the index was built.
+        match = keep_id_index(keep, rebuild=True).notes.lookup(note_id_or_prefix)
+        notes = [keep.get(note_id) for note_id in match.ids]
+
+    if not match.total:
         raise KeepCliError(f"No note matches ID or prefix '{note_id_or_prefix}'.")
-    if len(matches) > 1:
-        preview = ", ".join(format_note_ref(note) for note in matches[:8])
-        extra = "" if len(matches) <= 8 else f", and {len(matches) - 8} more"
+    if match.total > 1:
+        preview = ", ".join(format_note_ref(note) for note in notes)
+        extra = (
+            ""
+            if match.total <= len(notes)
+            else f", and {match.total - len(notes)} more"
+        )
         raise KeepCliError(
             f"Ambiguous note prefix '{note_id_or_prefix}' matches {preview}{extra}."
         )
-    return matches[0]
-
-
-def resolve_item(note: Any, item_id_or_prefix: str) -> Any:
-    target = item_id_or_prefix.casefold()
-    items = list(note.items)
-    exact = [item for item in items if item.id.casefold() == target]
-    if exact:
-        return exact[0]
+    return notes[0]
+
+
+@profiled("resolve")
+def resolve_item(keep: Any, note: Any, item_id_or_prefix: str) -> Any:
+    item_ids = keep_id_index(keep).items.get(note.id)
+    match = item_ids.lookup(item_id_or_prefix) if item_ids is not None else None
+    items = [note.get(item_id) for item_id in match.ids] if match is not None else []
+    if match is None or not all(
+        item is not None and not getattr(item, "deleted", False) for item in items
+    ):
+        # Items changed locally since the index was built.
+        match = id_index.SortedIds(item.id for item in note.items).lookup(
+            item_id_or_prefix
+        )
+        items = [note.get(item_id) for item_id in match.ids]
 
-    matches = [item for item in items if item.id.casefold().startswith(target)]
-    if not matches:
+    if not match.total:
         raise KeepCliError(
             f"No checklist item matches ID or prefix '{item_id_or_prefix}'."
         )
-    if len(matches) > 1:
-        preview = ", ".join(format_item_ref(item) for item in matches[:8])
-        extra = "" if len(matches) <= 8 else f", and {len(matches) - 8} more"
+    if match.total > 1:
+        preview = ", ".join(format_item_ref(item) for item in items)
+        extra = (
+            ""
+            if match.total <= len(items)
+            else f", and {match.total - len(items)} more"
+        )
         raise KeepCliError(
             f"Ambiguous item prefix '{item_id_or_prefix}' matches {preview}{extra}."
         )
-    return matches[0]
+    return items[0]
+
+
+@profiled("id index")
+def keep_id_index(keep: Any, rebuild: bool = False) -> Any:
+    keep_version = getattr(keep, "_keep_version", None)
+    index = _keep_id_indexes.get(keep)
+    if rebuild or index is None or index.keep_version != keep_version:
+        index = id_index.build_id_index(keep_version, active_notes(keep.all()))
+        _keep_id_indexes[keep] = index
+    return index
 
 
 def active_notes(notes: Iterable[Any]) -> Iterable[Any]:
@@ -760,14 +2373,111 @@ def find_scope(args: argparse.Namespace) -> tuple[bool | None, bool | None]:
     return None, False
 
 
-def emit_note_list(notes: list[Any], args: argparse.Namespace) -> int:
-    if wants_json(args):
-        emit_json([serialize_note(note) for note in notes])
+def emit_note_list(notes: Iterable[Any], args: argparse.Namespace) -> int:
+    notes = touched(paginate(notes, args))
+    fields = args.fields or NOTE_FIELDS
+    if wants_jsonl(args):
+        emit_jsonl((serialize_note_fields(note, fields) for note in notes), args)
+    elif wants_json(args):
+        with timed("serialize"):
+            data = [serialize_note_fields(note, fields) for note in notes]
+        emit_read_json(data, args)
     else:
         print_note_table(notes)
+        print_staleness(args)
+    return 0
+
+
+def emit_search_hits(
+    hits: Iterable[Any], args: argparse.Namespace, paged: bool = False
+) -> int:
+    if not paged:
+        hits = paginate(hits, args, search_hits=True)
+    hits = touched(hits)
+    if wants_json(args) or wants_jsonl(args):
+        fields = args.fields or [*NOTE_FIELDS, *SEARCH_HIT_FIELDS]
+        records = (
+            project_fields(
+                {
+                    **hit.note,
+                    "snippet": hit.snippet,
+                    "rank": hit.rank,
+                    "item_id": hit.item_id,
+                },
+                fields,
+            )
+            for hit in hits
+        )
+        if wants_jsonl(args):
+            emit_jsonl(records, args)
+            return 0
+        with timed("serialize"):
+            data = list(records)
+        emit_read_json(data, args)
+    else:
+        print_search_table(hits)
+        print_staleness(args)
     return 0
 
 
+def paginate(
+    entries: Iterable[Any], args: argparse.Namespace, search_hits: bool = False
+) -> Iterator[Any]:
+    # Only --sort and --reverse need every entry up front; a limited sort keeps
+    # just the top offset + limit entries in a heap.
+    stop = None if args.limit is None else args.offset + args.limit
+    if args.sort is not None:
+        note_key, hit_key, newest_first = LISTING_SORT_KEYS[args.sort]
+        key = hit_key if search_hits else note_key
+        descending = newest_first != args.reverse
+        if stop is not None:
+            pick = heapq.nlargest if descending else heapq.nsmallest
+            entries = pick(stop, entries, key=key)
+        else:
+            entries = sorted(entries, key=key, reverse=descending)
+    elif args.reverse:
+        entries = reversed(list(entries))
+    return itertools.islice(entries, args.offset, stop)
+
+
+def touched(notes: Iterable[Any]) -> Iterator[Any]:
+    for note in notes:
+        count_touched(notes=1)
+        yield note
+
+
+def emit_read_json(value: Any, args: argparse.Namespace) -> None:
+    emit_json(value)
+    emit_staleness_metadata(args)
+
+
+def emit_jsonl(records: Iterable[dict[str, Any]], args: argparse.Namespace) -> None:
+    backups.write_records(sys.stdout, records)
+    emit_staleness_metadata(args)
+
+
+def emit_staleness_metadata(args: argparse.Namespace) -> None:
+    # --offline/--max-staleness responses say where they came from.
+    staleness = getattr(args, "staleness", None)
+    if staleness is not None:
+        emit_json_metadata("_staleness", staleness)
+
+
+def emit_json_metadata(key: str, metadata: Any) -> None:
+    # Metadata goes to stderr as one JSON line, so stdout keeps the same shape
+    # whatever flags are set.
+    print(json.dumps({key: metadata}, sort_keys=True), file=sys.stderr)
+
+
+def print_staleness(args: argparse.Namespace) -> None:
+    staleness = getattr(args, "staleness", None)
+    if staleness is not None and staleness["source"] == "cache":
+        print(
+            f"\nOffline: note state synced {format_age(staleness['age_seconds'])} "
+            f"ago ({staleness['synced_at']})."
+        )
+
+
 def emit_note_change(
     action: str,
     before: dict[str, Any],
@@ -830,6 +2540,10 @@ def past_tense(action: str) -> str:
         "unarchive": "Unarchived",
         "trash": "Trashed",
         "restore": "Restored",
+        "pin": "Pinned",
+        "unpin": "Unpinned",
+        "create": "Created",
+        "add item": "Added item",
         "check": "Checked",
         "uncheck": "Unchecked",
         "delete item": "Deleted item",
@@ -842,39 +2556,97 @@ def wants_json(args: argparse.Namespace) -> bool:
     return bool(getattr(args, "json", False))
 
 
+def wants_jsonl(args: argparse.Namespace) -> bool:
+    if getattr(args, "jsonl", False):
+        if wants_json(args):
+            raise KeepCliError("Use either --json or --jsonl, not both.")
+        return True
+    return False
+
+
 def is_dry_run(args: argparse.Namespace) -> bool:
     return bool(getattr(args, "dry_run", False))
 
 
+@profiled("render")
 def emit_json(value: Any) -> None:
     print(json.dumps(value, indent=2, sort_keys=True))
 
 
+# Serialized note fields; --fields picks a subset so the rest are never built.
+NOTE_FIELDS: dict[str, Callable[[Any], Any]] = {
+    "id": lambda note: note.id,
+    "type": lambda note: "list" if is_list_note(note) else "note",
+    "title": lambda note: note.title,
+    "archived": lambda note: bool(note.archived),
+    "trashed": lambda note: bool(note.trashed),
+    "deleted": lambda note: bool(getattr(note, "deleted", False)),
+    "pinned": lambda note: bool(note.pinned),
+    "color": lambda note: serialize_color(note.color),
+    "url": lambda note: getattr(note, "url", None),
+    "timestamps": lambda note: serialize_timestamps(note),
+    "text": lambda note: note_search_text(note) if is_list_note(note) else note.text,
+    # Only lists have items.
+    "items": lambda note: [serialize_item(item) for item in note.items],
+}
+NOTE_SUMMARY_FIELDS = (
+    "id",
+    "type",
+    "title",
+    "archived",
+    "trashed",
+    "deleted",
+    "pinned",
+    "color",
+    "url",
+)
+SEARCH_HIT_FIELDS = ("snippet", "rank", "item_id")
+# `watch` compares these; timestamps change on every touch, so they are left out.
+WATCH_FIELDS = tuple(name for name in NOTE_FIELDS if name != "timestamps")
+LISTING_FIELDS = (*NOTE_FIELDS, *SEARCH_HIT_FIELDS)
+
+# --sort keys: (key for a note, key for a search hit, newest first)
+LISTING_SORT_KEYS: dict[
+    str, tuple[Callable[[Any], Any], Callable[[Any], Any], bool]
+] = {
+    "updated": (
+        lambda note: note.timestamps.updated,
+        lambda hit: hit.note["timestamps"]["updated"] or "",
+        True,
+    ),
+    "created": (
+        lambda note: note.timestamps.created,
+        lambda hit: hit.note["timestamps"]["created"] or "",
+        True,
+    ),
+    "title": (
+        lambda note: (note.title or "").casefold(),
+        lambda hit: (hit.note["title"] or "").casefold(),
+        False,
+    ),
+}
+
+
 def serialize_note(note: Any) -> dict[str, Any]:
-    data = serialize_note_summary(note)
-    data["timestamps"] = serialize_timestamps(note)
-    if is_list_note(note):
-        data["items"] = [serialize_item(item) for item in note.items]
-        data["text"] = note_search_text(note)
-    else:
-        data["text"] = note.text
-    return data
+    return serialize_note_fields(note, NOTE_FIELDS)
 
 
 def serialize_note_summary(note: Any) -> dict[str, Any]:
+    return serialize_note_fields(note, NOTE_SUMMARY_FIELDS)
+
+
+def serialize_note_fields(note: Any, fields: Iterable[str]) -> dict[str, Any]:
     return {
-        "id": note.id,
-        "type": "list" if is_list_note(note) else "note",
-        "title": note.title,
-        "archived": bool(note.archived),
-        "trashed": bool(note.trashed),
-        "deleted": bool(getattr(note, "deleted", False)),
-        "pinned": bool(note.pinned),
-        "color": serialize_color(note.color),
-        "url": getattr(note, "url", None),
+        name: NOTE_FIELDS[name](note)
+        for name in fields
+        if name in NOTE_FIELDS and (name != "items" or is_list_note(note))
     }
 
 
+def project_fields(data: dict[str, Any], fields: Iterable[str]) -> dict[str, Any]:
+    return {name: data[name] for name in fields if name in data}
+
+
 def serialize_timestamps(note: Any) -> dict[str, str | None]:
     timestamps = note.timestamps
     return {
@@ -965,8 +2737,11 @@ def note_preview(note: Any) -> str:
     return one_line(note.text)
 
 
-def print_note_table(notes: list[Any]) -> None:
-    if not notes:
+@profiled("render")
+def print_note_table(notes: Iterable[Any]) -> None:
+    notes = iter(notes)
+    first = next(notes, None)
+    if first is None:
         print("No notes found.")
         return
 
@@ -974,28 +2749,55 @@ def print_note_table(notes: list[Any]) -> None:
     title_width = 30
     state_width = 18
     preview_width = max(24, width - 12 - 6 - state_width - title_width - 7)
-    rows = [
+    header = ["ID", "TYPE", "STATE", "TITLE", "PREVIEW"]
+    rows = (
         [
-            "ID",
-            "TYPE",
-            "STATE",
-            "TITLE",
-            "PREVIEW",
+            note.id[:12],
+            note_kind(note),
+            truncate(state_label(note), state_width),
+            truncate(one_line(note.title or "(untitled)"), title_width),
+            truncate(note_preview(note), preview_width),
         ]
-    ]
-    for note in notes:
-        rows.append(
-            [
-                note.id[:12],
-                note_kind(note),
-                truncate(state_label(note), state_width),
-                truncate(one_line(note.title or "(untitled)"), title_width),
-                truncate(note_preview(note), preview_width),
-            ]
-        )
-    print_table(rows)
+        for note in itertools.chain([first], notes)
+    )
+    print_table(itertools.chain([header], rows))
+
 
+@profiled("render")
+def print_search_table(hits: Iterable[Any]) -> None:
+    hits = iter(hits)
+    first = next(hits, None)
+    if first is None:
+        print("No notes found.")
+        return
+
+    width = shutil.get_terminal_size((100, 24)).columns
+    title_width = 30
+    state_width = 18
+    snippet_width = max(24, width - 12 - 6 - state_width - title_width - 7)
+    header = ["ID", "TYPE", "STATE", "TITLE", "SNIPPET"]
+    rows = (
+        [
+            hit.note["id"][:12],
+            hit.note["type"],
+            truncate(
+                format_state_flags(
+                    hit.note["pinned"],
+                    hit.note["archived"],
+                    hit.note["trashed"],
+                    hit.note["deleted"],
+                ),
+                state_width,
+            ),
+            truncate(one_line(hit.note["title"] or "(untitled)"), title_width),
+            truncate(one_line(hit.snippet), snippet_width),
+        ]
+        for hit in itertools.chain([first], hits)
+    )
+    print_table(itertools.chain([header], rows))
 
+
+@profiled("render")
 def print_note_detail(note: Any) -> None:
     print(f"ID: {note.id}")
     print(f"Type: {note_kind(note)}")
@@ -1018,6 +2820,7 @@ def print_note_detail(note: Any) -> None:
         print(note.text)
 
 
+@profiled("render")
 def print_item_table(items: list[Any]) -> None:
     if not items:
         print("No checklist items found.")
@@ -1029,9 +2832,13 @@ def print_item_table(items: list[Any]) -> None:
     print_table(rows)
 
 
-def print_table(rows: list[list[str]]) -> None:
-    widths = [max(len(row[index]) for row in rows) for index in range(len(rows[0]))]
-    for row_index, row in enumerate(rows):
+def print_table(rows: Iterable[list[str]]) -> None:
+    # Size columns from the header and the first rows only, so large listings
+    # start printing right away; a wider cell later just pushes its row out.
+    rows = iter(rows)
+    sample = list(itertools.islice(rows, TABLE_WIDTH_SAMPLE + 1))
+    widths = [max(len(row[index]) for row in sample) for index in range(len(sample[0]))]
+    for row_index, row in enumerate(itertools.chain(sample, rows)):
         line = "  ".join(value.ljust(widths[index]) for index, value in enumerate(row))
         print(line.rstrip())
         if row_index == 0:
@@ -1039,14 +2846,22 @@ def print_table(rows: list[list[str]]) -> None:
 
 
 def state_label(note: Any) -> str:
+    return format_state_flags(
+        note.pinned, note.archived, note.trashed, getattr(note, "deleted", False)
+    )
+
+
+def format_state_flags(
+    pinned: bool, archived: bool, trashed: bool, deleted: bool
+) -> str:
     flags = []
-    if note.pinned:
+    if pinned:
         flags.append("pinned")
-    if note.archived:
+    if archived:
         flags.append("archived")
-    if note.trashed:
+    if trashed:
         flags.append("trashed")
-    if getattr(note, "deleted", False):
+    if deleted:
         flags.append("deleted")
     return ",".join(flags) if flags else "active"
 
@@ -1071,9 +2886,28 @@ def format_item_ref(item: Any) -> str:
     return f"{item.id[:12]}:{one_line(item.text)}"
 
 
-def default_backup_path() -> Path:
+def default_backup_path(compression: str | None = None) -> Path:
+    return new_backup_path(Path.cwd(), "full", compression)
+
+
+def new_backup_path(directory: Path, kind: str, compression: str | None) -> Path:
     now = _datetime.datetime.now(tz=_datetime.UTC).strftime("%Y%m%dT%H%M%SZ")
-    return Path.cwd() / f"keep-backup-{now}.jsonl"
+    stem = f"keep-backup-{now}" + (".incremental" if kind == "incremental" else "")
+    suffix = ".jsonl" + backups.COMPRESSION_SUFFIXES.get(compression or "", "")
+    path = directory / f"{stem}{suffix}"
+    counter = 1
+    while path.exists():
+        counter += 1
+        path = directory / f"{stem}-{counter}{suffix}"
+    return path
+
+
+def backup_dir(args: argparse.Namespace) -> Path:
+    return args.backup_dir if args.backup_dir is not None else Path.cwd()
+
+
+def utc_now() -> str:
+    return _datetime.datetime.now(tz=_datetime.UTC).isoformat()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,72 @@
+"""Per-phase wall-clock timing for keep-cli commands.
+
+A Profile charges elapsed time to named phases. Phases may nest; time spent
+in an inner phase is charged to it alone, so the phase times add up to the
+total and the remainder is reported as "other". It also counts the notes and
+checklist items a command touched.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+
+class Profile:
+    """Exclusive time per phase, plus counts of notes and items touched."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.phases: dict[str, float] = {}
+        self.counts = {"notes": 0, "items": 0}
+        self._stack: list[str] = []
+        self._mark = self.started
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Charge the time spent inside the block to name."""
+        self._charge_current()
+        self._stack.append(name)
+        try:
+            yield
+        finally:
+            self._charge_current()
+            self._stack.pop()
+
+    def count(self, notes: int = 0, items: int = 0) -> None:
+        """Record notes and checklist items touched."""
+        self.counts["notes"] += notes
+        self.counts["items"] += items
+
+    def report(self) -> dict[str, Any]:
+        """Get the timing so far as JSON-ready data."""
+        self._charge_current()
+        total = time.perf_counter() - self.started
+        phases = {name: round(seconds, 6) for name, seconds in self.phases.items()}
+        phases["other"] = round(max(0.0, total - sum(self.phases.values())), 6)
+        return {"total_seconds": round(total, 6), "phases": phases, **self.counts}
+
+    def format(self) -> str:
+        """Format the timing so far as a text breakdown."""
+        report = self.report()
+        total = report["total_seconds"]
+        width = max(len(name) for name in report["phases"])
+        lines = [f"Timing: {total * 1000:.1f} ms total"]
+        for name, seconds in report["phases"].items():
+            share = seconds / total * 100 if total else 0.0
+            lines.append(
+                f"  {name.ljust(width)}  {seconds * 1000:9.1f} ms  {share:5.1f}%"
+            )
+        lines.append(
+            f"Touched {report['notes']} notes and {report['items']} checklist items."
+        )
+        return "\n".join(lines)
+
+    def _charge_current(self) -> None:
+        now = time.perf_counter()
+        if self._stack:
+            name = self._stack[-1]
+            self.phases[name] = self.phases.get(name, 0.0) + now - self._mark
+        self._mark = now
@@ -0,0 +1,401 @@
+"""SQLite FTS5 full-text index of synced Keep notes for `keep-cli find`.
+
+The index lives next to the cached note state and is refreshed after every
+sync. Each row stores a cheap fingerprint of its note (timestamps, labels,
+and item timestamps); only notes whose fingerprint changed are serialized
+and rewritten, so a sync that changed one note rewrites one row. Queries support multiple
+terms (all must match), "quoted phrases", prefix* terms, and OR between
+terms, ranked with bm25 (title matches weigh more than body matches).
+
+Alongside the FTS5 tables, a trigram index over titles, checklist items, and
+lines of note text backs fuzzy search. Each entry's trigrams are stored once,
+so a query only scores the entries that share enough trigrams with it, and a
+hit names the checklist item that matched best.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+import sqlite3
+import unicodedata
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from typing import Any, NamedTuple
+
+SCHEMA_VERSION = 3
+
+# bm25 column weights for (title, body)
+_TITLE_WEIGHT = 5.0
+_BODY_WEIGHT = 1.0
+
+_QUERY_TOKEN_RE = re.compile(r'"([^"]*)"?|(\S+)')
+_WORD_RE = re.compile(r"\w+")
+
+# Fuzzy hits must share at least this fraction of the query's trigrams
+FUZZY_MIN_COVERAGE = 0.3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS notes (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    body TEXT NOT NULL,
+    archived INTEGER NOT NULL,
+    trashed INTEGER NOT NULL,
+    fingerprint TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS note_labels (
+    note_id TEXT NOT NULL,
+    label TEXT NOT NULL COLLATE NOCASE,
+    PRIMARY KEY (note_id, label)
+);
+CREATE TABLE IF NOT EXISTS fuzzy_entries (
+    rowid INTEGER PRIMARY KEY,
+    note_id TEXT NOT NULL,
+    item_id TEXT,
+    text TEXT NOT NULL,
+    grams INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS fuzzy_entries_note ON fuzzy_entries (note_id);
+CREATE TABLE IF NOT EXISTS trigrams (
+    gram TEXT NOT NULL,
+    entry INTEGER NOT NULL,
+    PRIMARY KEY (gram, entry)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS trigrams_entry ON trigrams (entry);
+CREATE TRIGGER IF NOT EXISTS fuzzy_entries_ad AFTER DELETE ON fuzzy_entries BEGIN
+    DELETE FROM trigrams WHERE entry = old.rowid;
+END;
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+    title, body, content='notes', content_rowid='rowid',
+    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+CREATE TRIGGER IF NOT EXISTS notes_ai AFTER INSERT ON notes BEGIN
+    INSERT INTO notes_fts(rowid, title, body)
+    VALUES (new.rowid, new.title, new.body);
+END;
+CREATE TRIGGER IF NOT EXISTS notes_ad AFTER DELETE ON notes BEGIN
+    INSERT INTO notes_fts(notes_fts, rowid, title, body)
+    VALUES ('delete', old.rowid, old.title, old.body);
+    DELETE FROM note_labels WHERE note_id = old.id;
+    DELETE FROM fuzzy_entries WHERE note_id = old.id;
+END;
+CREATE TRIGGER IF NOT EXISTS notes_au AFTER UPDATE ON notes BEGIN
+    INSERT INTO notes_fts(notes_fts, rowid, title, body)
+    VALUES ('delete', old.rowid, old.title, old.body);
+    INSERT INTO notes_fts(rowid, title, body)
+    VALUES (new.rowid, new.title, new.body);
+END;
+"""
+
+
+class IndexedNote(NamedTuple):
+    """A note as stored in the search index."""
+
+    id: str
+    title: str
+    body: str
+    labels: list[str]
+    archived: bool
+    trashed: bool
+    data: dict[str, Any]
+    # (item ID, text) for each checklist item; empty for text notes
+    items: tuple[tuple[str, str], ...] = ()
+
+
+class NoteSource(NamedTuple):
+    """A live note's change fingerprint, and how to build its index row."""
+
+    id: str
+    fingerprint: str
+    load: Callable[[], IndexedNote]
+
+
+class SearchHit(NamedTuple):
+    """A ranked search result (lower ranks are better)."""
+
+    note: dict[str, Any]
+    snippet: str
+    rank: float
+    item_id: str | None = None
+
+
+def fts5_available() -> bool:
+    """Check whether this Python's SQLite was built with FTS5."""
+    try:
+        conn = sqlite3.connect(":memory:")
+        try:
+            conn.execute("CREATE VIRTUAL TABLE probe USING fts5(body)")
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return False
+    return True
+
+
+def open_index(path: Path) -> sqlite3.Connection:
+    """Open (creating if needed) a private search index database."""
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    if not path.exists():
+        # Note contents are private, so create the database as 0600 up front
+        os.close(os.open(path, os.O_WRONLY | os.O_CREAT, 0o600))
+    conn = sqlite3.connect(path)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version != SCHEMA_VERSION:
+        conn.executescript(
+            "DROP TABLE IF EXISTS notes_fts; DROP TABLE IF EXISTS notes;"
+            "DROP TABLE IF EXISTS note_labels; DROP TABLE IF EXISTS meta;"
+            "DROP TABLE IF EXISTS trigrams; DROP TABLE IF EXISTS fuzzy_entries;"
+        )
+    conn.executescript(_SCHEMA)
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return conn
+
+
+def get_meta(conn: sqlite3.Connection, key: str) -> str | None:
+    """Get a metadata value stored in the index."""
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def update_index(
+    conn: sqlite3.Connection, notes: Iterable[NoteSource], keep_version: str | None
+) -> int:
+    """Bring the index in line with the given notes.
+
+    Only notes whose fingerprint differs from the stored one are loaded and
+    rewritten, along with their labels and trigram entries.
+
+    Returns:
+        The number of notes inserted, updated, or removed.
+    """
+    existing = dict(conn.execute("SELECT id, fingerprint FROM notes"))
+    changed = 0
+    with conn:
+        for source in notes:
+            if existing.pop(source.id, None) == source.fingerprint:
+                continue
+            note = source.load()
+            data = json.dumps(note.data, sort_keys=True)
+            conn.execute(
+                "INSERT INTO notes "
+                "(id, title, body, archived, trashed, fingerprint, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET title = excluded.title, "
+                "body = excluded.body, archived = excluded.archived, "
+                "trashed = excluded.trashed, fingerprint = excluded.fingerprint, "
+                "data = excluded.data",
+                (
+                    note.id,
+                    note.title,
+                    note.body,
+                    note.archived,
+                    note.trashed,
+                    source.fingerprint,
+                    data,
+                ),
+            )
+            conn.execute("DELETE FROM note_labels WHERE note_id = ?", (note.id,))
+            conn.executemany(
+                "INSERT OR IGNORE INTO note_labels (note_id, label) VALUES (?, ?)",
+                [(note.id, label) for label in note.labels],
+            )
+            index_fuzzy_entries(conn, note)
+            changed += 1
+
+        # Whatever is left was deleted (or purged) since the last update
+        conn.executemany("DELETE FROM notes WHERE id = ?", [(i,) for i in existing])
+        changed += len(existing)
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('keep_version', ?)",
+            (keep_version,),
+        )
+    return changed
+
+
+def index_fuzzy_entries(conn: sqlite3.Connection, note: IndexedNote) -> None:
+    """Replace a note's entries in the trigram index."""
+    conn.execute("DELETE FROM fuzzy_entries WHERE note_id = ?", (note.id,))
+    entries: list[tuple[str | None, str]] = [(None, note.title)]
+    if note.items:
+        entries.extend(note.items)
+    else:
+        entries.extend((None, line) for line in note.body.splitlines())
+    for item_id, text in entries:
+        grams = trigrams(text)
+        if not grams:
+            continue
+        entry = conn.execute(
+            "INSERT INTO fuzzy_entries (note_id, item_id, text, grams) "
+            "VALUES (?, ?, ?, ?)",
+            (note.id, item_id, text, len(grams)),
+        ).lastrowid
+        conn.executemany(
+            "INSERT INTO trigrams (gram, entry) VALUES (?, ?)",
+            [(gram, entry) for gram in grams],
+        )
+
+
+def trigrams(text: str) -> set[str]:
+    """Get the distinct trigrams of text's words.
+
+    Words are case- and diacritic-folded and padded like pg_trgm ("  w" and
+    "d "), so short words and word boundaries still produce trigrams.
+    """
+    folded = "".join(
+        char
+        for char in unicodedata.normalize("NFKD", text.casefold())
+        if not unicodedata.combining(char)
+    )
+    grams: set[str] = set()
+    for word in _WORD_RE.findall(folded):
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def build_match_query(query: str) -> str:
+    """Translate a user query into an FTS5 MATCH expression.
+
+    Bare terms and "phrases" are quoted so punctuation can't break the FTS5
+    syntax; a trailing * keeps prefix search, and OR between terms is kept.
+
+    Raises:
+        ValueError: If the query has no searchable terms.
+    """
+    parts: list[str] = []
+    for token_match in _QUERY_TOKEN_RE.finditer(query):
+        phrase, term = token_match.group(1), token_match.group(2)
+        if term == "OR":
+            if parts and parts[-1] != "OR":
+                parts.append("OR")
+            continue
+        text = phrase if phrase is not None else term
+        is_prefix = phrase is None and text.endswith("*")
+        text = text.rstrip("*").strip() if is_prefix else text.strip()
+        if not text:
+            continue
+        quoted = '"' + text.replace('"', '""') + '"'
+        parts.append(quoted + ("*" if is_prefix else ""))
+
+    while parts and parts[-1] == "OR":
+        parts.pop()
+    if not parts:
+        raise ValueError("Search query has no searchable terms.")
+    return " ".join(parts)
+
+
+def search(
+    conn: sqlite3.Connection,
+    query: str,
+    archived: bool | None = None,
+    trashed: bool | None = False,
+    labels: Iterable[str] = (),
+    limit: int | None = None,
+    offset: int = 0,
+) -> list[SearchHit]:
+    """Run a ranked full-text search with optional state and label filters.
+
+    archived and trashed follow `keep.find` semantics: None matches either.
+    Every given label must be on the note (case-insensitive). limit and
+    offset page through the ranked results.
+    """
+    sql = [
+        "SELECT notes.data, "
+        "snippet(notes_fts, -1, '[', ']', '...', 12), "
+        f"bm25(notes_fts, {_TITLE_WEIGHT}, {_BODY_WEIGHT}) AS rank "
+        "FROM notes_fts JOIN notes ON notes.rowid = notes_fts.rowid "
+        "WHERE notes_fts MATCH ?"
+    ]
+    params: list[Any] = [build_match_query(query)]
+    if archived is not None:
+        sql.append("AND notes.archived = ?")
+        params.append(archived)
+    if trashed is not None:
+        sql.append("AND notes.trashed = ?")
+        params.append(trashed)
+    for label in labels:
+        sql.append(
+            "AND EXISTS (SELECT 1 FROM note_labels "
+            "WHERE note_labels.note_id = notes.id AND note_labels.label = ?)"
+        )
+        params.append(label)
+    sql.append("ORDER BY rank")
+    if limit is not None or offset:
+        # SQLite needs a LIMIT for OFFSET; -1 means no limit.
+        sql.append("LIMIT ? OFFSET ?")
+        params.extend([-1 if limit is None else limit, offset])
+
+    return [
+        SearchHit(note=json.loads(data), snippet=snippet, rank=rank)
+        for data, snippet, rank in conn.execute(" ".join(sql), params)
+    ]
+
+
+def fuzzy_search(
+    conn: sqlite3.Connection,
+    query: str,
+    archived: bool | None = None,
+    trashed: bool | None = False,
+    labels: Iterable[str] = (),
+    limit: int | None = None,
+    offset: int = 0,
+) -> list[SearchHit]:
+    """Run a typo-tolerant trigram search with the same filters as search.
+
+    Only entries sharing at least FUZZY_MIN_COVERAGE of the query's trigrams
+    are scored. An entry scores the mean of the share of query trigrams it
+    contains and its trigram similarity to the query, so a close match beats
+    a long entry that merely contains the words. Each note is reported once,
+    by its best entry; the hit's item_id names the checklist item when that
+    entry is one, and its rank is the negated score.
+
+    Raises:
+        ValueError: If the query has no searchable terms.
+    """
+    grams = sorted(trigrams(query))
+    if not grams:
+        raise ValueError("Search query has no searchable terms.")
+    placeholders = ", ".join("?" * len(grams))
+    sql = [
+        "WITH candidates AS ("
+        f"SELECT entry, COUNT(*) AS shared FROM trigrams WHERE gram IN ({placeholders}) "
+        "GROUP BY entry HAVING shared >= ?) "
+        "SELECT notes.data, fuzzy_entries.item_id, fuzzy_entries.text, "
+        "MAX((candidates.shared * 1.0 / ? + candidates.shared * 1.0 / "
+        "(? + fuzzy_entries.grams - candidates.shared)) / 2) AS score "
+        "FROM candidates "
+        "JOIN fuzzy_entries ON fuzzy_entries.rowid = candidates.entry "
+        "JOIN notes ON notes.id = fuzzy_entries.note_id "
+        "WHERE 1"
+    ]
+    total = len(grams)
+    min_shared = max(1, math.ceil(FUZZY_MIN_COVERAGE * total))
+    params: list[Any] = [*grams, min_shared, total, total]
+    if archived is not None:
+        sql.append("AND notes.archived = ?")
+        params.append(archived)
+    if trashed is not None:
+        sql.append("AND notes.trashed = ?")
+        params.append(trashed)
+    for label in labels:
+        sql.append(
+            "AND EXISTS (SELECT 1 FROM note_labels "
+            "WHERE note_labels.note_id = notes.id AND note_labels.label = ?)"
+        )
+        params.append(label)
+    # SQLite takes the other columns from the row that has the MAX score.
+    sql.append("GROUP BY notes.id ORDER BY score DESC, notes.title")
+    if limit is not None or offset:
+        sql.append("LIMIT ? OFFSET ?")
+        params.extend([-1 if limit is None else limit, offset])
+
+    return [
+        SearchHit(note=json.loads(data), snippet=text, rank=-score, item_id=item_id)
+        for data, item_id, text, score in conn.execute(" ".join(sql), params)
+    ]
@@ -0,0 +1 @@
+"""Tests for keep_cli module."""
@@ -0,0 +1,100 @@
+"""Pytest configuration for keep_cli tests."""
+
+import argparse
+import sys
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+# Add parent directory to path so we can import keep_cli modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import fake_keep as fake_backend  # type: ignore[import-not-found]  # noqa: E402
+
+EMAIL = "user@example.com"
+FAKE_ACCOUNT_EMAIL = "bench@example.invalid"
+
+
+@pytest.fixture
+def fake_account(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """Run keep-cli against a generated 40-note fake account.
+
+    Caches go under tmp_path, and commands never go to a daemon.
+    """
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    monkeypatch.setenv("KEEP_CLI_EMAIL", FAKE_ACCOUNT_EMAIL)
+    monkeypatch.setenv("KEEP_CLI_NO_DAEMON", "1")
+    monkeypatch.setenv(fake_backend.FAKE_NOTES_ENV, "40")
+    monkeypatch.delenv("KEEP_CLI_PROFILE", raising=False)
+
+
+@pytest.fixture
+def fake_keep(
+    monkeypatch: pytest.MonkeyPatch, tmp_path_factory: pytest.TempPathFactory
+) -> Any:
+    """An empty Keep on the in-process fake backend, returned by every login.
+
+    Tests add the notes they need. Logins sync the session like a real login
+    does. Later syncs run the real sync_keep against the fake server and are
+    recorded by action in the session's `syncs` list. Caches go in a
+    directory of their own, leaving tmp_path to the test.
+    """
+    gkeepapi = pytest.importorskip("gkeepapi")
+    import main as keep_cli  # type: ignore[import-not-found]
+
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path_factory.mktemp("cache")))
+    monkeypatch.setenv("KEEP_CLI_EMAIL", EMAIL)
+    keep = fake_backend.create_fake_keep(gkeepapi, 0)
+    # Already downloaded, so the first sync only uploads the test's notes
+    keep._keep_version = "fake-0"
+    keep.syncs = []
+    sync_keep = keep_cli.sync_keep
+
+    def recording_sync(session: Any, action: str, email: str) -> None:
+        session.syncs.append(action)
+        sync_keep(session, action, email)
+
+    def login(args: argparse.Namespace) -> Any:
+        keep.sync()
+        return keep
+
+    monkeypatch.setattr(keep_cli, "login_keep", login)
+    monkeypatch.setattr(keep_cli, "sync_keep", recording_sync)
+    return keep
+
+
+@pytest.fixture
+def add_note(fake_keep: Any) -> Callable[..., Any]:
+    """Add notes with fixed IDs to the fake_keep session.
+
+    The returned function adds a note, or a checklist when items are given
+    as (id, text) pairs in display order. Fixed IDs let tests name notes
+    and items by ID and by prefix.
+    """
+    gkeepapi = pytest.importorskip("gkeepapi")
+
+    def add(
+        note_id: str,
+        title: str,
+        text: str = "",
+        items: list[tuple[str, str]] | None = None,
+    ) -> Any:
+        if items is None:
+            note = gkeepapi.node.Note(id_=note_id)
+            note.text = text
+            items = []
+        else:
+            note = gkeepapi.node.List(id_=note_id)
+        note.title = title
+        fake_keep.add(note)
+        for position, (item_id, item_text) in enumerate(items):
+            item = gkeepapi.node.ListItem(parent_id=note_id, id_=item_id)
+            item.text = item_text
+            # Checklists show items by descending sort value
+            item.sort = len(items) - position
+            note.append(item)
+        return note
+
+    return add
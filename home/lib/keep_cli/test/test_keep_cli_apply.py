@@ -0,0 +1,115 @@
+"""Tests for `keep-cli apply` batch mutations against an in-memory session."""
+
+import json
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import main as keep_cli  # type: ignore[import-not-found]
+import pytest
+
+
+@pytest.fixture
+def keep(fake_keep: Any, add_note: Callable[..., Any]) -> Any:
+    add_note("note-a", "Ideas", "first")
+    add_note("note-b", "Plans", "second")
+    add_note("list-c", "Groceries", items=[("item-1", "milk"), ("item-2", "eggs")])
+    return fake_keep
+
+
+def write_ops(tmp_path: Path, *ops: Any) -> str:
+    path = tmp_path / "ops.jsonl"
+    path.write_text("\n".join(json.dumps(op) for op in ops) + "\n")
+    return str(path)
+
+
+def test_apply_runs_every_operation_with_one_sync(
+    keep: Any, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    ops = write_ops(
+        tmp_path,
+        {"op": "archive", "note": "note-a"},
+        {"op": "edit", "note": "note-b", "title": "New plans"},
+        {"op": "check", "note": "list", "item": "item-1"},
+        {"op": "item-edit", "note": "list", "item": "item-2", "text": "oat milk"},
+    )
+    assert keep_cli.main(["apply", ops, "--json"]) == 0
+
+    output = json.loads(capsys.readouterr().out)
+    assert output["dry_run"] is False
+    assert [r["status"] for r in output["results"]] == ["applied"] * 4
+    assert output["results"][2]["note"]["id"] == "list-c"
+    assert len(keep.syncs) == 1
+    assert keep.get("note-a").archived
+    assert keep.get("note-b").title == "New plans"
+    assert [(i.text, i.checked) for i in keep.get("list-c").items] == [
+        ("milk", True),
+        ("oat milk", False),
+    ]
+
+
+def test_apply_dry_run_prints_combined_diff_without_syncing(
+    keep: Any, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    ops = write_ops(
+        tmp_path,
+        {"op": "edit", "note": "note-a", "title": "Renamed"},
+        {"op": "trash", "note": "note-a"},
+    )
+    assert keep_cli.main(["apply", ops, "--dry-run"]) == 0
+
+    output = capsys.readouterr().out
+    assert "[1] Would edit: note-a" in output
+    assert "[2] Would trash: note-a" in output
+    assert '-  "title": "Ideas",' in output
+    assert '+  "title": "Renamed",' in output
+    assert '+  "trashed": true,' in output
+    assert "Would apply 2 operations with one sync." in output
+    assert keep.syncs == []
+
+
+def test_apply_validates_all_operations_before_applying(
+    keep: Any, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    ops = write_ops(
+        tmp_path,
+        {"op": "archive", "note": "note-a"},
+        {"op": "check", "note": "note-b", "item": "item-1"},
+        {"op": "archive", "note": "missing"},
+    )
+    assert keep_cli.main(["apply", ops]) == 1
+
+    error = capsys.readouterr().err
+    assert "line 2: Note note-b:Plans is not a checklist." in error
+    assert "line 3: No note matches ID or prefix 'missing'." in error
+    assert not keep.get("note-a").archived
+    assert keep.syncs == []
+
+
+def test_apply_rejects_malformed_operations_before_logging_in(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    ops = tmp_path / "ops.jsonl"
+    ops.write_text(
+        '{"op": "achive", "note": "a"}\n'
+        "not json\n"
+        '{"op": "item-edit", "note": "a", "item": "b"}\n'
+        '{"op": "delete", "note": "a", "permanent": true}\n'
+    )
+    assert keep_cli.main(["apply", str(ops)]) == 1
+
+    error = capsys.readouterr().err
+    assert "line 1: unknown op 'achive'" in error
+    assert "line 2: invalid JSON" in error
+    assert "line 3: item-edit needs text" in error
+
+
+def test_apply_requires_yes_for_permanent_deletes(
+    keep: Any, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    ops = write_ops(tmp_path, {"op": "delete", "note": "note-a", "permanent": True})
+    assert keep_cli.main(["apply", ops]) == 1
+    assert "require --yes" in capsys.readouterr().err
+
+    assert keep_cli.main(["apply", ops, "--yes"]) == 0
+    assert keep.get("note-a").deleted
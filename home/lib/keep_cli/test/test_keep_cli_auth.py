@@ -0,0 +1,133 @@
+"""Tests for keep-cli auth token caching against a local auth stand-in."""
+
+import json
+import os
+import stat
+import threading
+import time
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+gkeepapi = pytest.importorskip("gkeepapi")
+gpsoauth = pytest.importorskip("gpsoauth")
+
+from main import (  # type: ignore[import-not-found]  # noqa: E402
+    auth_cache_path,
+    build_keep_auth,
+)
+
+EMAIL = "user@example.com"
+MASTER_TOKEN = "aas_et/master-token"
+
+
+class StandInServer:
+    """Local stand-in for Google's auth endpoint and a Keep-style API."""
+
+    def __init__(self) -> None:
+        self.auth_requests = 0
+        self.api_auth_headers: list[str] = []
+        self.valid_token = "token-1"
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:  # noqa: N802
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                if self.path == "/auth":
+                    server.auth_requests += 1
+                    server.valid_token = f"token-{server.auth_requests}"
+                    expiry = int(time.time()) + 3600
+                    body = f"Auth={server.valid_token}\nExpiry={expiry}\n"
+                    self._respond("text/plain", body)
+                    return
+
+                header = self.headers.get("Authorization", "")
+                server.api_auth_headers.append(header)
+                if header == f"OAuth {server.valid_token}":
+                    payload: dict[str, Any] = {"ok": True}
+                else:
+                    payload = {"error": {"code": 401, "message": "expired"}}
+                self._respond("application/json", json.dumps(payload))
+
+            def _respond(self, content_type: str, body: str) -> None:
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def stand_in(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> Iterator[StandInServer]:
+    server = StandInServer()
+    monkeypatch.setattr(gpsoauth, "AUTH_URL", f"{server.url}/auth")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    try:
+        yield server
+    finally:
+        server.close()
+
+
+def test_auth_token_is_cached_until_expiry(stand_in: StandInServer) -> None:
+    """Test that a cached auth token skips the auth round trip until it expires."""
+    first = build_keep_auth(gkeepapi, EMAIL, MASTER_TOKEN)
+    second = build_keep_auth(gkeepapi, EMAIL, MASTER_TOKEN)
+    assert first.getAuthToken() == second.getAuthToken() == "token-1"
+    assert stand_in.auth_requests == 1
+
+    cache_path = auth_cache_path(EMAIL)
+    assert stat.S_IMODE(os.stat(cache_path).st_mode) == 0o600
+    assert MASTER_TOKEN not in cache_path.read_text()
+
+    # An expired token is exchanged again
+    cached = json.loads(cache_path.read_text())
+    cached["expires_at"] = time.time() - 1
+    cache_path.write_text(json.dumps(cached))
+    third = build_keep_auth(gkeepapi, EMAIL, MASTER_TOKEN)
+    assert third.getAuthToken() == "token-2"
+    assert stand_in.auth_requests == 2
+
+
+def test_cached_token_is_not_reused_for_another_master_token(
+    stand_in: StandInServer,
+) -> None:
+    """Test that changing the master token invalidates the cached auth token."""
+    build_keep_auth(gkeepapi, EMAIL, MASTER_TOKEN)
+    build_keep_auth(gkeepapi, EMAIL, "aas_et/other-token")
+    assert stand_in.auth_requests == 2
+
+
+def test_unauthorized_response_refreshes_and_caches_token(
+    stand_in: StandInServer,
+) -> None:
+    """Test that a 401 from the API transparently refreshes the cached token."""
+    auth = build_keep_auth(gkeepapi, EMAIL, MASTER_TOKEN)
+    # Simulate the server revoking the cached token before it expires
+    stand_in.valid_token = "revoked"
+
+    api = gkeepapi.API(f"{stand_in.url}/api/", auth)
+    assert api.send(url=f"{stand_in.url}/api/notes", method="POST") == {"ok": True}
+    assert stand_in.api_auth_headers == ["OAuth token-1", "OAuth token-2"]
+
+    # The refreshed token is what the next invocation starts with
+    assert build_keep_auth(gkeepapi, EMAIL, MASTER_TOKEN).getAuthToken() == "token-2"
+    assert stand_in.auth_requests == 2
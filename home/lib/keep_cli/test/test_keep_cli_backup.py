@@ -0,0 +1,89 @@
+"""Tests for streaming, compressed, and incremental keep-cli backups."""
+
+import gzip
+import json
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import backups  # type: ignore[import-not-found]
+import main as keep_cli  # type: ignore[import-not-found]
+import pytest
+
+
+@pytest.fixture
+def keep(fake_keep: Any, add_note: Callable[..., Any]) -> Any:
+    add_note("alpha", "Alpha", "first")
+    add_note("beta", "Beta", "second")
+    return fake_keep
+
+
+def read_texts(path: Path) -> dict[str, Any]:
+    return {
+        record["id"]: record.get("text", "removed")
+        for record in backups.read_backup_lines(path)
+    }
+
+
+def test_backup_streams_gzip_output(
+    keep: Any, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    path = tmp_path / "notes.jsonl.gz"
+    assert keep_cli.main(["backup", "-o", str(path)]) == 0
+
+    assert "Wrote 2 notes" in capsys.readouterr().out
+    with gzip.open(path, "rt", encoding="utf-8") as handle:
+        assert [json.loads(line)["id"] for line in handle] == ["alpha", "beta"]
+    assert [p.name for p in tmp_path.iterdir()] == ["notes.jsonl.gz"]
+
+
+def test_incremental_backups_write_only_changes_and_compact(
+    keep: Any,
+    add_note: Callable[..., Any],
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    args = ["backup", "--incremental", "--backup-dir", str(tmp_path)]
+    args += ["--compress", "gzip"]
+    assert keep_cli.main(args) == 0
+    assert "new incremental chain" in capsys.readouterr().out
+
+    keep.get("beta").text = "second, edited"
+    add_note("gamma", "Gamma", "third")
+    keep.get("alpha").delete()
+    assert keep_cli.main(args) == 0
+    assert "2 changed notes and 1 removals" in capsys.readouterr().out
+
+    manifest = backups.load_manifest(tmp_path)
+    assert manifest is not None
+    full, incremental = (tmp_path / entry["path"] for entry in manifest["files"])
+    assert read_texts(full) == {"alpha": "first", "beta": "second"}
+    assert read_texts(incremental) == {
+        "beta": "second, edited",
+        "gamma": "third",
+        "alpha": "removed",
+    }
+
+    # Nothing changed, so the next incremental is empty
+    assert keep_cli.main(args) == 0
+    assert "0 changed notes and 0 removals" in capsys.readouterr().out
+
+    assert keep_cli.main(["backup", "--compact", "--backup-dir", str(tmp_path)]) == 0
+    assert "Compacted 3 backups" in capsys.readouterr().out
+    manifest = backups.load_manifest(tmp_path)
+    assert manifest is not None
+    (entry,) = manifest["files"]
+    assert entry["kind"] == "full"
+    compacted = tmp_path / entry["path"]
+    assert compacted.suffix == ".gz"
+    assert read_texts(compacted) == {"beta": "second, edited", "gamma": "third"}
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(
+        [compacted.name, backups.MANIFEST_NAME]
+    )
+
+
+def test_compact_requires_a_manifest(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    assert keep_cli.main(["backup", "--compact", "--backup-dir", str(tmp_path)]) == 1
+    assert "No backup manifest" in capsys.readouterr().err
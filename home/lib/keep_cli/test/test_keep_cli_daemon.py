@@ -0,0 +1,232 @@
+"""Tests for `keep-cli serve` and transparent client routing through it."""
+
+import json
+import stat
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+pytest.importorskip("gkeepapi")
+
+import daemon  # type: ignore[import-not-found]  # noqa: E402
+import main as keep_cli  # type: ignore[import-not-found]  # noqa: E402
+
+EMAIL = "user@example.com"
+# Served requests log in through the real login_keep, which hands out the
+# warm session
+served_login_keep = keep_cli.login_keep
+
+
+class Session:
+    """A note on the fake backend, whose syncs the fake_keep fixture records."""
+
+    def __init__(self, keep: Any) -> None:
+        self.keep = keep
+        self.note = keep.createNote("Ideas", "served")
+        self.syncs: list[str] = keep.syncs
+
+
+@pytest.fixture
+def session(fake_keep: Any, monkeypatch: pytest.MonkeyPatch) -> Session:
+    monkeypatch.delenv("KEEP_CLI_NO_DAEMON", raising=False)
+    return Session(fake_keep)
+
+
+@pytest.fixture
+def served(
+    session: Session, monkeypatch: pytest.MonkeyPatch
+) -> Iterator[daemon.SessionDaemon]:
+    # What cmd_serve sets up after its one login
+    monkeypatch.setattr(keep_cli, "_served_session", (EMAIL, session.keep))
+    monkeypatch.setattr(keep_cli, "login_keep", served_login_keep)
+    server = daemon.SessionDaemon(
+        keep_cli.daemon_socket_path(EMAIL),
+        keep_cli.run_served_request,
+        keep_cli.is_served_mutation,
+        lambda: keep_cli.sync_keep(session.keep, "refresh", EMAIL),
+        refresh_interval=0.2,
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while server.server is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    yield server
+    server.shutdown()
+    thread.join(5)
+
+
+def test_client_commands_run_in_the_daemon(
+    session: Session,
+    served: daemon.SessionDaemon,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    socket_path = keep_cli.daemon_socket_path(EMAIL)
+    assert stat.S_IMODE(socket_path.stat().st_mode) == 0o600
+
+    assert keep_cli.main(["inbox", "--json"]) == 0
+    assert [note["title"] for note in json.loads(capsys.readouterr().out)] == ["Ideas"]
+
+    assert keep_cli.main(["archive", session.note.id]) == 0
+    assert f"Archived: {session.note.id}" in capsys.readouterr().out
+    assert session.note.archived
+    assert "archive" in session.syncs
+
+    # Errors come back with their exit code and stderr
+    assert keep_cli.main(["show", "missing"]) == 1
+    assert "No note matches" in capsys.readouterr().err
+
+
+def test_daemon_serves_the_clients_account_without_it_in_its_env(
+    session: Session,
+    served: daemon.SessionDaemon,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    original_run = served.run
+
+    def run_in_daemon_env(request: Any) -> Any:
+        # A daemon started with `serve --email` has no account in its env
+        with monkeypatch.context() as env:
+            env.delenv("KEEP_CLI_EMAIL")
+            return original_run(request)
+
+    served.run = run_in_daemon_env
+    assert keep_cli.main(["inbox", "--json"]) == 0
+    assert [note["title"] for note in json.loads(capsys.readouterr().out)] == ["Ideas"]
+
+
+def test_daemon_refuses_other_accounts_and_the_client_runs_locally(
+    session: Session,
+    served: daemon.SessionDaemon,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    path = keep_cli.daemon_socket_path(EMAIL)
+    request = {"argv": ["inbox"], "email": "other@example.com", "cwd": "/"}
+    response = daemon.send_request(path, request)
+    assert response is not None and "refused" in response
+
+    logins: list[Any] = []
+
+    def login(args: Any) -> Any:
+        logins.append(args.email)
+        return session.keep
+
+    monkeypatch.setattr(keep_cli, "login_keep", login)
+    monkeypatch.setattr(keep_cli, "daemon_socket_path", lambda email: path)
+    assert keep_cli.main(["inbox", "--json", "--email", "other@example.com"]) == 0
+    assert json.loads(capsys.readouterr().out)[0]["title"] == "Ideas"
+    assert logins == ["other@example.com"]
+
+
+def test_daemon_refreshes_on_a_timer(
+    session: Session, served: daemon.SessionDaemon
+) -> None:
+    deadline = time.monotonic() + 5
+    while "refresh" not in session.syncs and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert "refresh" in session.syncs
+
+
+def test_mutations_are_serialized_through_the_writer_queue(
+    session: Session, served: daemon.SessionDaemon
+) -> None:
+    running = 0
+    overlaps = 0
+    original_run = served.run
+
+    def tracking_run(request: Any) -> Any:
+        nonlocal running, overlaps
+        running += 1
+        overlaps += running > 1
+        time.sleep(0.01)
+        try:
+            return original_run(request)
+        finally:
+            running -= 1
+
+    served.run = tracking_run
+    path = keep_cli.daemon_socket_path(EMAIL)
+    requests = [
+        {
+            "argv": ["edit", session.note.id, "--title", f"Title {i}"],
+            "email": EMAIL,
+            "cwd": "/",
+            "stdin": None,
+            "columns": 80,
+        }
+        for i in range(8)
+    ]
+    responses: list[Any] = []
+    threads = [
+        threading.Thread(
+            target=lambda r=r: responses.append(daemon.send_request(path, r))
+        )
+        for r in requests
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert [response["exit"] for response in responses] == [0] * 8
+    assert overlaps == 0
+    assert session.syncs.count("edit") == 8
+
+
+def test_client_runs_locally_without_a_daemon(
+    session: Session,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    logins: list[Any] = []
+
+    def login(args: Any) -> Any:
+        logins.append(args)
+        return session.keep
+
+    monkeypatch.setattr(keep_cli, "login_keep", login)
+    assert keep_cli.main(["inbox", "--json"]) == 0
+    assert json.loads(capsys.readouterr().out)[0]["title"] == "Ideas"
+    assert len(logins) == 1
+
+
+def test_dry_runs_leave_the_served_session_untouched(
+    session: Session,
+    served: daemon.SessionDaemon,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    assert (
+        keep_cli.main(["edit", session.note.id, "--title", "Draft", "--dry-run"]) == 0
+    )
+    assert "Would edit" in capsys.readouterr().out
+    assert session.note.title == "Ideas"
+
+
+def test_connection_bursts_beyond_the_listen_backlog(
+    session: Session, served: daemon.SessionDaemon
+) -> None:
+    path = keep_cli.daemon_socket_path(EMAIL)
+    request = {
+        "argv": ["inbox", "--json"],
+        "email": EMAIL,
+        "cwd": "/",
+        "stdin": None,
+        "columns": 80,
+    }
+    responses: list[Any] = []
+
+    def send() -> None:
+        responses.append(daemon.send_request(path, request))
+
+    threads = [threading.Thread(target=send) for _ in range(40)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    assert [response["exit"] for response in responses] == [0] * 40
@@ -0,0 +1,129 @@
+"""Tests for `keep-cli diff` and `keep-cli restore --plan`."""
+
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+pytest.importorskip("gkeepapi")
+
+import backups  # type: ignore[import-not-found]  # noqa: E402
+import main as keep_cli  # type: ignore[import-not-found]  # noqa: E402
+
+
+def record(note_id: str, title: str, **fields: Any) -> dict[str, Any]:
+    return {"id": note_id, "title": title, **fields}
+
+
+def write_backup(path: Path, records: list[dict[str, Any]]) -> Path:
+    with open(path, "w", encoding="utf-8") as out:
+        backups.write_records(out, records)
+    return path
+
+
+class Session:
+    """Notes on the fake backend for the tests to change."""
+
+    def __init__(self, keep: Any) -> None:
+        self.keep = keep
+        self.note = keep.createNote("Ideas", "first draft")
+        self.groceries = keep.createList("Groceries", [("milk", False), ("eggs", True)])
+        self.doomed = keep.createNote("Doomed", "deleted later")
+        self.syncs: list[str] = keep.syncs
+
+
+@pytest.fixture
+def session(fake_keep: Any) -> Session:
+    return Session(fake_keep)
+
+
+def test_sorted_by_id_merges_spilled_runs() -> None:
+    records = [record(note_id, note_id) for note_id in "qwertyuiopasdfg"]
+    ordered = list(backups.sorted_by_id(records, chunk_size=4))
+    assert [r["id"] for r in ordered] == sorted("qwertyuiopasdfg")
+
+
+def test_fold_chain_keeps_the_latest_version_in_bounded_chunks(
+    tmp_path: Path,
+) -> None:
+    write_backup(tmp_path / "full.jsonl", [record(i, "v1") for i in "qwertyuiop"])
+    write_backup(
+        tmp_path / "inc.jsonl",
+        [record("e", "v2"), {"id": "r", "removed": True}, record("a", "new")],
+    )
+    manifest = {"files": [{"path": "full.jsonl"}, {"path": "inc.jsonl"}]}
+
+    folded = list(backups.fold_chain(tmp_path, manifest, chunk_size=3))
+    assert [r["id"] for r in folded] == sorted("qwetyuiopa")
+    assert {r["id"]: r["title"] for r in folded}["e"] == "v2"
+
+
+def test_diff_reports_added_removed_and_changed_notes(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    items = [{"id": "i1", "text": "milk"}, {"id": "i2", "text": "eggs"}]
+    old = write_backup(
+        tmp_path / "old.jsonl",
+        [
+            record("c", "Same"),
+            record("a", "List", items=items),
+            record("b", "Gone"),
+        ],
+    )
+    new = write_backup(
+        tmp_path / "new.jsonl",
+        [
+            record("a", "List", items=[items[0] | {"checked": True}]),
+            record("d", "New"),
+            record("c", "Same"),
+        ],
+    )
+
+    assert keep_cli.main(["diff", str(old), str(new)]) == 0
+    assert capsys.readouterr().out.splitlines() == [
+        "~ a  List  (items +0 -1 ~1)",
+        "- b  Gone",
+        "+ d  New",
+        "1 added, 1 removed, 1 changed notes; items in changed notes: "
+        "0 added, 1 removed, 1 changed.",
+    ]
+
+    assert keep_cli.main(["diff", str(old), str(old), "--json"]) == 0
+    assert json.loads(capsys.readouterr().out)["changes"] == []
+
+
+def test_restore_plan_makes_the_account_match_a_backup(
+    session: Session, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    path = tmp_path / "backup.jsonl"
+    assert keep_cli.main(["backup", "-o", str(path)]) == 0
+    capsys.readouterr()
+
+    session.note.text = "rewritten"
+    session.note.archived = True
+    milk, eggs = session.groceries.items
+    milk.checked = True
+    eggs.delete()
+    session.doomed.delete()
+    extra = session.keep.createNote("Extra", "not in the backup")
+
+    assert keep_cli.main(["restore", "--plan", str(path), "--json"]) == 0
+    ops = [r["op"] for r in json.loads(capsys.readouterr().out)["results"]]
+    assert sorted(ops) == sorted(
+        ["edit", "unarchive", "uncheck", "item-add", "create", "trash"]
+    )
+    assert session.syncs == ["apply 6 operations"]
+    assert session.note.text == "first draft"
+    assert not session.note.archived
+    assert {(i.text, i.checked) for i in session.groceries.items} == {
+        ("milk", False),
+        ("eggs", True),
+    }
+    assert extra.trashed
+    recreated = keep_cli.active_notes(session.keep.find(query="Doomed"))
+    assert [note.text for note in recreated] == ["deleted later"]
+
+    # Recreated notes and items are matched by content, so a second plan is empty.
+    assert keep_cli.main(["restore", "--plan", str(path)]) == 0
+    assert "Nothing to restore" in capsys.readouterr().out
@@ -0,0 +1,116 @@
+"""Tests for the fake Keep backend and the benchmark suite built on it."""
+
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+pytest.importorskip("gkeepapi")
+
+import benchmark  # type: ignore[import-not-found]  # noqa: E402
+import fake_keep  # type: ignore[import-not-found]  # noqa: E402
+import main as keep_cli  # type: ignore[import-not-found]  # noqa: E402
+
+# The account the conftest fake_account fixture runs as
+EMAIL = "bench@example.invalid"
+
+
+def test_commands_run_against_the_fake_backend(
+    fake_account: None, capsys: pytest.CaptureFixture[str]
+) -> None:
+    assert keep_cli.main(["inbox", "--json"]) == 0
+    notes = json.loads(capsys.readouterr().out)
+    assert notes
+    assert all(not note["trashed"] for note in notes)
+
+    checklist = next(note for note in notes if note["type"] == "list")
+    assert keep_cli.main(["items", checklist["id"], "--json"]) == 0
+    items = json.loads(capsys.readouterr().out)["items"]
+    assert 2 <= len(items) <= 15
+
+    assert keep_cli.main(["check", checklist["id"], items[0]["id"]]) == 0
+    capsys.readouterr()
+    assert keep_cli.main(["items", checklist["id"], "--offline", "--json"]) == 0
+    assert json.loads(capsys.readouterr().out)["items"][0]["checked"] is True
+
+
+def test_syncs_reindex_only_the_notes_they_changed(
+    fake_account: None,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    assert keep_cli.main(["inbox", "--json", "--fields", "id,type,items"]) == 0
+    checklist = next(n for n in json.loads(capsys.readouterr().out) if n.get("items"))
+    item = checklist["items"][0]
+
+    reindexed: list[str] = []
+    index_note = keep_cli.index_note
+
+    def counting_index_note(note: Any) -> Any:
+        reindexed.append(note.id)
+        return index_note(note)
+
+    monkeypatch.setattr(keep_cli, "index_note", counting_index_note)
+    check = "uncheck" if item["checked"] else "check"
+    assert keep_cli.main([check, checklist["id"], item["id"]]) == 0
+    assert reindexed == [checklist["id"]]
+
+
+def test_fake_accounts_keep_out_of_real_caches_and_daemons(
+    fake_account: None, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.delenv(fake_keep.FAKE_NOTES_ENV)
+    real_state = keep_cli.state_cache_path(EMAIL)
+    real_state.parent.mkdir(parents=True)
+    real_state.write_text("real state")
+    keep_cli.daemon_socket_path(EMAIL).touch()
+
+    monkeypatch.setenv(fake_keep.FAKE_NOTES_ENV, "40")
+    monkeypatch.delenv("KEEP_CLI_NO_DAEMON")
+    args = keep_cli.build_parser().parse_args(["inbox"])
+    assert keep_cli.run_in_daemon(args, ["inbox"]) is None
+    assert keep_cli.main(["inbox", "--json"]) == 0
+
+    assert real_state.read_text() == "real state"
+    assert keep_cli.state_cache_path(EMAIL) != real_state
+    assert keep_cli.state_cache_path(EMAIL).exists()
+
+
+def test_fuzzy_find_reports_the_matching_item(
+    fake_account: None, capsys: pytest.CaptureFixture[str]
+) -> None:
+    assert keep_cli.main(["inbox", "--json", "--fields", "id,type,items"]) == 0
+    checklist = next(n for n in json.loads(capsys.readouterr().out) if n.get("items"))
+    item = max(checklist["items"], key=lambda item: len(item["text"]))
+    typo = item["text"][:-1]
+
+    argv = ["find", typo, "--fuzzy", "--limit", "3", "--offline", "--jsonl"]
+    assert keep_cli.main(argv) == 0
+    hits = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert 1 <= len(hits) <= 3
+    assert [hit["rank"] for hit in hits] == sorted(hit["rank"] for hit in hits)
+    assert (checklist["id"], item["id"]) in {(h["id"], h["item_id"]) for h in hits}
+
+
+def test_fake_accounts_are_reproducible(fake_account: None) -> None:
+    gkeepapi = keep_cli.import_gkeepapi()
+    first, second = (fake_keep.create_fake_keep(gkeepapi, 25, seed=7) for _ in "ab")
+    first.sync()
+    second.sync()
+    assert [n.title for n in first.all()] == [n.title for n in second.all()]
+    assert len(list(first.all())) == 25
+
+
+def test_benchmark_emits_json(tmp_path: Path) -> None:
+    output = tmp_path / "bench.json"
+    argv = ["--sizes", "30", "--repeat", "1", "--output", str(output)]
+    argv += ["--only", "inbox", "--only", "item-delete"]
+    assert benchmark.main(argv) == 0
+
+    results = json.loads(output.read_text())["results"]
+    assert [(r["notes"], r["command"], r["kind"]) for r in results] == [
+        (30, "inbox", "read"),
+        (30, "item-delete", "mutation"),
+    ]
+    assert all(r["peak_memory_bytes"] > 0 for r in results)
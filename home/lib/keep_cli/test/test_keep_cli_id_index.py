@@ -0,0 +1,85 @@
+"""Tests for keep-cli ID-prefix resolution through the sorted ID index."""
+
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import pytest
+from id_index import (  # type: ignore[import-not-found]
+    SortedIds,
+    build_id_index,
+    dump_id_index,
+    load_id_index,
+)
+from main import (  # type: ignore[import-not-found]
+    KeepCliError,
+    resolve_item,
+    resolve_note,
+)
+
+
+@pytest.fixture
+def keep(
+    fake_keep: Any, add_note: Callable[..., Any], monkeypatch: pytest.MonkeyPatch
+) -> Any:
+    items = [("item-aa1", "milk"), ("item-aa2", "eggs"), ("item-b", "bread")]
+    add_note("list1", "Groceries", items=items)
+    add_note("Note1", "Ideas")
+    add_note("note12", "Plans")
+    add_note("note13", "Gone").delete()
+
+    # Count full scans of the session, which the ID index is there to avoid
+    fake_keep.all_calls = 0
+    scan_all = fake_keep.all
+
+    def counting_all() -> Any:
+        fake_keep.all_calls += 1
+        return scan_all()
+
+    monkeypatch.setattr(fake_keep, "all", counting_all)
+    return fake_keep
+
+
+def test_sorted_ids_lookup_exact_prefix_and_ambiguity() -> None:
+    ids = SortedIds(f"abc{i:03d}" for i in range(20))
+    assert ids.lookup("ABC007") == (["abc007"], 1)
+    assert ids.lookup("abc01").total == 10
+    assert ids.lookup("abc01", limit=3).ids == ["abc010", "abc011", "abc012"]
+    assert ids.lookup("abd") == ([], 0)
+    # An exact ID wins even when it is also a prefix of other IDs
+    assert SortedIds(["ab", "abc"]).lookup("ab") == (["ab"], 1)
+
+
+def test_id_index_cache_is_keyed_by_keep_version(keep: Any, tmp_path: Path) -> None:
+    path = tmp_path / "ids.json"
+    index = build_id_index("v1", keep.all())
+    path.write_text(dump_id_index(index))
+
+    loaded = load_id_index(path, "v1")
+    assert loaded is not None
+    assert loaded.notes.ids == index.notes.ids
+    assert loaded.items["list1"].ids == ["item-aa1", "item-aa2", "item-b"]
+    assert load_id_index(path, "v2") is None
+    assert load_id_index(path, None) is None
+
+
+def test_resolve_note_and_item_by_prefix(keep: Any) -> None:
+    assert resolve_note(keep, "list").title == "Groceries"
+    assert resolve_note(keep, "note1").title == "Ideas"
+    assert resolve_note(keep, "note12").title == "Plans"
+    note = resolve_note(keep, "li")
+    assert resolve_item(keep, note, "ITEM-B").text == "bread"
+    # The index is built once per keep_version, not once per lookup
+    assert keep.all_calls == 1
+
+    with pytest.raises(KeepCliError, match="matches item-aa1:milk, item-aa2:eggs"):
+        resolve_item(keep, note, "item-a")
+    with pytest.raises(KeepCliError, match="No note matches"):
+        resolve_note(keep, "note13")
+
+
+def test_resolve_note_rebuilds_after_local_changes(keep: Any) -> None:
+    assert resolve_note(keep, "note12").title == "Plans"
+    keep.get("note12").delete()
+    with pytest.raises(KeepCliError, match="No note matches"):
+        resolve_note(keep, "note12")
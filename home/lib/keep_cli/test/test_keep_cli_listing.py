@@ -0,0 +1,69 @@
+"""Tests for paginated, projected, and streamed keep-cli note listings."""
+
+import json
+from typing import Any
+
+import pytest
+
+pytest.importorskip("gkeepapi")
+
+import main as keep_cli  # type: ignore[import-not-found]  # noqa: E402
+
+TITLES = ["Delta", "alpha", "Charlie", "bravo", "Echo"]
+
+
+@pytest.fixture
+def keep(fake_keep: Any) -> Any:
+    for title in TITLES:
+        fake_keep.createNote(title, f"text of {title}")
+    fake_keep.createList("Foxtrot", [("milk", False)])
+    return fake_keep
+
+
+def test_limit_offset_and_sort(keep: Any, capsys: pytest.CaptureFixture[str]) -> None:
+    argv = ["inbox", "--json", "--sort", "title", "--offset", "1", "--limit", "3"]
+    assert keep_cli.main(argv) == 0
+    titles = [note["title"] for note in json.loads(capsys.readouterr().out)]
+    assert titles == ["bravo", "Charlie", "Delta"]
+
+    assert keep_cli.main([*argv, "--reverse"]) == 0
+    titles = [note["title"] for note in json.loads(capsys.readouterr().out)]
+    assert titles == ["Echo", "Delta", "Charlie"]
+
+    # Without --sort the listing keeps Keep's order.
+    assert keep_cli.main(["inbox", "--json", "--limit", "2"]) == 0
+    titles = [note["title"] for note in json.loads(capsys.readouterr().out)]
+    assert titles == TITLES[:2]
+
+
+def test_fields_projection_and_json_lines(
+    keep: Any, capsys: pytest.CaptureFixture[str]
+) -> None:
+    argv = ["inbox", "--jsonl", "--fields", "id,title,items", "--sort", "title"]
+    assert keep_cli.main(argv) == 0
+    lines = capsys.readouterr().out.splitlines()
+    records = [json.loads(line) for line in lines]
+    assert len(records) == 6
+    assert set(records[0]) == {"id", "title"}
+    assert records[-1]["title"] == "Foxtrot"
+    assert [item["text"] for item in records[-1]["items"]] == ["milk"]
+
+    assert keep_cli.main(["inbox", "--jsonl", "--json"]) == 1
+    assert "either --json or --jsonl" in capsys.readouterr().err
+
+    with pytest.raises(SystemExit):
+        keep_cli.main(["inbox", "--fields", "title,bogus"])
+    assert "invalid fields" in capsys.readouterr().err
+
+
+def test_table_widths_come_from_a_bounded_sample(
+    monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    monkeypatch.setattr(keep_cli, "TABLE_WIDTH_SAMPLE", 2)
+    rows = [["ID", "TEXT"]] + [
+        [v, "x"] for v in ["a", "bb", "a much longer value", "c"]
+    ]
+    keep_cli.print_table(iter(rows))
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[:2] == ["ID  TEXT", "--  ----"]
+    assert lines[2:] == ["a   x", "bb  x", "a much longer value  x", "c   x"]
@@ -0,0 +1,96 @@
+"""Tests for keep-cli reads answered from the cached note state."""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+gkeepapi = pytest.importorskip("gkeepapi")
+
+import main as keep_cli  # type: ignore[import-not-found]  # noqa: E402
+
+EMAIL = "user@example.com"
+
+
+@pytest.fixture
+def cached_state(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    monkeypatch.setenv("KEEP_CLI_EMAIL", EMAIL)
+    keep = gkeepapi.Keep()
+    keep.createNote("Ideas", "offline first")
+    keep.createList("Groceries", [("milk", False), ("eggs", True)])
+    keep_cli.persist_synced_state(keep, EMAIL)
+    return keep_cli.state_cache_path(EMAIL)
+
+
+@pytest.fixture
+def logins(monkeypatch: pytest.MonkeyPatch) -> list[Any]:
+    calls: list[Any] = []
+
+    def fake_login(args: Any) -> Any:
+        calls.append(args)
+        return keep_cli.load_cached_keep(EMAIL)
+
+    monkeypatch.setattr(keep_cli, "login_keep", fake_login)
+    return calls
+
+
+def test_offline_reads_use_cached_state_with_staleness_marker(
+    cached_state: Path, logins: list[Any], capsys: pytest.CaptureFixture[str]
+) -> None:
+    assert keep_cli.main(["inbox", "--offline", "--json"]) == 0
+    captured = capsys.readouterr()
+    notes = json.loads(captured.out)
+    assert sorted(note["title"] for note in notes) == ["Groceries", "Ideas"]
+    staleness = json.loads(captured.err)["_staleness"]
+    assert staleness["source"] == "cache"
+    assert staleness["age_seconds"] < 60
+
+    # JSON lines keep their records and carry the same marker on stderr.
+    assert keep_cli.main(["inbox", "--offline", "--jsonl"]) == 0
+    captured = capsys.readouterr()
+    assert len(captured.out.splitlines()) == 2
+    assert json.loads(captured.err)["_staleness"]["source"] == "cache"
+
+    list_id = next(n["id"] for n in notes if n["title"] == "Groceries")
+    assert keep_cli.main(["items", list_id, "--offline"]) == 0
+    table = capsys.readouterr().out
+    assert "milk" in table
+    assert "Offline: note state synced 0s ago" in table
+    assert logins == []
+
+
+def test_max_staleness_syncs_when_the_cache_is_too_old(
+    cached_state: Path, logins: list[Any], capsys: pytest.CaptureFixture[str]
+) -> None:
+    assert keep_cli.main(["inbox", "--max-staleness", "10m", "--json"]) == 0
+    assert json.loads(capsys.readouterr().err)["_staleness"]["source"] == "cache"
+    assert logins == []
+
+    old = time.time() - 3600
+    os.utime(cached_state, (old, old))
+    assert keep_cli.main(["inbox", "--max-staleness", "10m", "--json"]) == 0
+    assert json.loads(capsys.readouterr().err)["_staleness"]["source"] == "sync"
+    assert len(logins) == 1
+
+
+def test_offline_without_cached_state_fails(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    monkeypatch.setenv("KEEP_CLI_EMAIL", EMAIL)
+    assert keep_cli.main(["show", "abc", "--offline"]) == 1
+    assert "No cached note state" in capsys.readouterr().err
+
+
+def test_parse_duration() -> None:
+    assert keep_cli.parse_duration("90") == 90
+    assert keep_cli.parse_duration("15m") == 900
+    assert keep_cli.parse_duration("1.5h") == 5400
+    with pytest.raises(Exception, match="invalid duration"):
+        keep_cli.parse_duration("soon")
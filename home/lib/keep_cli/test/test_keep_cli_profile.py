@@ -0,0 +1,61 @@
+"""Tests for keep-cli per-phase timing under --profile and KEEP_CLI_PROFILE."""
+
+import json
+import time
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("gkeepapi")
+
+import main as keep_cli  # type: ignore[import-not-found]  # noqa: E402
+import profiling  # type: ignore[import-not-found]  # noqa: E402
+
+pytestmark = pytest.mark.usefixtures("fake_account")
+
+
+def test_profile_prints_a_phase_breakdown_to_stderr(
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    assert keep_cli.main(["inbox", "--profile"]) == 0
+    captured = capsys.readouterr()
+    assert "Timing:" not in captured.out
+    for phase in ("load state", "sync", "save state", "render"):
+        assert f"  {phase} " in captured.err
+    assert "Touched " in captured.err
+
+    assert keep_cli.main(["inbox"]) == 0
+    assert "Timing:" not in capsys.readouterr().err
+
+
+def test_profile_env_reports_json_timing_on_stderr(
+    monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    monkeypatch.setenv("KEEP_CLI_PROFILE", "1")
+    assert keep_cli.main(["inbox", "--json"]) == 0
+    captured = capsys.readouterr()
+    notes = json.loads(captured.out)
+
+    timing = json.loads(captured.err)["_timing"]
+    assert timing["notes"] == len(notes)
+    assert {"sync", "serialize", "other"} <= set(timing["phases"])
+    assert sum(timing["phases"].values()) == pytest.approx(
+        timing["total_seconds"], abs=1e-3
+    )
+
+    # JSON lines get the same stderr line and keep their records intact.
+    assert keep_cli.main(["inbox", "--jsonl"]) == 0
+    captured = capsys.readouterr()
+    assert len(captured.out.splitlines()) == len(notes)
+    assert json.loads(captured.err)["_timing"]["notes"] == len(notes)
+
+
+def test_nested_phases_are_charged_exclusively() -> None:
+    profile = profiling.Profile()
+    with profile.phase("outer"):
+        time.sleep(0.02)
+        with profile.phase("inner"):
+            time.sleep(0.05)
+    phases = profile.report()["phases"]
+    assert phases["inner"] >= 0.05
+    assert 0.02 <= phases["outer"] < 0.05
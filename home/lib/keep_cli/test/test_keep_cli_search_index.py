@@ -0,0 +1,247 @@
+"""Tests for the keep-cli SQLite FTS5 search index."""
+
+import functools
+import json
+import sqlite3
+import stat
+from collections.abc import Iterator
+from contextlib import closing
+from pathlib import Path
+from typing import Any
+
+import pytest
+from search_index import (  # type: ignore[import-not-found]
+    IndexedNote,
+    NoteSource,
+    build_match_query,
+    fts5_available,
+    fuzzy_search,
+    get_meta,
+    open_index,
+    search,
+    trigrams,
+    update_index,
+)
+
+pytestmark = pytest.mark.skipif(
+    not fts5_available(), reason="SQLite was built without FTS5"
+)
+
+
+def make_note(
+    note_id: str,
+    title: str,
+    body: str,
+    labels: tuple[str, ...] = (),
+    archived: bool = False,
+    trashed: bool = False,
+    items: tuple[tuple[str, str], ...] = (),
+) -> IndexedNote:
+    data: dict[str, Any] = {"id": note_id, "title": title, "text": body}
+    return IndexedNote(
+        id=note_id,
+        title=title,
+        body=body,
+        labels=list(labels),
+        archived=archived,
+        trashed=trashed,
+        data=data,
+        items=items,
+    )
+
+
+def index(conn: sqlite3.Connection, notes: list[IndexedNote], keep_version: str) -> int:
+    """Update the index, fingerprinting each note by its data."""
+    sources = [
+        NoteSource(note.id, json.dumps(note.data), functools.partial(identity, note))
+        for note in notes
+    ]
+    return update_index(conn, sources, keep_version)
+
+
+def identity(note: IndexedNote) -> IndexedNote:
+    return note
+
+
+@pytest.fixture
+def conn(tmp_path: Path) -> Iterator[sqlite3.Connection]:
+    with closing(open_index(tmp_path / "index.sqlite3")) as connection:
+        index(
+            connection,
+            [
+                make_note("n1", "Groceries", "milk, eggs and sourdough bread"),
+                make_note("n2", "Recipes", "Grandma's bread recipe", ("Cooking",)),
+                make_note("n3", "Old plans", "paint the fence", archived=True),
+                make_note("n4", "Junk", "bread crumbs", trashed=True),
+                make_note("n5", "Café list", "try the new café downtown"),
+            ],
+            "v1",
+        )
+        yield connection
+
+
+def hit_ids(hits: list[Any]) -> list[str]:
+    return [hit.note["id"] for hit in hits]
+
+
+def test_search_matches_terms_phrases_prefixes_and_or(
+    conn: sqlite3.Connection,
+) -> None:
+    assert set(hit_ids(search(conn, "bread"))) == {"n1", "n2"}
+    assert hit_ids(search(conn, "sourdough bread")) == ["n1"]
+    assert hit_ids(search(conn, '"bread recipe"')) == ["n2"]
+    assert hit_ids(search(conn, "sourd*")) == ["n1"]
+    assert set(hit_ids(search(conn, "fence OR milk", archived=None))) == {"n1", "n3"}
+    # Diacritics are folded, so "cafe" finds "café"
+    assert hit_ids(search(conn, "cafe")) == ["n5"]
+
+
+def test_search_ranks_title_matches_first(conn: sqlite3.Connection) -> None:
+    index(
+        conn,
+        [
+            make_note("n1", "Groceries", "milk, eggs and sourdough bread"),
+            make_note("n6", "Bread", "notes"),
+        ],
+        "v2",
+    )
+    assert hit_ids(search(conn, "bread")) == ["n6", "n1"]
+
+
+def test_search_filters_by_state_and_label(conn: sqlite3.Connection) -> None:
+    assert hit_ids(search(conn, "fence", archived=False)) == []
+    assert hit_ids(search(conn, "fence", archived=True)) == ["n3"]
+    assert set(hit_ids(search(conn, "bread", trashed=None))) == {"n1", "n2", "n4"}
+    assert hit_ids(search(conn, "bread", labels=["cooking"])) == ["n2"]
+    assert hit_ids(search(conn, "bread", labels=["cooking", "other"])) == []
+
+
+def test_search_returns_marked_snippets(conn: sqlite3.Connection) -> None:
+    (hit,) = search(conn, "sourdough")
+    assert "[sourdough]" in hit.snippet
+    assert hit.note == {
+        "id": "n1",
+        "title": "Groceries",
+        "text": "milk, eggs and sourdough bread",
+    }
+
+
+def test_update_index_only_rewrites_changed_notes(conn: sqlite3.Connection) -> None:
+    notes = [
+        make_note("n1", "Groceries", "milk, eggs and sourdough bread"),
+        make_note("n2", "Recipes", "Grandma's rye recipe", ("Cooking",)),
+        make_note("n3", "Old plans", "paint the fence", archived=True),
+        make_note("n5", "Café list", "try the new café downtown"),
+    ]
+    # n2 changed and n4 was purged
+    assert index(conn, notes, "v2") == 2
+    assert get_meta(conn, "keep_version") == "v2"
+    assert hit_ids(search(conn, "bread", trashed=None)) == ["n1"]
+    assert hit_ids(search(conn, "rye")) == ["n2"]
+    assert index(conn, notes, "v3") == 0
+
+
+def test_update_index_only_loads_notes_whose_fingerprint_changed(
+    conn: sqlite3.Connection,
+) -> None:
+    stored = dict(conn.execute("SELECT id, fingerprint FROM notes"))
+    loaded: list[str] = []
+
+    def source(note_id: str, fingerprint: str) -> NoteSource:
+        def load() -> IndexedNote:
+            loaded.append(note_id)
+            return make_note(note_id, "Reloaded", "fresh text")
+
+        return NoteSource(note_id, fingerprint, load)
+
+    sources = [source(note_id, fp) for note_id, fp in stored.items()]
+    sources[0] = source(sources[0].id, "touched")
+    assert update_index(conn, sources, "v2") == 1
+    assert loaded == [sources[0].id]
+    assert hit_ids(search(conn, "fresh")) == [sources[0].id]
+
+
+def test_open_index_is_private_and_rebuilds_on_schema_change(tmp_path: Path) -> None:
+    path = tmp_path / "index.sqlite3"
+    with closing(open_index(path)) as conn:
+        index(conn, [make_note("n1", "Groceries", "milk")], "v1")
+        conn.execute("PRAGMA user_version = 0")
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+
+    with closing(open_index(path)) as conn:
+        assert get_meta(conn, "keep_version") is None
+        assert search(conn, "milk") == []
+
+
+def test_build_match_query_quotes_user_input() -> None:
+    assert build_match_query("foo bar") == '"foo" "bar"'
+    assert build_match_query('"two words" pre*') == '"two words" "pre"*'
+    assert build_match_query("a OR b OR") == '"a" OR "b"'
+    assert build_match_query("it's (NEAR) \"x") == '"it\'s" "(NEAR)" "x"'
+    with pytest.raises(ValueError):
+        build_match_query('* ""')
+
+
+def test_trigrams_fold_case_and_diacritics() -> None:
+    assert trigrams("Café") == trigrams("cafe") == {"  c", " ca", "caf", "afe", "fe "}
+    assert trigrams("a-b") == {"  a", " a ", "  b", " b "}
+    assert trigrams("!!") == set()
+
+
+def test_fuzzy_search_tolerates_typos_and_reports_items(
+    conn: sqlite3.Connection,
+) -> None:
+    index(
+        conn,
+        [
+            make_note("n1", "Groceries", "milk, eggs\nsourdough bread"),
+            make_note("n3", "Old plans", "paint the fence", archived=True),
+            make_note(
+                "n6",
+                "Shopping",
+                "tomatoes\nwholemeal flour",
+                items=(("i1", "tomatoes"), ("i2", "wholemeal flour")),
+            ),
+        ],
+        "v2",
+    )
+    (hit,) = fuzzy_search(conn, "wholemeel flowr")
+    assert (hit.note["id"], hit.item_id, hit.snippet) == (
+        "n6",
+        "i2",
+        "wholemeal flour",
+    )
+    assert -1 <= hit.rank < 0
+
+    # A title hit has no item, and lines of text notes are searched too.
+    assert [(h.note["id"], h.item_id) for h in fuzzy_search(conn, "grocerys")] == [
+        ("n1", None)
+    ]
+    assert hit_ids(fuzzy_search(conn, "sourdogh")) == ["n1"]
+    assert hit_ids(fuzzy_search(conn, "fense", archived=False)) == []
+    assert hit_ids(fuzzy_search(conn, "fense", archived=True)) == ["n3"]
+    with pytest.raises(ValueError):
+        fuzzy_search(conn, "?!")
+
+
+def test_fuzzy_search_ranks_close_matches_first_and_pages(
+    conn: sqlite3.Connection,
+) -> None:
+    index(
+        conn,
+        [
+            make_note("n6", "Bread", "notes"),
+            make_note("n7", "Bread and butter pudding", "dessert"),
+        ],
+        "v2",
+    )
+    assert hit_ids(fuzzy_search(conn, "bred"))[:2] == ["n6", "n7"]
+    assert hit_ids(fuzzy_search(conn, "bred", limit=1, offset=1)) == ["n7"]
+
+    # Rewriting a note replaces its trigrams, and removing it drops them.
+    index(conn, [make_note("n7", "Pudding", "dessert")], "v3")
+    assert hit_ids(fuzzy_search(conn, "buttr")) == []
+    assert conn.execute(
+        "SELECT COUNT(*) FROM trigrams WHERE entry NOT IN "
+        "(SELECT rowid FROM fuzzy_entries)"
+    ).fetchone() == (0,)
@@ -0,0 +1,129 @@
+"""Tests for the `keep-cli watch` change feed."""
+
+import json
+from typing import Any
+
+import pytest
+
+pytest.importorskip("gkeepapi")
+
+import change_feed  # type: ignore[import-not-found]  # noqa: E402
+import main as keep_cli  # type: ignore[import-not-found]  # noqa: E402
+
+
+class Session:
+    """Notes on the fake backend whose syncs can be made to fail."""
+
+    def __init__(self, keep: Any) -> None:
+        self.keep = keep
+        self.note = keep.createNote("Ideas", "first draft")
+        self.groceries = keep.createList(
+            "Groceries", [("milk", False), ("eggs", False)]
+        )
+        self.failures: list[str] = []
+
+
+@pytest.fixture
+def session(fake_keep: Any, monkeypatch: pytest.MonkeyPatch) -> Session:
+    state = Session(fake_keep)
+    sync_keep = keep_cli.sync_keep
+
+    def failing_sync(keep: Any, action: str, email: str) -> None:
+        if state.failures:
+            raise keep_cli.KeepCliError(state.failures.pop())
+        sync_keep(keep, action, email)
+
+    monkeypatch.setattr(keep_cli, "sync_keep", failing_sync)
+    return state
+
+
+def events(capsys: pytest.CaptureFixture[str]) -> list[tuple[Any, ...]]:
+    lines = capsys.readouterr().out.splitlines()
+    return sorted(
+        (e["event"], e["title"], e.get("text"))
+        for e in (json.loads(line) for line in lines)
+    )
+
+
+def test_watch_resumes_from_its_cursor(
+    session: Session, capsys: pytest.CaptureFixture[str]
+) -> None:
+    # The first run only records where it starts from.
+    assert keep_cli.main(["watch", "--once"]) == 0
+    assert capsys.readouterr().out == ""
+
+    session.note.text = "second draft"
+    session.note.archived = True
+    milk, eggs = session.groceries.items
+    milk.checked = True
+    eggs.delete()
+    session.groceries.add("bread")
+    session.keep.createNote("Fresh", "new note")
+
+    assert keep_cli.main(["watch", "--once"]) == 0
+    assert events(capsys) == [
+        ("archived", "Ideas", None),
+        ("checked", "Groceries", "milk"),
+        ("created", "Fresh", None),
+        ("created", "Groceries", "bread"),
+        ("deleted", "Groceries", "eggs"),
+        ("edited", "Ideas", None),
+    ]
+
+    session.note.delete()
+    assert keep_cli.main(["watch", "--once"]) == 0
+    assert events(capsys) == [("deleted", "Ideas", None)]
+    assert keep_cli.main(["watch", "--once"]) == 0
+    assert events(capsys) == []
+
+
+def test_watch_backs_off_when_quiet_or_failing(
+    session: Session,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    delays: list[float] = []
+
+    def sleep(seconds: float) -> None:
+        delays.append(seconds)
+        if len(delays) == 3:
+            session.failures.append("Google Keep sync failed.")
+        if len(delays) == 4:
+            session.note.title = "Renamed"
+        if len(delays) == 6:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(keep_cli.time, "sleep", sleep)
+    monkeypatch.setattr(keep_cli.signal, "signal", lambda *args: None)
+    argv = ["watch", "--interval", "10s", "--max-interval", "60s"]
+    assert keep_cli.main(argv) == 130
+
+    assert delays == [10.0, 15.0, 22.5, 45.0, 10.0, 15.0]
+    assert "retrying in 45s" in capsys.readouterr().err
+
+    assert keep_cli.main(["watch", "--interval", "1m", "--max-interval", "1s"]) == 1
+    assert "--max-interval" in capsys.readouterr().err
+
+
+def test_item_edits_and_state_toggles() -> None:
+    old = {
+        "id": "n1",
+        "type": "list",
+        "title": "List",
+        "pinned": True,
+        "trashed": True,
+        "items": [{"id": "i1", "text": "milk", "checked": True}],
+    }
+    new = old | {
+        "pinned": False,
+        "trashed": False,
+        "text": "oat milk",
+        "items": [{"id": "i1", "text": "oat milk", "checked": False}],
+    }
+    changes = list(change_feed.note_changes({"n1": old}, [new]))
+    assert [(e["event"], e["item_id"], e.get("fields")) for e in changes] == [
+        ("restored", None, None),
+        ("unpinned", None, None),
+        ("edited", "i1", ["text"]),
+        ("unchecked", "i1", None),
+    ]
@@ -0,0 +1,199 @@
+"""Concatenated context bundle output for xfile processing."""
+
+from __future__ import annotations
+
+import io
+import mmap
+import os
+import sys
+from pathlib import Path
+
+from utils import (  # type: ignore[import-not-found]
+    SNIFF_SIZE,
+    format_output_path,
+    is_binary_prefix,
+)
+
+
+def _bundle_header(display_path: str, size: int) -> bytes:
+    return f"===== BEGIN FILE: {display_path} ({size} bytes) =====\n".encode()
+
+
+def _bundle_footer(display_path: str, needs_newline: bool) -> bytes:
+    newline = "\n" if needs_newline else ""
+    return f"{newline}===== END FILE: {display_path} =====\n".encode()
+
+
+def _write_all(out: io.RawIOBase, data: bytes | memoryview) -> None:
+    """Write all of data; raw writes may write fewer bytes than asked."""
+    view = memoryview(data)
+    while view:
+        written = out.write(view)
+        view = view[written or 0 :]
+
+
+def _copy_file_body(
+    out: io.RawIOBase, out_fd: int | None, in_fd: int, size: int
+) -> int:
+    """Copy a file body to the output without Python-level reads.
+
+    Uses os.sendfile when the output has a real file descriptor and falls
+    back to writing an mmap of the input otherwise. Returns the number of
+    bytes copied, which is less than size if the file shrank meanwhile.
+    """
+    offset = 0
+    if out_fd is not None:
+        try:
+            while offset < size:
+                sent = os.sendfile(out_fd, in_fd, offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+        except OSError:
+            # Some outputs (e.g. terminals) do not support sendfile
+            pass
+
+    # A file that shrank since it was sized may now be too short (or empty)
+    end = min(size, os.fstat(in_fd).st_size)
+    if offset < end:
+        with mmap.mmap(in_fd, 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as view:
+                _write_all(out, view[offset:end])
+        offset = end
+    return offset
+
+
+def _part_path(output_path: Path, part_num: int) -> Path:
+    return output_path.with_name(
+        f"{output_path.stem}.{part_num:03d}{output_path.suffix}"
+    )
+
+
+def _open_stdout() -> tuple[io.RawIOBase, int | None]:
+    """Open an unbuffered binary handle on stdout, if it has a descriptor."""
+    sys.stdout.flush()
+    try:
+        fd = sys.stdout.fileno()
+    except (AttributeError, io.UnsupportedOperation):
+        # stdout has been replaced (e.g. by a StringIO); write through it instead
+        return _TextStdoutWriter(), None
+    return open(fd, "wb", buffering=0, closefd=False), fd
+
+
+class _TextStdoutWriter(io.RawIOBase):
+    """Binary writer that forwards decoded bytes to a text-only sys.stdout."""
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: bytes | memoryview) -> int:  # type: ignore[override]
+        sys.stdout.write(bytes(data).decode("utf-8", errors="replace"))
+        return len(data)
+
+
+def write_bundle(
+    file_paths: list[Path],
+    output: str,
+    absolute: bool,
+    cwd: Path,
+    max_bytes: int | None = None,
+) -> list[Path]:
+    """Write all text files into a single delimited bundle.
+
+    Each file body is wrapped in BEGIN/END lines carrying its path and size.
+    Binary files are skipped. With max_bytes, the bundle is split into
+    numbered parts next to the output path; a single file larger than
+    max_bytes gets a part of its own. A file that shrinks while it is copied
+    is dropped again if the output is seekable, and otherwise ends early
+    with a warning on stderr.
+
+    Returns:
+        The bundle part paths that were written (empty when writing to stdout).
+    """
+    if output == "-" and max_bytes is not None:
+        raise ValueError("Chunked bundles require an output file, not stdout")
+
+    written_parts: list[Path] = []
+    out: io.RawIOBase | None = None
+    out_fd: int | None = None
+    part_bytes = 0
+    output_path = Path(output)
+
+    def open_next_part() -> None:
+        nonlocal out, out_fd, part_bytes
+        if out is not None:
+            out.close()
+        part_path = (
+            _part_path(output_path, len(written_parts) + 1)
+            if max_bytes is not None
+            else output_path
+        )
+        part_path.parent.mkdir(parents=True, exist_ok=True)
+        out = open(part_path, "wb", buffering=0)
+        out_fd = out.fileno()
+        part_bytes = 0
+        written_parts.append(part_path)
+
+    if output == "-":
+        out, out_fd = _open_stdout()
+    else:
+        open_next_part()
+
+    try:
+        seen: set[str] = set()
+        for file_path in file_paths:
+            display_path = format_output_path(file_path, absolute, cwd)
+            if display_path in seen:
+                continue
+            seen.add(display_path)
+
+            try:
+                in_fd = os.open(file_path, os.O_RDONLY)
+            except OSError:
+                continue
+
+            try:
+                size = os.fstat(in_fd).st_size
+                prefix = os.pread(in_fd, SNIFF_SIZE, 0)
+                if is_binary_prefix(prefix):
+                    continue
+
+                needs_newline = size > 0 and os.pread(in_fd, 1, size - 1) != b"\n"
+                header = _bundle_header(display_path, size)
+                footer = _bundle_footer(display_path, needs_newline)
+                entry_size = len(header) + size + len(footer)
+
+                if (
+                    max_bytes is not None
+                    and part_bytes > 0
+                    and part_bytes + entry_size > max_bytes
+                ):
+                    open_next_part()
+
+                assert out is not None
+                entry_start = out.tell() if out.seekable() else None
+                _write_all(out, header)
+                copied = _copy_file_body(out, out_fd, in_fd, size)
+                if copied < size and entry_start is not None:
+                    # The header's size is wrong now, so drop the whole entry
+                    out.seek(entry_start)
+                    out.truncate()
+                    continue
+                if copied < size:
+                    print(
+                        f"Warning: {display_path} shrank while bundling; "
+                        f"copied {copied} of {size} bytes",
+                        file=sys.stderr,
+                    )
+                _write_all(out, footer)
+                part_bytes += entry_size - (size - copied)
+            finally:
+                os.close(in_fd)
+    finally:
+        if out is not None:
+            if output == "-":
+                out.flush()
+            else:
+                out.close()
+
+    return written_parts
@@ -8,30 +8,38 @@ xfiles contain targets (one per line) which can be:
 - Shell commands in [[filename]] command format
 - Commands that output file paths in !command format
 - xfile references in x:filename format
+- Exclusions in -pattern or !!pattern format, which subtract matching files
+  from the other targets
+
+Glob, directory, and file targets may end with @predicates such as
+@newer=2d, @older=1w, @min-size=1k, @max-size=200k, or @text. ** glob
+targets follow symlinked directories unless they end with @no-follow-symlinks;
+directory targets skip them unless they end with @follow-symlinks.
+Directories already visited (e.g. via a symlink loop) are never entered twice.
 """
 
 from __future__ import annotations
 
 import argparse
 import sys
+import time
 from pathlib import Path
 
-from rendering import (  # type: ignore[import-not-found]
-    create_rendered_file,
-    generate_rendered_filepath,
-)
-from targets import process_xfile  # type: ignore[import-not-found]
 from utils import (  # type: ignore[import-not-found]
     clear_command_cache,
     ensure_xfiles_dirs,
     find_xfile,
-    format_output_path,
-)
-from xfile_refs import (  # type: ignore[import-not-found]
+    format_output_paths,
+    format_xfile_suggestions,
     list_xfiles,
-    process_stdin_with_xfile_refs,
+    parse_size,
+    refresh_xfile_index,
+    write_output_paths,
 )
 
+# Command-specific modules are imported where they are used so that editor
+# integrations calling xfile for --list or a simple xfile start quickly.
+
 
 def main(argv: list[str] | None = None) -> int:
     """Main entry point for xfile command."""
@@ -49,6 +57,12 @@ def main(argv: list[str] | None = None) -> int:
         action="store_true",
         help="List available xfiles",
     )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="With --list, show file count, size, estimated tokens, and last "
+        "resolved time for each xfile",
+    )
     parser.add_argument(
         "-s",
         "--create-summary",
@@ -66,63 +80,194 @@ def main(argv: list[str] | None = None) -> int:
         action="store_true",
         help="Output absolute file paths (default: relative to current directory)",
     )
+    parser.add_argument(
+        "-c",
+        "--changed-only",
+        "--since-last",
+        dest="changed_only",
+        action="store_true",
+        help="Only output files added or modified since the last --changed-only run",
+    )
+    parser.add_argument(
+        "--include-removed",
+        action="store_true",
+        help="With --changed-only, also output files removed since the last run, "
+        "each prefixed with '-' after the changed files",
+    )
+    parser.add_argument(
+        "-b",
+        "--bundle",
+        metavar="FILE",
+        help="Write the contents of all resolved text files into a single "
+        "delimited bundle at FILE (or '-' for stdout) instead of listing paths",
+    )
+    parser.add_argument(
+        "--bundle-max-bytes",
+        type=parse_size,
+        metavar="SIZE",
+        help="Split the bundle into numbered parts of at most SIZE bytes (e.g. 200k)",
+    )
+
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Print per-phase timings and traversal stats (including skipped "
+        "symlink loops) to stderr",
+    )
 
     args = parser.parse_args(argv)
+    if args.include_removed and args.bundle:
+        # A bundle holds file contents, so removed files have nowhere to go
+        parser.error("--include-removed cannot be combined with --bundle")
+
+    # Elapsed time per phase, reported with --timings
+    timings: list[tuple[str, float]] = []
+    phase_start = time.perf_counter()
+
+    def end_phase(label: str) -> None:
+        nonlocal phase_start
+        now = time.perf_counter()
+        timings.append((label, now - phase_start))
+        phase_start = now
+
+    # Revalidate the xfile name index once per run
+    refresh_xfile_index()
+    end_phase("index")
 
     if args.list:
+        if args.stats:
+            from stats import list_xfiles_with_stats  # type: ignore[import-not-found]
+
+            return list_xfiles_with_stats()
+
         return list_xfiles()
 
     if not args.xfiles:
         # When no xfiles provided, process STDIN for x::pattern references
+        from xfile_refs import (  # type: ignore[import-not-found]
+            process_stdin_with_xfile_refs,
+        )
+
         return process_stdin_with_xfile_refs(args.absolute)
 
-    # Clear command cache for each run
-    clear_command_cache()
+    from predicates import save_text_cache  # type: ignore[import-not-found]
+    from targets import process_xfile  # type: ignore[import-not-found]
+    from walker import reset_walk_stats  # type: ignore[import-not-found]
+
+    try:
+        reset_walk_stats()
+
+        # Clear command cache for each run
+        clear_command_cache()
+
+        # Ensure directories exist
+        ensure_xfiles_dirs()
 
-    # Ensure directories exist
-    ensure_xfiles_dirs()
+        # Process each xfile
+        all_resolved_files: list[Path] = []
+        xfile_paths: list[Path] = []
 
-    # Process each xfile
-    all_resolved_files: list[Path] = []
-    xfile_paths: list[Path] = []
+        for xfile_name in args.xfiles:
+            xfile_path = find_xfile(xfile_name)
+            if xfile_path is None:
+                print(
+                    f"Error: xfile '{xfile_name}' not found in local or global directories"
+                    f"{format_xfile_suggestions(xfile_name)}",
+                    file=sys.stderr,
+                )
+                return 1
 
-    for xfile_name in args.xfiles:
-        xfile_path = find_xfile(xfile_name)
-        if xfile_path is None:
-            print(
-                f"Error: xfile '{xfile_name}' not found in local or global directories",
-                file=sys.stderr,
+            xfile_paths.append(xfile_path)
+            resolved_files = process_xfile(xfile_path)
+            all_resolved_files.extend(resolved_files)
+            end_phase(f"resolve {xfile_name} ({len(resolved_files)} files)")
+
+        # Keep only files that changed since the last delta run if requested
+        removed_files: list[Path] = []
+        if args.changed_only:
+            from manifest import filter_changed_files  # type: ignore[import-not-found]
+
+            all_resolved_files, removed_files = filter_changed_files(
+                args.xfiles, all_resolved_files
             )
-            return 1
-
-        xfile_paths.append(xfile_path)
-        resolved_files = process_xfile(xfile_path)
-        all_resolved_files.extend(resolved_files)
-
-    # Create rendered file if requested
-    rendered_file: Path | None = None
-    if args.create_summary:
-        output_path = (
-            Path(args.output)
-            if args.output
-            else generate_rendered_filepath(args.xfiles)
-        )
-        create_rendered_file(xfile_paths, output_path)
-        rendered_file = output_path
-
-    # Output all files (rendered file first if it exists, then resolved files)
-    cwd = Path.cwd()
-    all_output_files = []
-    if rendered_file:
-        all_output_files.append(rendered_file)
-    all_output_files.extend(all_resolved_files)
-
-    # Regular output
-    for file_path in all_output_files:
-        formatted_path = format_output_path(file_path, args.absolute, cwd)
-        print(formatted_path)
-
-    return 0
+            if not args.include_removed:
+                removed_files = []
+            end_phase("changed-only filter")
+
+        # Create rendered file if requested
+        rendered_file: Path | None = None
+        if args.create_summary:
+            from rendering import (  # type: ignore[import-not-found]
+                create_rendered_file,
+                generate_rendered_filepath,
+            )
+
+            output_path = (
+                Path(args.output)
+                if args.output
+                else generate_rendered_filepath(args.xfiles)
+            )
+            create_rendered_file(xfile_paths, output_path)
+            rendered_file = output_path
+            end_phase("summary")
+
+        # Output all files (rendered file first if it exists, then resolved files)
+        cwd = Path.cwd()
+        all_output_files = []
+        if rendered_file:
+            all_output_files.append(rendered_file)
+        all_output_files.extend(all_resolved_files)
+
+        # Bundle output replaces the path listing with the bundle part paths
+        if args.bundle:
+            from bundle import write_bundle  # type: ignore[import-not-found]
+
+            try:
+                bundle_parts = write_bundle(
+                    all_output_files,
+                    args.bundle,
+                    args.absolute,
+                    cwd,
+                    args.bundle_max_bytes,
+                )
+            except (OSError, ValueError) as e:
+                print(f"Error: Failed to write bundle: {e}", file=sys.stderr)
+                return 1
+            all_output_files = bundle_parts
+            end_phase("bundle")
+
+        # Regular output
+        write_output_paths(all_output_files, args.absolute, cwd)
+        # Removed files no longer exist, so they are marked for consumers
+        for removed_path in format_output_paths(removed_files, args.absolute, cwd):
+            sys.stdout.write(f"-{removed_path}\n")
+        end_phase("output")
+
+        if args.timings:
+            _print_timings(timings)
+
+        return 0
+    finally:
+        # Persist @text sniff results (from resolving and rendering) for the
+        # next run, even when a later xfile or the output fails
+        save_text_cache()
+
+
+def _print_timings(timings: list[tuple[str, float]]) -> None:
+    """Print per-phase timings and walker traversal stats to stderr."""
+    from walker import get_walk_stats  # type: ignore[import-not-found]
+
+    for label, seconds in timings:
+        print(f"[timings] {label}: {seconds * 1000:.1f} ms", file=sys.stderr)
+
+    dirs_scanned, skipped_dirs = get_walk_stats()
+    print(
+        f"[timings] walked {dirs_scanned} directories, "
+        f"skipped {len(skipped_dirs)} already-visited",
+        file=sys.stderr,
+    )
+    for skipped_dir in skipped_dirs:
+        print(f"[timings]   skipped loop: {skipped_dir}", file=sys.stderr)
 
 
 if __name__ == "__main__":
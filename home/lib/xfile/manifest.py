@@ -0,0 +1,149 @@
+"""Resolution manifests used by xfile's delta (--changed-only) mode."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+# Read files in 1 MiB chunks when hashing
+_HASH_CHUNK_SIZE = 1 << 20
+
+# Manifest entries map absolute path strings to {"size", "mtime_ns", "hash"}
+Manifest = dict[str, dict[str, Any]]
+
+
+def get_manifest_path(xfile_names: list[str]) -> Path:
+    """Get the manifest path for a set of xfile names."""
+    xfile_part = "_".join(xfile_names)
+    # Sanitize filename
+    xfile_part = re.sub(r"[^\w_-]", "_", xfile_part)
+    return Path.cwd() / ".sase" / "xmanifests" / f"{xfile_part}.json"
+
+
+def load_manifest(manifest_path: Path) -> Manifest:
+    """Load a manifest from disk, returning an empty one if missing or corrupt."""
+    try:
+        data = json.loads(manifest_path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+    files = data.get("files") if isinstance(data, dict) else None
+    return files if isinstance(files, dict) else {}
+
+
+def save_manifest(manifest_path: Path, manifest: Manifest) -> None:
+    """Atomically write a manifest to disk."""
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = manifest_path.with_suffix(".json.tmp")
+    tmp_path.write_text(json.dumps({"version": 1, "files": manifest}))
+    os.replace(tmp_path, manifest_path)
+
+
+def hash_file(path: str) -> str | None:
+    """Compute a fast content hash of a file, or None if it cannot be read."""
+    hasher = hashlib.blake2b(digest_size=16)
+    try:
+        with open(path, "rb") as f:
+            while chunk := f.read(_HASH_CHUNK_SIZE):
+                hasher.update(chunk)
+    except OSError:
+        return None
+    return hasher.hexdigest()
+
+
+def build_manifest(paths: list[Path], previous: Manifest) -> Manifest:
+    """Build a manifest for the given files.
+
+    Hashes are reused from the previous manifest when a file's size and
+    mtime are unchanged; all other files are hashed in parallel.
+    """
+    manifest: Manifest = {}
+    to_hash: list[str] = []
+
+    for path in paths:
+        key = os.path.abspath(path)
+        if key in manifest:
+            continue
+        try:
+            st = os.stat(key)
+        except OSError:
+            continue
+
+        entry: dict[str, Any] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        old_entry = previous.get(key)
+        if (
+            old_entry is not None
+            and old_entry.get("size") == st.st_size
+            and old_entry.get("mtime_ns") == st.st_mtime_ns
+            and old_entry.get("hash")
+        ):
+            entry["hash"] = old_entry["hash"]
+        else:
+            entry["hash"] = None
+            to_hash.append(key)
+        manifest[key] = entry
+
+    if to_hash:
+        max_workers = min(32, (os.cpu_count() or 1) + 4, len(to_hash))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for key, digest in zip(
+                to_hash, executor.map(hash_file, to_hash), strict=True
+            ):
+                manifest[key]["hash"] = digest
+
+    return manifest
+
+
+def diff_manifests(
+    previous: Manifest, current: Manifest
+) -> tuple[list[str], list[str], list[str]]:
+    """Compare two manifests.
+
+    Returns:
+        A tuple of (added, modified, removed) absolute path strings. Added
+        and modified paths follow the order of the current manifest.
+    """
+    added: list[str] = []
+    modified: list[str] = []
+    for key, entry in current.items():
+        old_entry = previous.get(key)
+        if old_entry is None:
+            added.append(key)
+        elif entry.get("hash") is None or old_entry.get("hash") != entry.get("hash"):
+            modified.append(key)
+
+    removed = [key for key in previous if key not in current]
+    return added, modified, removed
+
+
+def filter_changed_files(
+    xfile_names: list[str], resolved_files: list[Path]
+) -> tuple[list[Path], list[Path]]:
+    """Filter resolved files down to those changed since the last delta run.
+
+    Updates the stored manifest for these xfiles as a side effect.
+
+    Returns:
+        A tuple of (added or modified files, files removed since the last run).
+    """
+    manifest_path = get_manifest_path(xfile_names)
+    previous = load_manifest(manifest_path)
+    current = build_manifest(resolved_files, previous)
+    added, modified, removed = diff_manifests(previous, current)
+    save_manifest(manifest_path, current)
+
+    changed = set(added) | set(modified)
+    changed_files: list[Path] = []
+    seen: set[str] = set()
+    for path in resolved_files:
+        key = os.path.abspath(path)
+        if key in changed and key not in seen:
+            seen.add(key)
+            changed_files.append(path)
+
+    return changed_files, [Path(key) for key in removed]
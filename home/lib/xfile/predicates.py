@@ -0,0 +1,210 @@
+"""Inline file predicates for xfile glob and directory targets.
+
+Targets may end with predicates that filter the files they resolve to, e.g.
+``src/** @newer=2d @max-size=200k @text``. Supported predicates:
+
+- ``@newer=DURATION`` / ``@older=DURATION``: modified within / before the
+  given duration (e.g. 30m, 12h, 2d, 1w).
+- ``@min-size=SIZE`` / ``@max-size=SIZE``: file size bounds (e.g. 200k, 1M).
+- ``@text``: skip binary files, detected by sniffing a small prefix.
+
+``**`` glob targets descend into symlinked directories, as glob.glob did,
+and directory targets do not, as rglob did. ``@follow-symlinks`` and
+``@no-follow-symlinks`` override that default for either kind of target;
+loops are skipped either way.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+from utils import (  # type: ignore[import-not-found]
+    SNIFF_SIZE,
+    is_binary_prefix,
+    parse_size,
+)
+
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+_PREDICATE_RE = re.compile(
+    r"@(newer|older|min-size|max-size|text|(?:no-)?follow-symlinks)(?:=(\S+))?"
+)
+
+# Text sniff results keyed by absolute path -> (size, mtime_ns, is_text)
+_text_cache: dict[str, tuple[int, int, bool]] | None = None
+_text_cache_dirty = False
+_text_cache_lock = threading.Lock()
+
+
+class FilePredicates(NamedTuple):
+    """Parsed file predicates for a target."""
+
+    newer_than: float | None = None
+    older_than: float | None = None
+    min_size: int | None = None
+    max_size: int | None = None
+    text: bool = False
+    # None keeps the target kind's default
+    follow_symlinks: bool | None = None
+
+    def checks_files(self) -> bool:
+        """Check whether any predicate needs to inspect individual files."""
+        return self._replace(follow_symlinks=None) != FilePredicates()
+
+
+def parse_duration(value: str) -> float:
+    """Parse a duration like 30m, 12h, 2d, or 1w into seconds."""
+    duration_match = re.fullmatch(r"(\d+(?:\.\d+)?)([smhdw])", value.strip().lower())
+    if not duration_match:
+        raise ValueError(f"Invalid duration: {value!r}")
+    return float(duration_match.group(1)) * _DURATION_UNITS[duration_match.group(2)]
+
+
+def split_predicates(target: str) -> tuple[str, FilePredicates | None]:
+    """Split trailing @predicates off a target line.
+
+    Returns:
+        A tuple of (target without predicates, parsed predicates or None).
+
+    Raises:
+        ValueError: If a predicate value is missing or malformed.
+    """
+    tokens = target.split()
+    predicate_tokens: list[str] = []
+    while len(tokens) > 1 and _PREDICATE_RE.fullmatch(tokens[-1]):
+        predicate_tokens.insert(0, tokens.pop())
+    if not predicate_tokens:
+        return target, None
+
+    predicates = FilePredicates()
+    now = time.time()
+    for token in predicate_tokens:
+        predicate_match = _PREDICATE_RE.fullmatch(token)
+        assert predicate_match is not None
+        name, value = predicate_match.group(1), predicate_match.group(2)
+        if name == "text":
+            predicates = predicates._replace(text=True)
+            continue
+        if name in ("follow-symlinks", "no-follow-symlinks"):
+            predicates = predicates._replace(follow_symlinks=name == "follow-symlinks")
+            continue
+        if value is None:
+            raise ValueError(f"Predicate @{name} requires a value")
+        if name == "newer":
+            predicates = predicates._replace(newer_than=now - parse_duration(value))
+        elif name == "older":
+            predicates = predicates._replace(older_than=now - parse_duration(value))
+        elif name == "min-size":
+            predicates = predicates._replace(min_size=parse_size(value))
+        else:
+            predicates = predicates._replace(max_size=parse_size(value))
+
+    return " ".join(tokens), predicates
+
+
+def _get_text_cache() -> dict[str, tuple[int, int, bool]]:
+    global _text_cache
+    if _text_cache is None:
+        try:
+            data = json.loads(get_text_cache_path().read_text())
+            _text_cache = {k: tuple(v) for k, v in data.items()}  # type: ignore[misc]
+        except (OSError, ValueError, AttributeError, TypeError):
+            _text_cache = {}
+    return _text_cache
+
+
+def get_text_cache_path() -> Path:
+    """Get the path of the persisted text sniff cache."""
+    return Path.cwd() / ".sase" / "xtext_cache.json"
+
+
+def save_text_cache() -> None:
+    """Persist the text sniff cache if it changed during this run.
+
+    Entries for files that were deleted, or modified since they were
+    sniffed, are dropped so the cache only holds results it can still use.
+    """
+    global _text_cache_dirty
+    if not _text_cache_dirty or _text_cache is None:
+        return
+    with _text_cache_lock:
+        entries = list(_text_cache.items())
+    fresh = {
+        path: entry for path, entry in entries if _is_text_entry_fresh(path, entry)
+    }
+    cache_path = get_text_cache_path()
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(fresh))
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        return
+    _text_cache_dirty = False
+
+
+def _is_text_entry_fresh(path: str, entry: tuple[int, int, bool]) -> bool:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    return entry[0] == st.st_size and entry[1] == st.st_mtime_ns
+
+
+def is_text_file(path: str, st: os.stat_result) -> bool:
+    """Check whether a file looks like text, caching results by size and mtime."""
+    global _text_cache_dirty
+    key = os.path.abspath(path)
+    cache = _get_text_cache()
+    cached = cache.get(key)
+    if cached is not None and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+        return cached[2]
+
+    try:
+        with open(path, "rb") as f:
+            is_text = not is_binary_prefix(f.read(SNIFF_SIZE))
+    except OSError:
+        return False
+
+    with _text_cache_lock:
+        cache[key] = (st.st_size, st.st_mtime_ns, is_text)
+        _text_cache_dirty = True
+    return is_text
+
+
+def matches_predicates(
+    path: str, st: os.stat_result, predicates: FilePredicates | None
+) -> bool:
+    """Check whether a file's stat data (and contents, for @text) match."""
+    if predicates is None or not predicates.checks_files():
+        return True
+    if predicates.newer_than is not None and st.st_mtime < predicates.newer_than:
+        return False
+    if predicates.older_than is not None and st.st_mtime >= predicates.older_than:
+        return False
+    if predicates.min_size is not None and st.st_size < predicates.min_size:
+        return False
+    if predicates.max_size is not None and st.st_size > predicates.max_size:
+        return False
+    if predicates.text and not is_text_file(path, st):
+        return False
+    return True
+
+
+def path_matches_predicates(
+    path: str | os.PathLike[str], predicates: FilePredicates | None
+) -> bool:
+    """Stat a path and check it against predicates."""
+    if predicates is None or not predicates.checks_files():
+        return True
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    return matches_predicates(os.fspath(path), st, predicates)
@@ -2,18 +2,32 @@
 
 from __future__ import annotations
 
-import glob as glob_module
+import itertools
 import os
 import re
+from collections.abc import Iterable, Iterator
 from datetime import datetime
 from pathlib import Path
 
+from predicates import (  # type: ignore[import-not-found]
+    FilePredicates,
+    path_matches_predicates,
+    split_predicates,
+)
 from utils import (  # type: ignore[import-not-found]
     execute_cached_command,
     expand_braces,
     find_xfile,
-    make_relative_to_home,
     process_command_substitution,
+    relativize_to_home,
+)
+from walker import (  # type: ignore[import-not-found]
+    ExcludeRule,
+    collect_exclusions,
+    glob_files,
+    is_path_excluded,
+    parse_exclusion,
+    walk_files,
 )
 
 
@@ -31,89 +45,80 @@ def generate_rendered_filepath(xfile_names: list[str]) -> Path:
 
 
 def create_rendered_file(xfile_paths: list[Path], output_path: Path) -> None:
-    """Create a rendered file that shows the processed xfile content."""
-    rendered_content: list[str] = []
-
-    # Add file header
-    rendered_content.append(
-        "# ----------------------------------------------------------------------------------"
-    )
-    rendered_content.append(
-        "# This file contains a summary of some of the files that have been added to context."
-    )
-    rendered_content.append(
-        "# ----------------------------------------------------------------------------------\n"
-    )
-
-    # Process each xfile
-    for i, xfile_path in enumerate(xfile_paths):
-        if i > 0:
-            rendered_content.extend(["", "---", ""])
-
-        # Read and process the xfile content
-        try:
-            content = xfile_path.read_text()
-        except Exception as e:
-            rendered_content.append(f"ERROR: Failed to read xfile: {xfile_path} - {e}")
-            continue
-
-        lines = content.splitlines()
-        processed_xfiles: set[Path] = set()
-
-        # Process lines with look-ahead to filter out comments/blanks before empty targets
-        j = 0
-        while j < len(lines):
-            line = lines[j]
-            trimmed = line.strip()
-
-            # If this is a comment or blank line, we need to look ahead
-            if not trimmed or trimmed.startswith("#"):
-                # Collect consecutive comments and blank lines
-                comment_group: list[str] = []
-                k = j
-
-                # Collect all consecutive comments and blank lines
-                while k < len(lines):
-                    current_line = lines[k]
-                    current_trimmed = current_line.strip()
-
-                    if not current_trimmed or current_trimmed.startswith("#"):
-                        comment_group.append(current_line)
-                        k += 1
-                    else:
-                        break  # Found a non-comment, non-blank line
-
-                # Check if the next non-comment line (if any) produces output
-                should_include_comments = True
-                if k < len(lines):
-                    next_line = lines[k]
-                    next_rendered = _render_target_line(next_line, processed_xfiles)
-                    if next_rendered is None:
-                        # Next target produces no output, skip the comment group
-                        should_include_comments = False
-
-                # Add the comment group if we should include it
-                if should_include_comments:
-                    rendered_content.extend(comment_group)
-
-                # Move to the next non-comment line
-                j = k
-            else:
-                # This is a target line, render it normally
-                rendered_line = _render_target_line(line, processed_xfiles)
-                if rendered_line is not None:
-                    rendered_content.append(rendered_line)
-                j += 1
-
-    # Write the rendered file
+    """Create a rendered file that shows the processed xfile content.
+
+    Each xfile is rendered in a single buffered pass: comment and blank lines
+    are held back until the next target is rendered, then emitted or dropped
+    depending on whether that target produced output. Rendered lines are
+    streamed straight to the output file, so directory, glob and x:reference
+    targets are written one file at a time instead of being joined first.
+    """
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    output_path.write_text("\n".join(rendered_content))
+    with output_path.open("w") as out:
+        is_first_chunk = True
+
+        def emit(chunks: Iterable[str]) -> None:
+            nonlocal is_first_chunk
+            for chunk in chunks:
+                if not is_first_chunk:
+                    out.write("\n")
+                out.write(chunk)
+                is_first_chunk = False
+
+        # Add file header
+        emit(
+            (
+                "# ----------------------------------------------------------------------------------",
+                "# This file contains a summary of some of the files that have been added to context.",
+                "# ----------------------------------------------------------------------------------\n",
+            )
+        )
+
+        # Process each xfile
+        for i, xfile_path in enumerate(xfile_paths):
+            if i > 0:
+                emit(("", "---", ""))
+
+            # Read and process the xfile content
+            try:
+                content = xfile_path.read_text()
+            except Exception as e:
+                emit((f"ERROR: Failed to read xfile: {xfile_path} - {e}",))
+                continue
+
+            lines = content.splitlines()
+            processed_xfiles: set[Path] = set()
+            excludes = collect_exclusions(lines)
+
+            # Consecutive comments/blanks waiting on the next target's output
+            pending_comments: list[str] = []
+            for line in lines:
+                trimmed = line.strip()
+                if not trimmed or trimmed.startswith("#"):
+                    pending_comments.append(line)
+                    continue
+
+                rendered = _render_target_line(line, processed_xfiles, excludes)
+                if rendered is not None:
+                    emit(itertools.chain(pending_comments, rendered))
+                # Comments before a target that produces no output are dropped
+                pending_comments.clear()
+
+            # Trailing comments have no target to depend on, so keep them
+            emit(pending_comments)
 
 
 def _render_target_line(
-    target_line: str, processed_xfiles: set[Path] | None = None
-) -> str | None:
-    """Render a single target line for the rendered file."""
+    target_line: str,
+    processed_xfiles: set[Path] | None = None,
+    excludes: tuple[ExcludeRule, ...] = (),
+) -> Iterable[str] | None:
+    """Render a single target line for the rendered file.
+
+    Returns the rendered lines, or None if the target produces no output.
+    Directory, glob and x:reference targets return iterators that must be
+    consumed before the next target is rendered.
+    """
     if processed_xfiles is None:
         processed_xfiles = set()
 
@@ -121,10 +126,15 @@ def _render_target_line(
 
     # Preserve blank lines and comments
     if not trimmed:
-        return ""
+        return [""]
 
     if trimmed.startswith("#"):
-        return trimmed
+        return [trimmed]
+
+    # Handle exclusions (applied to every target in the xfile)
+    exclude_pattern = parse_exclusion(trimmed)
+    if exclude_pattern:
+        return ["#", f"# EXCLUDE: {exclude_pattern}"]
 
     # Handle x:reference
     xfile_match = re.match(r"^x:(.+)$", trimmed)
@@ -133,31 +143,20 @@ def _render_target_line(
         xfile_path = find_xfile(xfile_ref)
 
         if xfile_path is None:
-            return f"# ERROR: Referenced xfile not found: {xfile_ref}.txt"
+            return [f"# ERROR: Referenced xfile not found: {xfile_ref}.txt"]
 
         # Prevent infinite recursion
         if xfile_path in processed_xfiles:
-            return f"# ERROR: Circular xfile reference detected: {xfile_ref}"
+            return [f"# ERROR: Circular xfile reference detected: {xfile_ref}"]
 
-        # Mark this xfile as being processed
-        processed_xfiles.add(xfile_path)
-
-        result: list[str] = []
-        # Read and process the referenced xfile
-        try:
-            content = xfile_path.read_text()
-            lines = content.splitlines()
-            for line in lines:
-                rendered_ref_line = _render_target_line(line, processed_xfiles)
-                if rendered_ref_line is not None:
-                    result.append(rendered_ref_line)
-        except Exception:
-            result.append(f"# ERROR: Failed to read referenced xfile: {xfile_ref}.txt")
-
-        # Unmark this xfile after processing
-        processed_xfiles.discard(xfile_path)
-
-        return "\n".join(result) if result else None
+        # Peek so a reference that renders nothing is skipped entirely
+        result = _render_xfile_reference(
+            xfile_path, xfile_ref, processed_xfiles, excludes
+        )
+        first = next(result, None)
+        if first is None:
+            return None
+        return itertools.chain([first], result)
 
     # Handle !command that outputs file paths
     bang_match = re.match(r"^!(.+)$", trimmed)
@@ -166,23 +165,22 @@ def _render_target_line(
         output, success = execute_cached_command(bang_cmd)
 
         if success and output and output.strip():
-            result = []
-            result.append(f"#\n# COMMAND THAT OUTPUT THESE FILES: {bang_cmd}")
+            lines = ["#", f"# COMMAND THAT OUTPUT THESE FILES: {bang_cmd}"]
 
-            lines = output.splitlines()
-            for line in lines:
+            for line in output.splitlines():
                 file_path_str = line.strip()
                 if file_path_str:
                     file_path = Path(file_path_str)
                     if not file_path.is_absolute():
                         file_path = Path.cwd() / file_path
-                    if file_path.is_file():
-                        relative_path = make_relative_to_home(file_path)
-                        result.append(str(relative_path))
+                    if file_path.is_file() and not is_path_excluded(
+                        file_path, excludes
+                    ):
+                        lines.append(relativize_to_home(str(file_path)))
 
             # Only return result if we have actual files
-            if len(result) > 1:  # More than just the header comment
-                return "\n".join(result)
+            if len(lines) > 2:  # More than just the header comment
+                return lines
             else:
                 return None  # No output, skip this target entirely
         else:
@@ -203,59 +201,106 @@ def _render_target_line(
 
         xcmds_dir = Path.cwd() / ".sase" / "xcmds"
         output_file = xcmds_dir / processed_filename
-        relative_path = make_relative_to_home(output_file)
+        relative_path = relativize_to_home(str(output_file))
 
         # Execute shell command to check if it produces output
         output, success = execute_cached_command(shell_cmd)
         if success and output and output.strip():
-            return (
-                f"#\n# COMMAND THAT GENERATED THIS FILE: {shell_cmd}\n{relative_path}"
-            )
+            return [
+                "#",
+                f"# COMMAND THAT GENERATED THIS FILE: {shell_cmd}",
+                relative_path,
+            ]
         else:
             return None  # No output, skip this target entirely
 
+    # Split off trailing @predicates, keeping the full line for display
+    try:
+        target, predicates = split_predicates(trimmed)
+    except ValueError as e:
+        return [f"# ERROR: {e} in target: {trimmed}"]
+
     # Handle regular files, directories, and glob patterns
-    expanded_path = Path(os.path.expanduser(trimmed))
+    expanded_path = Path(os.path.expanduser(target))
     if not expanded_path.is_absolute():
         expanded_path = Path.cwd() / expanded_path
 
     # Check if it contains glob patterns
-    if any(char in trimmed for char in ["*", "?", "[", "]", "{"]):
-        result = []
-        result.append(f"#\n# GLOB PATTERN: {trimmed}")
-
-        expanded_pattern = os.path.expanduser(trimmed)
-        brace_expanded = expand_braces(expanded_pattern)
-        for pattern in brace_expanded:
-            matches = glob_module.glob(pattern, recursive=True)
-            for match in matches:
-                match_path = Path(match)
-                if match_path.is_file():
-                    relative_path = make_relative_to_home(match_path)
-                    result.append(str(relative_path))
-
-        if len(result) == 1:
-            result.append("# No files matched")
-
-        return "\n".join(result)
+    if any(char in target for char in ["*", "?", "[", "]", "{"]):
+        return _render_glob(trimmed, target, excludes, predicates)
 
     if expanded_path.is_dir():
-        result = []
-        result.append(f"#\n# DIRECTORY: {trimmed}")
-
-        count = 0
-        for file_path in expanded_path.rglob("*"):
-            if file_path.is_file():
-                relative_path = make_relative_to_home(file_path)
-                result.append(str(relative_path))
-                count += 1
-
-        if count == 0:
-            result.append("# No readable files in directory")
-
-        return "\n".join(result)
+        return _render_directory(trimmed, expanded_path, excludes, predicates)
     elif expanded_path.is_file():
-        relative_path = make_relative_to_home(expanded_path)
-        return str(relative_path)
+        if is_path_excluded(expanded_path, excludes) or not path_matches_predicates(
+            expanded_path, predicates
+        ):
+            return None
+        return [relativize_to_home(str(expanded_path))]
     else:
-        return f"# ERROR: File not found or not readable: {trimmed}"
+        return [f"# ERROR: File not found or not readable: {trimmed}"]
+
+
+def _render_xfile_reference(
+    xfile_path: Path,
+    xfile_ref: str,
+    processed_xfiles: set[Path],
+    excludes: tuple[ExcludeRule, ...],
+) -> Iterator[str]:
+    """Yield the rendered lines of a referenced xfile."""
+    # Mark this xfile as being processed until its lines are consumed
+    processed_xfiles.add(xfile_path)
+    try:
+        try:
+            lines = xfile_path.read_text().splitlines()
+        except Exception:
+            yield f"# ERROR: Failed to read referenced xfile: {xfile_ref}.txt"
+            return
+
+        ref_excludes = excludes + collect_exclusions(lines)
+        for line in lines:
+            rendered = _render_target_line(line, processed_xfiles, ref_excludes)
+            if rendered is not None:
+                yield from rendered
+    finally:
+        processed_xfiles.discard(xfile_path)
+
+
+def _render_glob(
+    trimmed: str,
+    target: str,
+    excludes: tuple[ExcludeRule, ...],
+    predicates: FilePredicates | None,
+) -> Iterator[str]:
+    """Yield a glob target's header and each matching file as it is found."""
+    yield "#"
+    yield f"# GLOB PATTERN: {trimmed}"
+
+    matched = False
+    for pattern in expand_braces(os.path.expanduser(target)):
+        for match in glob_files(pattern, excludes, predicates):
+            matched = True
+            yield relativize_to_home(str(Path(match)))
+
+    if not matched:
+        yield "# No files matched"
+
+
+def _render_directory(
+    trimmed: str,
+    directory: Path,
+    excludes: tuple[ExcludeRule, ...],
+    predicates: FilePredicates | None,
+) -> Iterator[str]:
+    """Yield a directory target's header and each file as it is walked."""
+    yield "#"
+    yield f"# DIRECTORY: {trimmed}"
+
+    matched = False
+    if not is_path_excluded(directory, excludes, is_dir=True):
+        for file_path in walk_files(str(directory), excludes, predicates=predicates):
+            matched = True
+            yield relativize_to_home(file_path)
+
+    if not matched:
+        yield "# No readable files in directory"
@@ -0,0 +1,214 @@
+"""Cached per-xfile statistics for `xfile --list --stats`."""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from predicates import save_text_cache  # type: ignore[import-not-found]
+from targets import process_xfile  # type: ignore[import-not-found]
+from utils import (  # type: ignore[import-not-found]
+    find_xfile,
+    get_global_xfiles_dir,
+    get_local_xfiles_dir,
+    scan_xfiles_dir,
+)
+from walker import record_scanned_dirs  # type: ignore[import-not-found]
+
+# Rough number of bytes per token used for token estimates
+_BYTES_PER_TOKEN = 4
+
+
+def get_stats_cache_path() -> Path:
+    """Get the path of the xfile stats cache for the current directory."""
+    return Path.cwd() / ".sase" / "xstats.json"
+
+
+def load_stats_cache(cache_path: Path) -> dict[str, dict[str, Any]]:
+    """Load the stats cache, returning an empty cache if missing or corrupt."""
+    try:
+        data = json.loads(cache_path.read_text())
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_stats_cache(cache_path: Path, cache: dict[str, dict[str, Any]]) -> None:
+    """Atomically write the stats cache to disk."""
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(".json.tmp")
+    tmp_path.write_text(json.dumps(cache))
+    os.replace(tmp_path, cache_path)
+
+
+def _collect_xfile_refs(xfile_path: Path, seen: set[Path]) -> None:
+    """Collect an xfile and every xfile it references (recursively) into seen."""
+    if xfile_path in seen:
+        return
+    seen.add(xfile_path)
+    try:
+        lines = xfile_path.read_text().splitlines()
+    except OSError:
+        return
+    for line in lines:
+        xfile_match = re.match(r"^x:(.+)$", line.strip())
+        if xfile_match:
+            ref_path = find_xfile(xfile_match.group(1))
+            if ref_path is not None:
+                _collect_xfile_refs(ref_path, seen)
+
+
+def _snapshot_mtimes(paths: set[str]) -> dict[str, int]:
+    mtimes: dict[str, int] = {}
+    for path in paths:
+        try:
+            mtimes[path] = os.stat(path).st_mtime_ns
+        except OSError:
+            continue
+    return mtimes
+
+
+def is_stats_entry_fresh(entry: dict[str, Any]) -> bool:
+    """Check whether a cached stats entry's dependencies are unchanged."""
+    deps = entry.get("deps")
+    if not isinstance(deps, dict):
+        return False
+    for path, mtime_ns in deps.items():
+        try:
+            if os.stat(path).st_mtime_ns != mtime_ns:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def compute_xfile_stats(xfile_path: Path) -> dict[str, Any]:
+    """Resolve an xfile and compute its file count, size, and token estimate.
+
+    The returned entry records the mtimes of the xfile, every xfile it
+    references, the current directory, every directory listed while
+    resolving, each resolved file, and each resolved file's directory, so
+    that additions, removals, and edits invalidate it. Command targets are
+    not tracked and only rerun when another dependency changes.
+    """
+    with record_scanned_dirs() as scanned_dirs:
+        resolved_files = process_xfile(xfile_path)
+
+    xfile_deps: set[Path] = set()
+    _collect_xfile_refs(xfile_path, xfile_deps)
+    dep_paths = {os.path.abspath(p) for p in xfile_deps} | scanned_dirs
+    # Relative globs are rooted at the current directory
+    dep_paths.add(os.getcwd())
+
+    unique_files: set[str] = set()
+    total_bytes = 0
+    for file_path in resolved_files:
+        key = os.path.abspath(file_path)
+        if key in unique_files:
+            continue
+        unique_files.add(key)
+        try:
+            total_bytes += os.stat(key).st_size
+        except OSError:
+            continue
+        dep_paths.add(key)
+        dep_paths.add(os.path.dirname(key))
+
+    return {
+        "files": len(unique_files),
+        "bytes": total_bytes,
+        "tokens": total_bytes // _BYTES_PER_TOKEN,
+        "resolved_at": time.time(),
+        "deps": _snapshot_mtimes(dep_paths),
+    }
+
+
+def get_xfile_stats(xfile_paths: list[Path]) -> dict[Path, dict[str, Any]]:
+    """Get stats for each xfile, recomputing stale entries on a worker pool."""
+    cache_path = get_stats_cache_path()
+    cache = load_stats_cache(cache_path)
+
+    stats: dict[Path, dict[str, Any]] = {}
+    stale: list[Path] = []
+    for xfile_path in xfile_paths:
+        entry = cache.get(str(xfile_path))
+        if entry is not None and is_stats_entry_fresh(entry):
+            stats[xfile_path] = entry
+        else:
+            stale.append(xfile_path)
+
+    if stale:
+        # Create the cache directory first so it doesn't bump the cwd's mtime
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        max_workers = min(32, (os.cpu_count() or 1) + 4, len(stale))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for xfile_path, entry in zip(
+                stale, executor.map(compute_xfile_stats, stale), strict=True
+            ):
+                stats[xfile_path] = entry
+                cache[str(xfile_path)] = entry
+        save_stats_cache(cache_path, cache)
+        save_text_cache()
+
+    return stats
+
+
+def format_size(num_bytes: float) -> str:
+    """Format a byte count as a short human-readable size."""
+    for unit in ["B", "KB", "MB"]:
+        if num_bytes < 1024:
+            return (
+                f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+            )
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} GB"
+
+
+def format_count(count: int) -> str:
+    """Format a count compactly (e.g. 12.3k)."""
+    if count < 1000:
+        return str(count)
+    if count < 1_000_000:
+        return f"{count / 1000:.1f}k"
+    return f"{count / 1_000_000:.1f}M"
+
+
+def _format_stats_line(tag: str, name: str, entry: dict[str, Any]) -> str:
+    resolved_at = datetime.fromtimestamp(entry["resolved_at"]).strftime(
+        "%Y-%m-%d %H:%M"
+    )
+    return (
+        f"  [{tag}] {name:<24} {entry['files']:>6} files  "
+        f"{format_size(entry['bytes']):>9}  "
+        f"~{format_count(entry['tokens']):>6} tokens  "
+        f"resolved {resolved_at}"
+    )
+
+
+def list_xfiles_with_stats() -> int:
+    """List available xfiles along with their cached resolution stats."""
+    local_xfiles = sorted(scan_xfiles_dir(get_local_xfiles_dir()).values())
+    global_xfiles = sorted(scan_xfiles_dir(get_global_xfiles_dir()).values())
+    stats = get_xfile_stats(local_xfiles + global_xfiles)
+
+    print("Local xfiles:")
+    if local_xfiles:
+        for xfile_path in local_xfiles:
+            print(_format_stats_line("L", xfile_path.stem, stats[xfile_path]))
+    else:
+        print("  (none)")
+
+    print("\nGlobal xfiles:")
+    if global_xfiles:
+        for xfile_path in global_xfiles:
+            print(_format_stats_line("G", xfile_path.stem, stats[xfile_path]))
+    else:
+        print("  (none)")
+
+    return 0
@@ -2,49 +2,108 @@
 
 from __future__ import annotations
 
-import glob as glob_module
 import os
 import re
 import sys
-from datetime import datetime
 from pathlib import Path
 
+from predicates import (  # type: ignore[import-not-found]
+    path_matches_predicates,
+    split_predicates,
+)
 from utils import (  # type: ignore[import-not-found]
-    execute_cached_command,
+    execute_cached_command_async,
     expand_braces,
     find_xfile,
-    process_command_substitution,
+    format_xfile_suggestions,
+    process_command_substitution_async,
+)
+from walker import (  # type: ignore[import-not-found]
+    ExcludeRule,
+    collect_exclusions,
+    glob_files,
+    is_path_excluded,
+    parse_exclusion,
+    walk_files,
 )
 
 
 def process_xfile(xfile_path: Path) -> list[Path]:
-    """Process an xfile and return all resolved file paths."""
-    content = xfile_path.read_text()
-    lines = content.splitlines()
+    """Process an xfile and return all resolved file paths.
 
-    all_resolved_files: list[Path] = []
-    processed_xfiles: set[Path] = set()
+    xfiles that only list files, directories, and globs are resolved inline,
+    which avoids importing asyncio on the common path. Otherwise this is a
+    synchronous wrapper around process_xfile_async for callers that are not
+    already running an event loop.
+    """
+    lines = xfile_path.read_text().splitlines()
+    if not any(_needs_event_loop(line) for line in lines):
+        excludes = collect_exclusions(lines)
+        return [
+            file_path
+            for line in lines
+            for file_path in _resolve_path_target(line.strip(), excludes)
+        ]
 
-    for line in lines:
-        resolved_files = resolve_target(line, processed_xfiles)
-        all_resolved_files.extend(resolved_files)
+    import asyncio
 
-    return all_resolved_files
+    return asyncio.run(process_xfile_async(xfile_path))
 
 
-def resolve_target(
-    target_line: str, processed_xfiles: set[Path] | None = None
+def _needs_event_loop(target_line: str) -> bool:
+    """Check whether a target runs commands or references other xfiles."""
+    trimmed = target_line.strip()
+    if trimmed.startswith("!"):
+        return not trimmed.startswith("!!")
+    return trimmed.startswith(("x:", "[["))
+
+
+async def process_xfile_async(xfile_path: Path) -> list[Path]:
+    """Process an xfile, resolving its targets concurrently."""
+    import asyncio
+
+    content = await asyncio.to_thread(xfile_path.read_text)
+    return await _resolve_lines_async(content.splitlines(), frozenset(), ())
+
+
+async def _resolve_lines_async(
+    lines: list[str],
+    ancestors: frozenset[Path],
+    excludes: tuple[ExcludeRule, ...],
 ) -> list[Path]:
-    """Parse and resolve a target line to file paths."""
-    if processed_xfiles is None:
-        processed_xfiles = set()
+    """Resolve target lines concurrently, preserving their order.
+
+    Exclusion lines apply to every target in the same lines, on top of any
+    exclusions inherited from referencing xfiles.
+    """
+    import asyncio
+
+    excludes = excludes + collect_exclusions(lines)
+    results = await asyncio.gather(
+        *(resolve_target_async(line, ancestors, excludes) for line in lines)
+    )
+    return [file_path for resolved_files in results for file_path in resolved_files]
+
+
+async def resolve_target_async(
+    target_line: str,
+    ancestors: frozenset[Path] = frozenset(),
+    excludes: tuple[ExcludeRule, ...] = (),
+) -> list[Path]:
+    """Parse and resolve a target line to file paths without blocking the loop.
+
+    Command targets run as async subprocesses, x:references are resolved as
+    concurrent tasks, and filesystem targets are resolved on a worker thread.
+    The ancestors set holds the xfiles currently being expanded and is used
+    to detect circular references.
+    """
+    import asyncio
 
-    resolved_files: list[Path] = []
     trimmed = target_line.strip()
 
-    # Skip empty lines and comments
-    if not trimmed or trimmed.startswith("#"):
-        return resolved_files
+    # Skip empty lines, comments, and exclusions (applied by the caller)
+    if not trimmed or trimmed.startswith("#") or parse_exclusion(trimmed):
+        return []
 
     # Handle x:reference
     xfile_match = re.match(r"^x:(.+)$", trimmed)
@@ -54,55 +113,33 @@ def resolve_target(
 
         if xfile_path is None:
             print(
-                f"Warning: Referenced xfile not found: {xfile_ref}",
+                f"Warning: Referenced xfile not found: {xfile_ref}"
+                f"{format_xfile_suggestions(xfile_ref)}",
                 file=sys.stderr,
             )
-            return resolved_files
+            return []
 
         # Prevent infinite recursion
-        if xfile_path in processed_xfiles:
+        if xfile_path in ancestors:
             print(
                 f"Warning: Circular xfile reference detected: {xfile_ref}",
                 file=sys.stderr,
             )
-            return resolved_files
-
-        # Mark this xfile as being processed
-        processed_xfiles.add(xfile_path)
-
-        # Read and process the referenced xfile
-        content = xfile_path.read_text()
-        lines = content.splitlines()
-        for line in lines:
-            ref_resolved = resolve_target(line, processed_xfiles)
-            resolved_files.extend(ref_resolved)
+            return []
 
-        # Unmark this xfile after processing
-        processed_xfiles.discard(xfile_path)
-
-        return resolved_files
+        content = await asyncio.to_thread(xfile_path.read_text)
+        return await _resolve_lines_async(
+            content.splitlines(), ancestors | {xfile_path}, excludes
+        )
 
     # Handle !command that outputs file paths
     bang_match = re.match(r"^!(.+)$", trimmed)
     if bang_match:
-        bang_cmd = bang_match.group(1)
-        output, success = execute_cached_command(bang_cmd)
-
+        output, success = await execute_cached_command_async(bang_match.group(1))
         if success and output and output.strip():
-            lines = output.splitlines()
-            for line in lines:
-                # Split by whitespace to handle multiple files on one line
-                file_paths_in_line = line.split()
-                for file_path_str in file_paths_in_line:
-                    if file_path_str:
-                        file_path = Path(file_path_str)
-                        # Handle relative vs absolute paths
-                        if not file_path.is_absolute():
-                            file_path = Path.cwd() / file_path
-                        if file_path.is_file():
-                            resolved_files.append(file_path)
-
-        return resolved_files
+            bang_resolved = await asyncio.to_thread(_resolve_bang_output, output)
+            return _apply_exclusions(bang_resolved, excludes)
+        return []
 
     # Handle [[filename]] command format
     shell_match = re.match(r"^\[\[(.+)\]\]\s+(.+)$", trimmed)
@@ -111,27 +148,100 @@ def resolve_target(
         shell_cmd = shell_match.group(2)
 
         # Process command substitution in the filename
-        processed_filename = process_command_substitution(shell_filename)
+        processed_filename = await process_command_substitution_async(shell_filename)
 
         # Execute shell command
-        output, success = execute_cached_command(shell_cmd)
+        output, success = await execute_cached_command_async(shell_cmd)
         if success and output and output.strip():
-            # Use custom extension if provided, otherwise default to .txt
-            if not re.search(r"\.\w+$", processed_filename):
-                processed_filename = f"{processed_filename}.txt"
+            return [_write_command_output(processed_filename, shell_cmd, output)]
+        return []
+
+    # Globs, directories, and plain files only touch the filesystem
+    return await asyncio.to_thread(_resolve_path_target, trimmed, excludes)
 
-            xcmds_dir = Path.cwd() / ".sase" / "xcmds"
-            xcmds_dir.mkdir(parents=True, exist_ok=True)
-            output_file = xcmds_dir / processed_filename
 
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            with output_file.open("w") as f:
-                f.write(f"# Generated from command: {shell_cmd}\n")
-                f.write(f"# Timestamp: {timestamp}\n\n")
-                f.write(output)
+def _apply_exclusions(
+    file_paths: list[Path], excludes: tuple[ExcludeRule, ...]
+) -> list[Path]:
+    """Drop files matched by exclusion rules from already-resolved paths."""
+    if not excludes:
+        return file_paths
+    return [p for p in file_paths if not is_path_excluded(p, excludes)]
+
+
+def _resolve_bang_output(output: str) -> list[Path]:
+    """Resolve the file paths printed by a !command."""
+    resolved_files: list[Path] = []
+    for line in output.splitlines():
+        # Split by whitespace to handle multiple files on one line
+        file_paths_in_line = line.split()
+        for file_path_str in file_paths_in_line:
+            if file_path_str:
+                file_path = Path(file_path_str)
+                # Handle relative vs absolute paths
+                if not file_path.is_absolute():
+                    file_path = Path.cwd() / file_path
+                if file_path.is_file():
+                    resolved_files.append(file_path)
+    return resolved_files
+
+
+def _write_command_output(processed_filename: str, shell_cmd: str, output: str) -> Path:
+    """Write a [[filename]] command's output to .sase/xcmds and return its path."""
+    # Use custom extension if provided, otherwise default to .txt
+    if not re.search(r"\.\w+$", processed_filename):
+        processed_filename = f"{processed_filename}.txt"
 
-            resolved_files.append(output_file)
+    xcmds_dir = Path.cwd() / ".sase" / "xcmds"
+    xcmds_dir.mkdir(parents=True, exist_ok=True)
+    output_file = xcmds_dir / processed_filename
 
+    from datetime import datetime
+
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with output_file.open("w") as f:
+        f.write(f"# Generated from command: {shell_cmd}\n")
+        f.write(f"# Timestamp: {timestamp}\n\n")
+        f.write(output)
+
+    return output_file
+
+
+def resolve_target(
+    target_line: str, excludes: tuple[ExcludeRule, ...] = ()
+) -> list[Path]:
+    """Parse and resolve a target line to file paths.
+
+    Files, directories, and globs are resolved inline. Command and
+    x:reference targets are a synchronous wrapper around
+    resolve_target_async, so every target has a single resolution path.
+    """
+    if _needs_event_loop(target_line):
+        import asyncio
+
+        return asyncio.run(resolve_target_async(target_line, frozenset(), excludes))
+    return _resolve_path_target(target_line.strip(), excludes)
+
+
+def _resolve_path_target(
+    trimmed: str, excludes: tuple[ExcludeRule, ...] = ()
+) -> list[Path]:
+    """Resolve a file, directory, or glob target to file paths.
+
+    Files matched by the given exclusion rules are left out; directory and
+    recursive glob walks skip excluded directories and symlink loops entirely.
+    """
+    resolved_files: list[Path] = []
+
+    # Skip empty lines, comments, and exclusions (applied by the caller)
+    if not trimmed or trimmed.startswith("#") or parse_exclusion(trimmed):
+        return resolved_files
+
+    # Split off trailing @predicates (e.g. @newer=2d @max-size=200k @text)
+    try:
+        trimmed, predicates = split_predicates(trimmed)
+    except ValueError as e:
+        print(f"Warning: {e} in target: {trimmed}", file=sys.stderr)
         return resolved_files
 
     # Check if it contains glob patterns FIRST
@@ -140,11 +250,9 @@ def resolve_target(
         expanded_pattern = os.path.expanduser(trimmed)
         brace_expanded = expand_braces(expanded_pattern)
         for pattern in brace_expanded:
-            matches = glob_module.glob(pattern, recursive=True)
-            for match in matches:
-                match_path = Path(match)
-                if match_path.is_file():
-                    resolved_files.append(match_path)
+            resolved_files.extend(
+                Path(m) for m in glob_files(pattern, excludes, predicates)
+            )
         return resolved_files
 
     # Handle regular files and directories
@@ -156,11 +264,16 @@ def resolve_target(
 
     if expanded_path.is_dir():
         # It's a directory - get all files recursively
-        for file_path in expanded_path.rglob("*"):
-            if file_path.is_file():
-                resolved_files.append(file_path)
+        if not is_path_excluded(expanded_path, excludes, is_dir=True):
+            resolved_files.extend(
+                Path(p)
+                for p in walk_files(str(expanded_path), excludes, predicates=predicates)
+            )
     elif expanded_path.is_file():
         # It's a regular file
-        resolved_files.append(expanded_path)
+        if not is_path_excluded(expanded_path, excludes) and path_matches_predicates(
+            expanded_path, predicates
+        ):
+            resolved_files.append(expanded_path)
 
     return resolved_files
@@ -3,15 +3,21 @@
 import os
 import sys
 import tempfile
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 
 from main import main  # type: ignore[import-not-found]
 from utils import (  # type: ignore[import-not-found]
     expand_braces,
+    find_xfile,
     format_output_path,
+    format_output_paths,
     get_global_xfiles_dir,
     get_local_xfiles_dir,
     make_relative_to_home,
+    refresh_xfile_index,
+    suggest_xfile_names,
+    write_output_paths,
 )
 from xfile_refs import (  # type: ignore[import-not-found]
     _format_xfile_with_at_prefix,
@@ -517,3 +523,758 @@ def test_inline_target_glob_in_bullet() -> None:
                 sys.stdout = original_stdout
         finally:
             os.chdir(old_cwd)
+
+
+def test_main_changed_only_emits_added_and_modified() -> None:
+    """Test that --changed-only only outputs files changed since the last run."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        Path(tmpdir, "a.py").write_text("a")
+        Path(tmpdir, "b.py").write_text("b")
+
+        xfiles_dir = Path(tmpdir) / "xfiles"
+        xfiles_dir.mkdir()
+        (xfiles_dir / "delta.txt").write_text("*.py\n")
+
+        old_cwd = os.getcwd()
+        original_stdout = sys.stdout
+        try:
+            os.chdir(tmpdir)
+            from io import StringIO
+
+            # First run: every file is new
+            sys.stdout = StringIO()
+            assert main(["delta", "--changed-only"]) == 0  # type: ignore[call-arg]
+            first_output = sys.stdout.getvalue().split()
+            assert sorted(first_output) == ["a.py", "b.py"]
+
+            # Second run: nothing changed
+            sys.stdout = StringIO()
+            assert main(["delta", "--since-last"]) == 0  # type: ignore[call-arg]
+            assert sys.stdout.getvalue() == ""
+
+            # Modify one file, add another, and remove a third
+            Path(tmpdir, "a.py").write_text("a changed")
+            Path(tmpdir, "c.py").write_text("c")
+            Path(tmpdir, "b.py").unlink()
+            sys.stdout = StringIO()
+            result: int = main(["delta", "-c", "--include-removed"])  # type: ignore[call-arg]
+            assert result == 0
+            output_lines = sys.stdout.getvalue().split()
+            assert sorted(output_lines[:2]) == ["a.py", "c.py"]
+            assert output_lines[2:] == ["-b.py"]
+        finally:
+            sys.stdout = original_stdout
+            os.chdir(old_cwd)
+
+
+def test_main_rejects_include_removed_with_bundle() -> None:
+    """Test that removed files can't be silently dropped from a bundle."""
+    from contextlib import redirect_stderr
+    from io import StringIO
+
+    stderr = StringIO()
+    with redirect_stderr(stderr):
+        try:
+            main(["delta", "-c", "--include-removed", "--bundle", "-"])  # type: ignore[call-arg]
+        except SystemExit as exc:
+            assert exc.code == 2
+        else:
+            raise AssertionError("expected a usage error")
+    assert "--include-removed cannot be combined with --bundle" in stderr.getvalue()
+
+
+def test_build_manifest_reuses_unchanged_hashes() -> None:
+    """Test that unchanged files keep their previous hash without rehashing."""
+    from manifest import build_manifest  # type: ignore[import-not-found]
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        test_file = Path(tmpdir) / "file.txt"
+        test_file.write_text("content")
+
+        first = build_manifest([test_file], {})
+        key = str(test_file)
+        assert first[key]["hash"]
+
+        # A stale hash is kept because size and mtime did not change
+        first[key]["hash"] = "stale"
+        second = build_manifest([test_file], first)
+        assert second[key]["hash"] == "stale"
+
+
+def test_main_bundle_writes_text_files_and_skips_binary() -> None:
+    """Test that --bundle concatenates text files with headers."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        Path(tmpdir, "a.txt").write_text("alpha\n")
+        Path(tmpdir, "b.txt").write_text("beta")
+        Path(tmpdir, "c.txt").write_bytes(b"\x00\x01binary")
+
+        xfiles_dir = Path(tmpdir) / "xfiles"
+        xfiles_dir.mkdir()
+        (xfiles_dir / "bundled.txt").write_text("a.txt\nb.txt\nc.txt\n")
+
+        old_cwd = os.getcwd()
+        original_stdout = sys.stdout
+        try:
+            os.chdir(tmpdir)
+            from io import StringIO
+
+            sys.stdout = StringIO()
+            result: int = main(["bundled", "--bundle", "ctx.txt"])  # type: ignore[call-arg]
+            assert result == 0
+            assert sys.stdout.getvalue() == "ctx.txt\n"
+
+            bundle = Path(tmpdir, "ctx.txt").read_text()
+            assert bundle == (
+                "===== BEGIN FILE: a.txt (6 bytes) =====\n"
+                "alpha\n"
+                "===== END FILE: a.txt =====\n"
+                "===== BEGIN FILE: b.txt (4 bytes) =====\n"
+                "beta\n"
+                "===== END FILE: b.txt =====\n"
+            )
+        finally:
+            sys.stdout = original_stdout
+            os.chdir(old_cwd)
+
+
+def test_main_bundle_chunks_by_max_bytes() -> None:
+    """Test that --bundle-max-bytes splits the bundle into numbered parts."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name in ["a.txt", "b.txt", "c.txt"]:
+            Path(tmpdir, name).write_text("x" * 40 + "\n")
+
+        xfiles_dir = Path(tmpdir) / "xfiles"
+        xfiles_dir.mkdir()
+        (xfiles_dir / "bundled.txt").write_text("*.txt\n")
+
+        old_cwd = os.getcwd()
+        original_stdout = sys.stdout
+        try:
+            os.chdir(tmpdir)
+            from io import StringIO
+
+            sys.stdout = StringIO()
+            result: int = main(  # type: ignore[call-arg]
+                ["bundled", "--bundle", "ctx.txt", "--bundle-max-bytes", "300"]
+            )
+            assert result == 0
+            parts = sys.stdout.getvalue().split()
+            assert parts == ["ctx.001.txt", "ctx.002.txt"]
+            assert Path(tmpdir, "ctx.001.txt").read_text().count("BEGIN FILE") == 2
+            assert Path(tmpdir, "ctx.002.txt").read_text().count("BEGIN FILE") == 1
+        finally:
+            sys.stdout = original_stdout
+            os.chdir(old_cwd)
+
+
+def test_bundle_handles_short_writes_and_shrinking_files() -> None:
+    """Test that bundles survive partial raw writes and files shrinking."""
+    import io
+
+    import bundle  # type: ignore[import-not-found]
+
+    class ShortWriter(io.RawIOBase):
+        def __init__(self) -> None:
+            self.data = bytearray()
+
+        def writable(self) -> bool:
+            return True
+
+        def write(self, data: bytes | memoryview) -> int:  # type: ignore[override]
+            self.data += bytes(data[:3])
+            return len(data[:3])
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        a_path = Path(tmpdir, "a.txt")
+        b_path = Path(tmpdir, "b.txt")
+        a_path.write_text("alpha\n")
+        b_path.write_text("beta beta\n")
+
+        # Raw writes are retried until everything is out
+        writer = ShortWriter()
+        fd = os.open(a_path, os.O_RDONLY)
+        try:
+            assert bundle._copy_file_body(writer, None, fd, 20) == 6
+        finally:
+            os.close(fd)
+        assert bytes(writer.data) == b"alpha\n"
+
+        # A file that shrinks mid-copy is dropped from a seekable bundle
+        original_copy = bundle._copy_file_body
+        b_ino = b_path.stat().st_ino
+
+        def shrinking_copy(out: object, out_fd: object, in_fd: int, size: int) -> int:
+            if os.fstat(in_fd).st_ino == b_ino:
+                os.truncate(b_path, 4)
+            return original_copy(out, out_fd, in_fd, size)
+
+        output_path = Path(tmpdir, "ctx.txt")
+        try:
+            bundle._copy_file_body = shrinking_copy
+            bundle.write_bundle([a_path, b_path], str(output_path), False, Path(tmpdir))
+        finally:
+            bundle._copy_file_body = original_copy
+        assert output_path.read_text() == (
+            "===== BEGIN FILE: a.txt (6 bytes) =====\n"
+            "alpha\n"
+            "===== END FILE: a.txt =====\n"
+        )
+
+
+def test_xfile_index_refreshes_on_directory_change() -> None:
+    """Test that xfile lookups pick up new xfiles and suggest close matches."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        xfiles_dir = Path(tmpdir) / "xfiles"
+        xfiles_dir.mkdir()
+        (xfiles_dir / "backend.txt").write_text("")
+
+        old_cwd = os.getcwd()
+        try:
+            os.chdir(tmpdir)
+            refresh_xfile_index()
+            assert find_xfile("backend.txt") == xfiles_dir / "backend.txt"
+            assert find_xfile("frontend") is None
+            assert suggest_xfile_names("backnd") == ["backend"]
+
+            (xfiles_dir / "frontend.txt").write_text("")
+            os.utime(xfiles_dir, ns=(0, 0))
+            refresh_xfile_index()
+            assert find_xfile("frontend") == xfiles_dir / "frontend.txt"
+        finally:
+            os.chdir(old_cwd)
+
+
+def test_main_list_stats_uses_cache_until_dependencies_change() -> None:
+    """Test that --list --stats caches stats and invalidates them on changes."""
+    import stats  # type: ignore[import-not-found]
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        Path(tmpdir, "a.py").write_text("a" * 400)
+
+        xfiles_dir = Path(tmpdir) / "xfiles"
+        xfiles_dir.mkdir()
+        (xfiles_dir / "pyfiles.txt").write_text("a.py\n")
+
+        old_cwd = os.getcwd()
+        original_stdout = sys.stdout
+        try:
+            os.chdir(tmpdir)
+            from io import StringIO
+
+            sys.stdout = StringIO()
+            result: int = main(["--list", "--stats"])  # type: ignore[call-arg]
+            assert result == 0
+            output = sys.stdout.getvalue()
+            assert "[L] pyfiles" in output
+            assert "1 files" in output
+            assert "~   100 tokens" in output
+
+            entry = stats.load_stats_cache(stats.get_stats_cache_path())[
+                str(xfiles_dir / "pyfiles.txt")
+            ]
+            assert stats.is_stats_entry_fresh(entry)
+
+            Path(tmpdir, "a.py").write_text("a" * 800)
+            os.utime(Path(tmpdir, "a.py"), ns=(0, 0))
+            assert not stats.is_stats_entry_fresh(entry)
+
+            sys.stdout = StringIO()
+            main(["--list", "--stats"])  # type: ignore[call-arg]
+            assert "~   200 tokens" in sys.stdout.getvalue()
+        finally:
+            sys.stdout = original_stdout
+            os.chdir(old_cwd)
+
+
+def test_main_list_stats_sees_files_in_new_and_empty_directories() -> None:
+    """Test that stats depend on every directory a glob or walk listed."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        Path(tmpdir, "docs", "old").mkdir(parents=True)
+        Path(tmpdir, "docs", "old", "a.md").write_text("a")
+        Path(tmpdir, "empty").mkdir()
+
+        xfiles_dir = Path(tmpdir) / "xfiles"
+        xfiles_dir.mkdir()
+        (xfiles_dir / "deep.txt").write_text("docs/**/*.md\n")
+        (xfiles_dir / "flat.txt").write_text("empty/*.md\n")
+
+        def stats_lines() -> dict[str, str]:
+            sys.stdout = StringIO()
+            assert main(["--list", "--stats"]) == 0  # type: ignore[call-arg]
+            return {
+                line.split()[1]: line
+                for line in sys.stdout.getvalue().splitlines()
+                if line.strip().startswith("[L]")
+            }
+
+        old_cwd = os.getcwd()
+        original_stdout = sys.stdout
+        try:
+            os.chdir(tmpdir)
+            from io import StringIO
+
+            lines = stats_lines()
+            assert " 1 files" in lines["deep"]
+            assert " 0 files" in lines["flat"]
+
+            Path(tmpdir, "docs", "new").mkdir()
+            Path(tmpdir, "docs", "new", "b.md").write_text("b")
+            Path(tmpdir, "empty", "c.md").write_text("c")
+            lines = stats_lines()
+            assert " 2 files" in lines["deep"]
+            assert " 1 files" in lines["flat"]
+        finally:
+            sys.stdout = original_stdout
+            os.chdir(old_cwd)
+
+
+def test_process_xfile_async_runs_duplicate_commands_once() -> None:
+    """Test that concurrent identical command targets share a single run."""
+    import asyncio
+
+    from targets import process_xfile_async  # type: ignore[import-not-found]
+    from utils import clear_command_cache  # type: ignore[import-not-found]
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        Path(tmpdir, "a.txt").write_text("a")
+        Path(tmpdir, "b.txt").write_text("b")
+
+        xfiles_dir = Path(tmpdir) / "xfiles"
+        xfiles_dir.mkdir()
+        cmd = "!echo run >> runs.log; echo b.txt"
+        (xfiles_dir / "child.txt").write_text(f"{cmd}\n")
+        (xfiles_dir / "parent.txt").write_text(f"a.txt\n{cmd}\nx:child\n{cmd}\n")
+
+        old_cwd = os.getcwd()
+        try:
+            os.chdir(tmpdir)
+            clear_command_cache()
+            result = asyncio.run(process_xfile_async(xfiles_dir / "parent.txt"))
+
+            assert [p.name for p in result] == ["a.txt", "b.txt", "b.txt", "b.txt"]
+            assert Path(tmpdir, "runs.log").read_text() == "run\n"
+        finally:
+            os.chdir(old_cwd)
+
+
+def test_create_rendered_file_renders_each_target_once() -> None:
+    """Test that comments are kept or dropped without re-rendering targets."""
+    import rendering  # type: ignore[import-not-found]
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        Path(tmpdir, "a.txt").write_text("a")
+        xfile_path = Path(tmpdir) / "render.txt"
+        xfile_path.write_text(
+            "# Kept comment\na.txt\n\n# Dropped comment\n!false\n# Trailing comment"
+        )
+        output_path = Path(tmpdir) / "out" / "rendered.txt"
+
+        calls: list[str] = []
+        original_render = rendering._render_target_line
+
+        def counting_render(line: str, *args: object) -> Iterable[str] | None:
+            calls.append(line)
+            return original_render(line, *args)
+
+        old_cwd = os.getcwd()
+        try:
+            os.chdir(tmpdir)
+            rendering._render_target_line = counting_render
+            rendering.create_rendered_file([xfile_path], output_path)
+        finally:
+            rendering._render_target_line = original_render
+            os.chdir(old_cwd)
+
+        assert calls == ["a.txt", "!false"]
+        rendered = output_path.read_text()
+        assert "# Kept comment\n" in rendered
+        assert "Dropped comment" not in rendered
+        assert rendered.endswith("\n# Trailing comment")
+
+
+def test_create_rendered_file_streams_directory_targets() -> None:
+    """Test that directory files are rendered as they are walked."""
+    import rendering  # type: ignore[import-not-found]
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        Path(tmpdir, "src").mkdir()
+        walked: list[str] = []
+        original_walk = rendering.walk_files
+
+        def recording_walk(root: str, *args: object, **kwargs: object) -> Iterator[str]:
+            for name in ["a.py", "b.py"]:
+                walked.append(name)
+                yield os.path.join(root, name)
+
+        old_cwd = os.getcwd()
+        try:
+            os.chdir(tmpdir)
+            rendering.walk_files = recording_walk
+            rendered = rendering._render_target_line("src")
+            assert walked == []
+            assert next(rendered) == "#"
+            assert next(rendered) == "# DIRECTORY: src"
+            assert walked == []
+            assert next(rendered).endswith("a.py")
+            assert walked == ["a.py"]
+            assert next(rendered).endswith("b.py")
+            assert list(rendered) == []
+        finally:
+            rendering.walk_files = original_walk
+            os.chdir(old_cwd)
+
+
+def test_main_exclusions_prune_directories_and_files() -> None:
+    """Test that -pattern and !!pattern lines subtract files from targets."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for rel_path in [
+            "src/app.py",
+            "src/app_pb2.py",
+            "src/tests/test_app.py",
+            "src/pkg/util.py",
+        ]:
+            file_path = Path(tmpdir, rel_path)
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.write_text("x")
+
+        xfiles_dir = Path(tmpdir) / "xfiles"
+        xfiles_dir.mkdir()
+        (xfiles_dir / "src.txt").write_text("src/**\n-**/*_pb2.py\n!!tests/\n")
+        (xfiles_dir / "srcdir.txt").write_text("-tests/\nsrc\n")
+
+        old_cwd = os.getcwd()
+        original_stdout = sys.stdout
+        try:
+            os.chdir(tmpdir)
+            from io import StringIO
+
+            sys.stdout = StringIO()
+            assert main(["src"]) == 0  # type: ignore[call-arg]
+            assert sorted(sys.stdout.getvalue().split()) == [
+                "src/app.py",
+                "src/pkg/util.py",
+            ]
+
+            sys.stdout = StringIO()
+            assert main(["srcdir"]) == 0  # type: ignore[call-arg]
+            assert sorted(sys.stdout.getvalue().split()) == [
+                "src/app.py",
+                "src/app_pb2.py",
+                "src/pkg/util.py",
+            ]
+        finally:
+            sys.stdout = original_stdout
+            os.chdir(old_cwd)
+
+
+def test_walk_files_does_not_descend_into_excluded_dirs() -> None:
+    """Test that excluded directories are pruned before they are scanned."""
+    from walker import compile_exclusions, walk_files  # type: ignore[import-not-found]
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        Path(tmpdir, "keep.txt").write_text("x")
+        blocked_dir = Path(tmpdir, "node_modules")
+        blocked_dir.mkdir()
+        Path(blocked_dir, "dep.js").write_text("x")
+        # Record every directory the walker scans
+        scanned: list[str] = []
+        original_scandir = os.scandir
+
+        def recording_scandir(path: str):  # type: ignore[no-untyped-def]
+            scanned.append(path)
+            return original_scandir(path)
+
+        old_cwd = os.getcwd()
+        try:
+            os.chdir(tmpdir)
+            os.scandir = recording_scandir  # type: ignore[assignment]
+            files = list(walk_files(".", compile_exclusions(["node_modules/"])))
+        finally:
+            os.scandir = original_scandir
+            os.chdir(old_cwd)
+
+        assert files == ["./keep.txt"]
+        assert not any(path.endswith("node_modules") for path in scanned)
+
+
+def test_target_predicates_filter_resolved_files() -> None:
+    """Test that @newer, @max-size, and @text predicates filter targets."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        src_dir = Path(tmpdir) / "src"
+        src_dir.mkdir()
+        Path(src_dir, "small.py").write_text("x = 1\n")
+        Path(src_dir, "big.py").write_text("x" * 4096)
+        Path(src_dir, "blob.bin").write_bytes(b"\x00\x01\x02")
+        old_file = Path(src_dir, "old.py")
+        old_file.write_text("y = 2\n")
+        week_ago = os.stat(old_file).st_mtime - 7 * 86400
+        os.utime(old_file, (week_ago, week_ago))
+
+        xfiles_dir = Path(tmpdir) / "xfiles"
+        xfiles_dir.mkdir()
+        (xfiles_dir / "recent.txt").write_text("src/** @newer=2d @max-size=1k @text\n")
+        (xfiles_dir / "olddir.txt").write_text("src @older=3d\n")
+
+        old_cwd = os.getcwd()
+        original_stdout = sys.stdout
+        try:
+            os.chdir(tmpdir)
+            from io import StringIO
+
+            sys.stdout = StringIO()
+            assert main(["recent"]) == 0  # type: ignore[call-arg]
+            assert sys.stdout.getvalue().split() == ["src/small.py"]
+
+            sys.stdout = StringIO()
+            assert main(["olddir"]) == 0  # type: ignore[call-arg]
+            assert sys.stdout.getvalue().split() == ["src/old.py"]
+        finally:
+            sys.stdout = original_stdout
+            os.chdir(old_cwd)
+
+        # Text sniff results are persisted for the next run
+        assert (Path(tmpdir) / ".sase" / "xtext_cache.json").exists()
+
+
+def test_text_cache_is_saved_by_stats_and_pruned_of_stale_files() -> None:
+    """Test that --list --stats persists @text sniffs and drops deleted files."""
+    import json
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        src = Path(tmpdir) / "src"
+        src.mkdir()
+        (src / "a.txt").write_text("a")
+        (src / "b.txt").write_text("b")
+        xfiles_dir = Path(tmpdir) / "xfiles"
+        xfiles_dir.mkdir()
+        (xfiles_dir / "texty.txt").write_text("src/** @text\n")
+        cache_path = Path(tmpdir) / ".sase" / "xtext_cache.json"
+
+        old_cwd = os.getcwd()
+        original_stdout = sys.stdout
+        try:
+            os.chdir(tmpdir)
+            from io import StringIO
+
+            sys.stdout = StringIO()
+            assert main(["--list", "--stats"]) == 0  # type: ignore[call-arg]
+            cached = {Path(p).name for p in json.loads(cache_path.read_text())}
+            assert cached == {"a.txt", "b.txt"}
+
+            (src / "b.txt").unlink()
+            (src / "c.txt").write_text("c")
+            sys.stdout = StringIO()
+            assert main(["texty"]) == 0  # type: ignore[call-arg]
+            cached = {Path(p).name for p in json.loads(cache_path.read_text())}
+            assert cached == {"a.txt", "c.txt"}
+
+            # Sniffs are kept even when a later xfile is not found
+            (src / "d.txt").write_text("d")
+            assert main(["texty", "missing"]) == 1  # type: ignore[call-arg]
+            cached = {Path(p).name for p in json.loads(cache_path.read_text())}
+            assert cached == {"a.txt", "c.txt", "d.txt"}
+        finally:
+            sys.stdout = original_stdout
+            os.chdir(old_cwd)
+
+
+def test_format_output_paths_matches_single_path_formatting() -> None:
+    """Test that batched formatting agrees with Path.relative_to semantics."""
+    cwd = Path("/home/user/project")
+    paths = [
+        Path("/home/user/project/src/app.py"),
+        Path("/home/user/project"),
+        Path("/home/user/projects/other.py"),
+        Path("relative/file.py"),
+        Path("/etc/config.txt"),
+    ]
+    assert list(format_output_paths(paths, absolute=False, cwd=cwd)) == [
+        "src/app.py",
+        ".",
+        "/home/user/projects/other.py",
+        "relative/file.py",
+        "/etc/config.txt",
+    ]
+    assert list(format_output_paths(paths, absolute=False, cwd=Path("/"))) == [
+        "home/user/project/src/app.py",
+        "home/user/project",
+        "home/user/projects/other.py",
+        "relative/file.py",
+        "etc/config.txt",
+    ]
+
+
+def test_write_output_paths_writes_in_chunks() -> None:
+    """Test that output paths are written one line each across chunks."""
+    from io import StringIO
+
+    cwd = Path("/proj")
+    paths = [cwd / f"file{i}.txt" for i in range(5)]
+    original_stdout = sys.stdout
+    writes: list[str] = []
+
+    class RecordingStdout(StringIO):
+        def write(self, s: str) -> int:
+            writes.append(s)
+            return super().write(s)
+
+    try:
+        sys.stdout = RecordingStdout()
+        write_output_paths(paths, absolute=False, cwd=cwd, chunk_size=2)
+        output = sys.stdout.getvalue()
+    finally:
+        sys.stdout = original_stdout
+
+    assert output == "".join(f"file{i}.txt\n" for i in range(5))
+    assert len(writes) == 3
+
+
+# Cumulative import time budget for the main module, in microseconds
+_MAIN_IMPORT_BUDGET_US = 100_000
+
+# Modules that only specific commands need and must not load at startup
+_LAZY_MODULES = {
+    "asyncio",
+    "bundle",
+    "concurrent.futures",
+    "difflib",
+    "manifest",
+    "rendering",
+    "stats",
+    "subprocess",
+}
+
+
+def _run_with_importtime(cwd: str, argv: list[str]) -> dict[str, int]:
+    """Run xfile's main under -X importtime and return cumulative times.
+
+    Only modules imported by main (at import time or while running) are
+    returned, so interpreter startup hooks such as coverage are ignored.
+    """
+    import subprocess
+
+    xfile_dir = str(Path(__file__).resolve().parent.parent)
+    code = f"import sys, main; sys.exit(main.main({argv!r}))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=cwd,
+        env={**os.environ, "PYTHONPATH": xfile_dir},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    entries: list[tuple[str, int, bool]] = []
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "cumulative" not in line:
+            _, cumulative, name = line.split("|")
+            is_top_level = not name[1:].startswith(" ")
+            entries.append((name.strip(), int(cumulative), is_top_level))
+
+    # importtime lists a module after its imports, so main's imports start
+    # right after the top-level entry preceding it
+    main_index = next(i for i, entry in enumerate(entries) if entry[0] == "main")
+    start = main_index
+    while start > 0 and not entries[start - 1][2]:
+        start -= 1
+    return {name: cumulative for name, cumulative, _ in entries[start:]}
+
+
+def test_startup_imports_stay_within_budget() -> None:
+    """Test that --list and simple xfiles avoid loading command-specific modules."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        Path(tmpdir, "notes.md").write_text("notes\n")
+        xfiles_dir = Path(tmpdir) / "xfiles"
+        xfiles_dir.mkdir()
+        (xfiles_dir / "simple.txt").write_text("notes.md\n")
+
+        list_imports = _run_with_importtime(tmpdir, ["--list"])
+        assert list_imports["main"] < _MAIN_IMPORT_BUDGET_US
+        assert not _LAZY_MODULES & list_imports.keys()
+        assert not {"targets", "typing", "xfile_refs"} & list_imports.keys()
+
+        simple_imports = _run_with_importtime(tmpdir, ["simple"])
+        assert not _LAZY_MODULES & simple_imports.keys()
+
+
+def test_symlink_loops_are_skipped_and_reported() -> None:
+    """Test that followed symlink loops are walked once and shown in --timings."""
+    from io import StringIO
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        src_dir = Path(tmpdir) / "src"
+        (src_dir / "pkg").mkdir(parents=True)
+        Path(src_dir, "app.py").write_text("x")
+        Path(src_dir, "pkg", "util.py").write_text("x")
+        # A symlink back to an ancestor directory
+        Path(src_dir, "pkg", "loop").symlink_to(src_dir)
+
+        xfiles_dir = Path(tmpdir) / "xfiles"
+        xfiles_dir.mkdir()
+        (xfiles_dir / "nofollow.txt").write_text("src\n")
+        (xfiles_dir / "follow.txt").write_text(
+            "src @follow-symlinks\nsrc/**/*.py @follow-symlinks\n"
+        )
+
+        old_cwd = os.getcwd()
+        original_stdout = sys.stdout
+        original_stderr = sys.stderr
+        try:
+            os.chdir(tmpdir)
+            sys.stdout = StringIO()
+            assert main(["nofollow"]) == 0  # type: ignore[call-arg]
+            assert sorted(sys.stdout.getvalue().split()) == [
+                "src/app.py",
+                "src/pkg/util.py",
+            ]
+
+            sys.stdout = StringIO()
+            sys.stderr = StringIO()
+            assert main(["follow", "--timings"]) == 0  # type: ignore[call-arg]
+            assert sorted(sys.stdout.getvalue().split()) == [
+                "src/app.py",
+                "src/app.py",
+                "src/pkg/util.py",
+                "src/pkg/util.py",
+            ]
+            timings_output = sys.stderr.getvalue()
+        finally:
+            sys.stdout = original_stdout
+            sys.stderr = original_stderr
+            os.chdir(old_cwd)
+
+        assert "skipped 2 already-visited" in timings_output
+        assert "skipped loop: src/pkg/loop ->" in timings_output
+
+
+def test_recursive_globs_follow_symlinked_dirs_by_default() -> None:
+    """Test that ** globs follow symlinked directories unless told not to."""
+    from io import StringIO
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        Path(tmpdir, "shared").mkdir()
+        Path(tmpdir, "shared", "lib.py").write_text("x")
+        Path(tmpdir, "src").mkdir()
+        Path(tmpdir, "src", "app.py").write_text("x")
+        Path(tmpdir, "src", "shared").symlink_to(Path(tmpdir, "shared"))
+
+        xfiles_dir = Path(tmpdir) / "xfiles"
+        xfiles_dir.mkdir()
+        (xfiles_dir / "glob.txt").write_text("src/**/*.py\n")
+        (xfiles_dir / "nofollow.txt").write_text("src/**/*.py @no-follow-symlinks\n")
+
+        old_cwd = os.getcwd()
+        original_stdout = sys.stdout
+        try:
+            os.chdir(tmpdir)
+            sys.stdout = StringIO()
+            assert main(["glob"]) == 0  # type: ignore[call-arg]
+            followed = sorted(sys.stdout.getvalue().split())
+            sys.stdout = StringIO()
+            assert main(["nofollow"]) == 0  # type: ignore[call-arg]
+            not_followed = sorted(sys.stdout.getvalue().split())
+        finally:
+            sys.stdout = original_stdout
+            os.chdir(old_cwd)
+
+        assert followed == ["src/app.py", "src/shared/lib.py"]
+        assert not_followed == ["src/app.py"]
@@ -2,13 +2,41 @@
 
 from __future__ import annotations
 
+import os
 import re
-import subprocess
+import sys
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 
+# asyncio, subprocess, and difflib are imported where used to keep startup fast;
+# TYPE_CHECKING is defined locally since importing typing costs several ms
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import asyncio
+
+# Number of leading bytes inspected to decide whether a file is binary
+SNIFF_SIZE = 8192
+
+# Number of formatted paths joined into each stdout write
+_OUTPUT_CHUNK_SIZE = 4096
+
+# Home directory prefix, keyed by the $HOME it was computed from
+_home_prefix: tuple[str | None, str] | None = None
+
 # Command cache to avoid running the same command multiple times
 _command_cache: dict[str, tuple[str | None, bool]] = {}
 
+# In-flight async commands, keyed by event loop so concurrent duplicates share a run
+_pending_commands: dict[
+    tuple[asyncio.AbstractEventLoop, str], asyncio.Task[tuple[str | None, bool]]
+] = {}
+
+# Per-directory xfile listings, keyed by directory and validated by its mtime
+_xfiles_dir_cache: dict[Path, tuple[int, dict[str, Path]]] = {}
+
+# Merged name -> path index for the current run (local entries shadow global)
+_xfile_index: tuple[tuple[Path, Path], dict[str, Path]] | None = None
+
 
 def clear_command_cache() -> None:
     """Clear the command cache."""
@@ -21,6 +49,8 @@ def execute_cached_command(cmd: str) -> tuple[str | None, bool]:
     if cmd in _command_cache:
         return _command_cache[cmd]
 
+    import subprocess
+
     try:
         result = subprocess.run(
             cmd,
@@ -38,6 +68,42 @@ def execute_cached_command(cmd: str) -> tuple[str | None, bool]:
         return None, False
 
 
+async def execute_cached_command_async(cmd: str) -> tuple[str | None, bool]:
+    """Execute a command as an async subprocess, sharing the command cache."""
+    if cmd in _command_cache:
+        return _command_cache[cmd]
+
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    key = (loop, cmd)
+    task = _pending_commands.get(key)
+    if task is None:
+        task = loop.create_task(_run_command_async(cmd))
+        _pending_commands[key] = task
+        task.add_done_callback(lambda _: _pending_commands.pop(key, None))
+    return await task
+
+
+async def _run_command_async(cmd: str) -> tuple[str | None, bool]:
+    import asyncio
+
+    try:
+        proc = await asyncio.create_subprocess_shell(
+            cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        stdout, _ = await proc.communicate()
+        output = stdout.decode(errors="replace")
+        success = proc.returncode == 0
+        _command_cache[cmd] = (output, success)
+        return output, success
+    except Exception:
+        _command_cache[cmd] = (None, False)
+        return None, False
+
+
 def expand_braces(pattern: str) -> list[str]:
     """Expand brace patterns like {py,txt} into multiple patterns.
 
@@ -74,6 +140,39 @@ def process_command_substitution(filename: str) -> str:
     return result
 
 
+def parse_size(value: str) -> int:
+    """Parse a human-readable byte size like 200k, 1.5M, or 4096 into bytes."""
+    size_match = re.fullmatch(
+        r"\s*(\d+(?:\.\d+)?)\s*([kmg]?)(?:i?b)?\s*", value, re.IGNORECASE
+    )
+    if not size_match:
+        raise ValueError(f"Invalid size: {value!r}")
+
+    multiplier = {"": 1, "k": 1 << 10, "m": 1 << 20, "g": 1 << 30}
+    return int(float(size_match.group(1)) * multiplier[size_match.group(2).lower()])
+
+
+async def process_command_substitution_async(filename: str) -> str:
+    """Async variant of process_command_substitution.
+
+    Runs the substituted commands concurrently, then substitutes from the cache.
+    """
+    import asyncio
+
+    await asyncio.gather(
+        *(
+            execute_cached_command_async(cmd)
+            for cmd in re.findall(r"\$\(([^)]+)\)", filename)
+        )
+    )
+    return process_command_substitution(filename)
+
+
+def is_binary_prefix(prefix: bytes) -> bool:
+    """Return True if a file prefix looks like binary (non-text) content."""
+    return b"\0" in prefix
+
+
 def get_global_xfiles_dir() -> Path:
     """Get the global xfiles directory path."""
     return Path.home() / ".local/share/nvim/codecompanion/user/xfiles"
@@ -90,12 +189,64 @@ def ensure_xfiles_dirs() -> None:
     get_local_xfiles_dir().mkdir(parents=True, exist_ok=True)
 
 
+def scan_xfiles_dir(xfiles_dir: Path) -> dict[str, Path]:
+    """Map xfile names to paths for a directory with a single scandir.
+
+    Listings are cached and only rescanned when the directory's mtime changes.
+    """
+    try:
+        mtime_ns = xfiles_dir.stat().st_mtime_ns
+    except OSError:
+        return {}
+
+    cached = _xfiles_dir_cache.get(xfiles_dir)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+
+    listing: dict[str, Path] = {}
+    try:
+        with os.scandir(xfiles_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(".txt") and entry.is_file():
+                    listing[entry.name[:-4]] = Path(entry.path)
+    except OSError:
+        return {}
+
+    _xfiles_dir_cache[xfiles_dir] = (mtime_ns, listing)
+    return listing
+
+
+def refresh_xfile_index() -> None:
+    """Drop the merged xfile index so the next lookup revalidates both directories."""
+    global _xfile_index
+    _xfile_index = None
+
+
+def get_xfile_index() -> dict[str, Path]:
+    """Get the merged xfile name index for the local and global directories."""
+    global _xfile_index
+    dirs = (get_local_xfiles_dir(), get_global_xfiles_dir())
+    if _xfile_index is not None and _xfile_index[0] == dirs:
+        return _xfile_index[1]
+
+    local_dir, global_dir = dirs
+    index = dict(scan_xfiles_dir(global_dir))
+    index.update(scan_xfiles_dir(local_dir))
+    _xfile_index = (dirs, index)
+    return index
+
+
 def find_xfile(name: str) -> Path | None:
     """Find an xfile by name, checking local directory first, then global."""
     # Remove .txt extension if provided
     if name.endswith(".txt"):
         name = name[:-4]
 
+    xfile_path = get_xfile_index().get(name)
+    if xfile_path is not None or "/" not in name:
+        return xfile_path
+
+    # Names with path separators point into subdirectories, which aren't indexed
     local_path = get_local_xfiles_dir() / f"{name}.txt"
     if local_path.exists():
         return local_path
@@ -107,24 +258,118 @@ def find_xfile(name: str) -> Path | None:
     return None
 
 
+def suggest_xfile_names(name: str) -> list[str]:
+    """Suggest known xfile names that closely match an unknown name."""
+    if name.endswith(".txt"):
+        name = name[:-4]
+    import difflib
+
+    return difflib.get_close_matches(name, get_xfile_index().keys(), n=3)
+
+
+def format_xfile_suggestions(name: str) -> str:
+    """Format a 'did you mean' hint for an unknown xfile name (or '')."""
+    suggestions = suggest_xfile_names(name)
+    if not suggestions:
+        return ""
+    return f" (did you mean: {', '.join(suggestions)}?)"
+
+
+def _get_home_prefix() -> str:
+    """Get the home directory with a trailing separator, cached per $HOME."""
+    global _home_prefix
+    home_env = os.environ.get("HOME")
+    if _home_prefix is None or _home_prefix[0] != home_env:
+        _home_prefix = (home_env, _with_trailing_sep(str(Path.home())))
+    return _home_prefix[1]
+
+
+def _with_trailing_sep(path_str: str) -> str:
+    return path_str if path_str.endswith(os.sep) else path_str + os.sep
+
+
+def relativize_to_home(path_str: str) -> str:
+    """Replace a leading home directory in a path string with ~."""
+    home_prefix = _get_home_prefix()
+    if _with_trailing_sep(path_str) == home_prefix:
+        return "~"
+    if path_str.startswith(home_prefix):
+        return "~" + os.sep + path_str[len(home_prefix) :]
+    return path_str
+
+
 def make_relative_to_home(path: Path) -> Path:
     """Convert absolute path to be relative to home directory with ~ prefix."""
-    try:
-        return Path("~") / path.relative_to(Path.home())
-    except ValueError:
-        return path
+    return Path(relativize_to_home(str(path)))
 
 
-def format_output_path(path: Path, absolute: bool, cwd: Path) -> str:
-    """Format a path for output based on the absolute flag."""
+def format_output_paths(
+    paths: Iterable[Path], absolute: bool, cwd: Path
+) -> Iterator[str]:
+    """Format paths for output, relativizing against cwd with prefix checks.
+
+    Equivalent to calling format_output_path on each path, but the cwd prefix
+    is computed once instead of calling Path.relative_to per path.
+    """
     if absolute:
+        yield from map(str, paths)
+        return
+
+    cwd_str = str(cwd)
+    cwd_prefix = _with_trailing_sep(cwd_str)
+    prefix_len = len(cwd_prefix)
+    for path in paths:
         path_str = str(path)
+        if path_str == cwd_str:
+            yield "."
+        elif path_str.startswith(cwd_prefix):
+            yield path_str[prefix_len:]
+        else:
+            # Path is outside cwd (or relative), return it unchanged
+            yield path_str
+
+
+def format_output_path(path: Path, absolute: bool, cwd: Path) -> str:
+    """Format a path for output based on the absolute flag."""
+    return next(format_output_paths((path,), absolute, cwd))
+
+
+def write_output_paths(
+    paths: Iterable[Path],
+    absolute: bool,
+    cwd: Path,
+    chunk_size: int = _OUTPUT_CHUNK_SIZE,
+) -> None:
+    """Write formatted paths to stdout, one line each, in buffered chunks."""
+    chunk: list[str] = []
+    for path_str in format_output_paths(paths, absolute, cwd):
+        chunk.append(path_str)
+        if len(chunk) >= chunk_size:
+            sys.stdout.write("\n".join(chunk) + "\n")
+            chunk.clear()
+    if chunk:
+        sys.stdout.write("\n".join(chunk) + "\n")
+
+
+def list_xfiles() -> int:
+    """List available xfiles from both global and local directories."""
+    local_dir = get_local_xfiles_dir()
+    global_dir = get_global_xfiles_dir()
+
+    print("Local xfiles:")
+    local_xfiles = sorted(scan_xfiles_dir(local_dir).values())
+    if local_xfiles:
+        for xfile_path in local_xfiles:
+            print(f"  [L] {xfile_path.stem}")
     else:
-        # Default: relative to cwd
-        try:
-            path_str = str(path.relative_to(cwd))
-        except ValueError:
-            # Path is outside cwd, return absolute path
-            path_str = str(path)
+        print("  (none)")
 
-    return path_str
+    print("\nGlobal xfiles:")
+    global_xfiles = sorted(scan_xfiles_dir(global_dir).values())
+    if global_xfiles:
+        for xfile_path in global_xfiles:
+            print(f"  [G] {xfile_path.stem}")
+    else:
+        print("  (none)")
+
+    return 0
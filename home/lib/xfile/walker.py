@@ -0,0 +1,406 @@
+"""Filesystem traversal and exclusion rules for xfile targets.
+
+Exclusion lines (``-pattern`` or ``!!pattern``) subtract files from the
+targets of the xfile they appear in, and from any xfiles it references.
+Patterns follow gitignore-like rules:
+
+- A trailing ``/`` (or ``/**``) only matches directories, which are pruned
+  before the walker descends into them.
+- Patterns without a ``/`` match a file or directory name at any depth.
+- Other patterns match the path relative to the current directory (or the
+  absolute path, for absolute patterns). ``**`` matches any number of
+  directories.
+
+The walker records the (st_dev, st_ino) of every directory it enters and
+never enters the same directory twice, so symlink loops (when following
+symlinks) and bind-mounted cycles cannot stall traversal. Skipped
+directories are reported by ``xfile --timings``. Inside
+``record_scanned_dirs()``, every directory that traversal or glob expansion
+lists is also collected, for callers that cache results by mtime.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import os
+import re
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import NamedTuple
+
+from predicates import (  # type: ignore[import-not-found]
+    FilePredicates,
+    matches_predicates,
+    path_matches_predicates,
+)
+from utils import expand_braces  # type: ignore[import-not-found]
+
+_GLOB_MAGIC_CHARS = ("*", "?", "[")
+
+# Absolute paths of listed directories, while record_scanned_dirs() is active
+_scanned_dirs: contextvars.ContextVar[set[str] | None] = contextvars.ContextVar(
+    "_scanned_dirs", default=None
+)
+
+# Traversal counters for --timings, accumulated across (possibly threaded) walks
+_walk_stats_lock = threading.Lock()
+_dirs_scanned = 0
+_skipped_dirs: list[str] = []
+
+
+class ExcludeRule(NamedTuple):
+    """A compiled exclusion pattern."""
+
+    regex: re.Pattern[str]
+    dir_only: bool
+    basename_only: bool
+    absolute: bool
+
+
+def parse_exclusion(line: str) -> str | None:
+    """Return the pattern of an exclusion line, or None if it isn't one."""
+    trimmed = line.strip()
+    if trimmed.startswith("!!"):
+        pattern = trimmed[2:].strip()
+    elif trimmed.startswith("-"):
+        pattern = trimmed[1:].strip()
+    else:
+        return None
+    return pattern or None
+
+
+def _translate_component(component: str) -> str:
+    """Translate a single glob path component into a regex."""
+    result: list[str] = []
+    i = 0
+    while i < len(component):
+        char = component[i]
+        if char == "*":
+            result.append("[^/]*")
+        elif char == "?":
+            result.append("[^/]")
+        elif char == "[":
+            end = component.find("]", i + 2)
+            if end == -1:
+                result.append(re.escape(char))
+            else:
+                body = component[i + 1 : end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                result.append(f"[{body}]")
+                i = end
+        else:
+            result.append(re.escape(char))
+        i += 1
+    return "".join(result)
+
+
+def translate_glob(pattern: str) -> str:
+    """Translate a glob pattern (with ** support) into a regex string."""
+    parts = pattern.split("/")
+    regex_parts: list[str] = []
+    for i, part in enumerate(parts):
+        is_last = i == len(parts) - 1
+        if part == "**":
+            regex_parts.append(".*" if is_last else "(?:[^/]*/)*")
+        else:
+            regex_parts.append(_translate_component(part) + ("" if is_last else "/"))
+    return "".join(regex_parts)
+
+
+def compile_exclusions(patterns: list[str]) -> tuple[ExcludeRule, ...]:
+    """Compile exclusion patterns into rules."""
+    rules: list[ExcludeRule] = []
+    for raw_pattern in patterns:
+        for pattern in expand_braces(os.path.expanduser(raw_pattern)):
+            dir_only = False
+            if pattern.endswith("/**"):
+                pattern = pattern[:-3]
+                dir_only = True
+            elif pattern.endswith("/"):
+                pattern = pattern.rstrip("/")
+                dir_only = True
+            if pattern.startswith("./"):
+                pattern = pattern[2:]
+            if not pattern:
+                continue
+
+            rules.append(
+                ExcludeRule(
+                    regex=re.compile(translate_glob(pattern)),
+                    dir_only=dir_only,
+                    basename_only="/" not in pattern,
+                    absolute=os.path.isabs(pattern),
+                )
+            )
+    return tuple(rules)
+
+
+def collect_exclusions(lines: list[str]) -> tuple[ExcludeRule, ...]:
+    """Compile all exclusion lines found in an xfile's lines."""
+    patterns = [p for p in (parse_exclusion(line) for line in lines) if p]
+    return compile_exclusions(patterns)
+
+
+def _matches(
+    rules: tuple[ExcludeRule, ...],
+    name: str,
+    rel_path: str,
+    abs_path: str,
+    is_dir: bool,
+) -> bool:
+    for rule in rules:
+        if rule.dir_only and not is_dir:
+            continue
+        if rule.basename_only:
+            subject = name
+        elif rule.absolute:
+            subject = abs_path
+        else:
+            subject = rel_path
+        if rule.regex.fullmatch(subject):
+            return True
+    return False
+
+
+def is_path_excluded(
+    path: str | os.PathLike[str], rules: tuple[ExcludeRule, ...], is_dir: bool = False
+) -> bool:
+    """Check whether a path, or any of its parent directories, is excluded."""
+    if not rules:
+        return False
+
+    abs_path = os.path.abspath(path)
+    cwd = os.getcwd()
+    rel_path = os.path.relpath(abs_path, cwd)
+
+    # Check each parent directory so directory rules exclude their contents
+    rel_parts = rel_path.split(os.sep)
+    for depth in range(1, len(rel_parts)):
+        rel_dir = "/".join(rel_parts[:depth])
+        if rel_dir in ("..", "."):
+            continue
+        abs_dir = os.path.normpath(os.path.join(cwd, rel_dir))
+        if _matches(rules, rel_parts[depth - 1], rel_dir, abs_dir, True):
+            return True
+
+    return _matches(
+        rules, os.path.basename(abs_path), "/".join(rel_parts), abs_path, is_dir
+    )
+
+
+def reset_walk_stats() -> None:
+    """Reset the traversal counters reported by --timings."""
+    global _dirs_scanned
+    with _walk_stats_lock:
+        _dirs_scanned = 0
+        _skipped_dirs.clear()
+
+
+def get_walk_stats() -> tuple[int, list[str]]:
+    """Get the number of directories scanned and the directories skipped."""
+    with _walk_stats_lock:
+        return _dirs_scanned, list(_skipped_dirs)
+
+
+@contextmanager
+def record_scanned_dirs() -> Iterator[set[str]]:
+    """Collect the absolute paths of the directories listed while resolving.
+
+    The context variable is inherited by asyncio tasks and asyncio.to_thread
+    calls, so directories listed by the async resolver are collected too.
+    """
+    dirs: set[str] = set()
+    token = _scanned_dirs.set(dirs)
+    try:
+        yield dirs
+    finally:
+        _scanned_dirs.reset(token)
+
+
+def _note_scanned_dir(path: str) -> None:
+    dirs = _scanned_dirs.get()
+    if dirs is not None:
+        dirs.add(os.path.abspath(path))
+
+
+def _note_glob_dirs(pattern: str) -> None:
+    """Note the directories glob lists to expand pattern."""
+    if _scanned_dirs.get() is None:
+        return
+    import glob as glob_module
+
+    parent = os.path.dirname(pattern)
+    # Each wildcard component lists the directories matching the ones before it
+    while any(char in parent for char in _GLOB_MAGIC_CHARS):
+        for match in glob_module.iglob(parent):
+            if os.path.isdir(match):
+                _note_scanned_dir(match)
+        parent = os.path.dirname(parent)
+    _note_scanned_dir(parent or ".")
+
+
+def _record_walk_stats(dirs_scanned: int, skipped_dirs: list[str]) -> None:
+    global _dirs_scanned
+    with _walk_stats_lock:
+        _dirs_scanned += dirs_scanned
+        _skipped_dirs.extend(skipped_dirs)
+
+
+def _entry_key(entry: os.DirEntry[str]) -> tuple[int, int]:
+    # Follows symlinks, so a link and its target share a key
+    st = entry.stat()
+    return st.st_dev, st.st_ino
+
+
+def walk_files(
+    root: str,
+    rules: tuple[ExcludeRule, ...] = (),
+    include_hidden: bool = True,
+    predicates: FilePredicates | None = None,
+    file_regex: re.Pattern[str] | None = None,
+    follow_symlinks: bool = False,
+) -> Iterator[str]:
+    """Yield files beneath root, pruning excluded directories before descent.
+
+    Yielded paths are root joined with the relative path of each file, so a
+    relative root yields relative paths. Files must fully match file_regex
+    (if given) and then the predicates, which are checked against the stat
+    data cached on each scandir entry. Symlinked directories are followed
+    if follow_symlinks is set, unless @follow-symlinks or @no-follow-symlinks
+    says otherwise, and a directory whose (st_dev, st_ino) was already visited
+    is skipped rather than re-entered.
+    """
+    if predicates is not None and predicates.follow_symlinks is not None:
+        follow_symlinks = predicates.follow_symlinks
+    check_files = predicates is not None and predicates.checks_files()
+    cwd = os.getcwd()
+    abs_root = os.path.abspath(root)
+    rel_root = os.path.relpath(abs_root, cwd)
+
+    try:
+        root_st = os.stat(abs_root)
+    except OSError:
+        return
+    visited = {(root_st.st_dev, root_st.st_ino)}
+    dirs_scanned = 0
+    skipped_dirs: list[str] = []
+
+    # Each entry is (display path, path relative to cwd, absolute path)
+    stack: list[tuple[str, str, str]] = [(root, rel_root, abs_root)]
+    try:
+        while stack:
+            display_dir, rel_dir, abs_dir = stack.pop()
+            try:
+                with os.scandir(abs_dir) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            dirs_scanned += 1
+            _note_scanned_dir(abs_dir)
+
+            subdirs: list[tuple[str, str, str]] = []
+            for entry in entries:
+                name = entry.name
+                if not include_hidden and name.startswith("."):
+                    continue
+                display_path = os.path.join(display_dir, name) if display_dir else name
+                rel_path = name if rel_dir == "." else f"{rel_dir}/{name}"
+                abs_path = entry.path
+
+                try:
+                    is_dir_link = (
+                        follow_symlinks and entry.is_symlink() and entry.is_dir()
+                    )
+                    is_dir = is_dir_link or entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+
+                if _matches(rules, name, rel_path, abs_path, is_dir):
+                    continue
+                if is_dir:
+                    try:
+                        key = _entry_key(entry)
+                    except OSError:
+                        continue
+                    if key in visited:
+                        skipped_dirs.append(
+                            f"{display_path} -> {os.path.realpath(abs_path)}"
+                        )
+                        continue
+                    visited.add(key)
+                    subdirs.append((display_path, rel_path, abs_path))
+                elif (
+                    entry.is_file()
+                    and (file_regex is None or file_regex.fullmatch(display_path))
+                    and (
+                        not check_files
+                        or matches_predicates(abs_path, entry.stat(), predicates)
+                    )
+                ):
+                    yield display_path
+
+            # Visit subdirectories in scandir order
+            stack.extend(reversed(subdirs))
+    finally:
+        _record_walk_stats(dirs_scanned, skipped_dirs)
+
+
+def _split_glob_root(pattern: str) -> tuple[str, str]:
+    """Split a glob pattern into its literal leading directory and the rest."""
+    parts = pattern.split("/")
+    root_parts: list[str] = []
+    for part in parts[:-1]:
+        if any(char in part for char in _GLOB_MAGIC_CHARS):
+            break
+        root_parts.append(part)
+    root = "/".join(root_parts)
+    if pattern.startswith("/") and not root:
+        root = "/"
+    rest = pattern[len(root) :].lstrip("/")
+    return root, rest
+
+
+def glob_files(
+    pattern: str,
+    rules: tuple[ExcludeRule, ...] = (),
+    predicates: FilePredicates | None = None,
+) -> Iterator[str]:
+    """Yield the files matching a glob pattern, applying exclusions and predicates.
+
+    Recursive (``**``) patterns are matched while walking from the pattern's
+    literal root, so excluded directories are never descended into, and
+    predicates are checked against scandir stat data. Like glob.glob, the
+    walk follows symlinked directories unless the target has
+    @no-follow-symlinks; symlink loops are skipped.
+    Other patterns are expanded with glob.iglob and then filtered. Matches
+    are yielded as they are found rather than collected first.
+    """
+    if "**" not in pattern:
+        import glob as glob_module
+
+        _note_glob_dirs(pattern)
+        for match in glob_module.iglob(pattern):
+            if (
+                os.path.isfile(match)
+                and not is_path_excluded(match, rules)
+                and path_matches_predicates(match, predicates)
+            ):
+                yield match
+        return
+
+    root, rest = _split_glob_root(pattern)
+    if root and not os.path.isdir(root):
+        # Its parent changes when the root is created
+        _note_scanned_dir(os.path.dirname(os.path.abspath(root)))
+        return
+    if root and is_path_excluded(root, rules, is_dir=True):
+        return
+
+    regex = re.compile(translate_glob(pattern))
+    # Like glob, wildcards only match hidden entries when the pattern asks for them
+    include_hidden = any(part.startswith(".") for part in rest.split("/"))
+    yield from walk_files(
+        root, rules, include_hidden, predicates, regex, follow_symlinks=True
+    )
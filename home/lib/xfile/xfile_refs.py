@@ -6,39 +6,15 @@ import re
 import sys
 from pathlib import Path
 
+from predicates import save_text_cache  # type: ignore[import-not-found]
 from targets import resolve_target  # type: ignore[import-not-found]
 from utils import (  # type: ignore[import-not-found]
     clear_command_cache,
     ensure_xfiles_dirs,
     find_xfile,
-    format_output_path,
-    get_global_xfiles_dir,
-    get_local_xfiles_dir,
+    format_output_paths,
 )
-
-
-def list_xfiles() -> int:
-    """List available xfiles from both global and local directories."""
-    local_dir = get_local_xfiles_dir()
-    global_dir = get_global_xfiles_dir()
-
-    print("Local xfiles:")
-    local_xfiles = sorted(local_dir.glob("*.txt"))
-    if local_xfiles:
-        for xfile_path in local_xfiles:
-            print(f"  [L] {xfile_path.stem}")
-    else:
-        print("  (none)")
-
-    print("\nGlobal xfiles:")
-    global_xfiles = sorted(global_dir.glob("*.txt"))
-    if global_xfiles:
-        for xfile_path in global_xfiles:
-            print(f"  [G] {xfile_path.stem}")
-    else:
-        print("  (none)")
-
-    return 0
+from walker import ExcludeRule, collect_exclusions  # type: ignore[import-not-found]
 
 
 def _parse_xfile_metadata(xfile_path: Path) -> tuple[str, dict[str, str]]:
@@ -114,6 +90,7 @@ def _process_xfile_reference(
     no_description_files: list[str],
     absolute: bool,
     cwd: Path,
+    excludes: tuple[ExcludeRule, ...] = (),
 ) -> bool:
     """Process x:reference, modifying description_groups and no_description_files."""
     xfile_ref_match = re.match(r"^x:(.+)$", stripped)
@@ -124,11 +101,11 @@ def _process_xfile_reference(
 
     if referenced_xfile_path and current_description:
         try:
-            resolved_files = resolve_target(stripped)
+            resolved_files = resolve_target(stripped, excludes)
             if resolved_files:
-                formatted_files = [
-                    format_output_path(f, absolute, cwd) for f in resolved_files
-                ]
+                formatted_files = list(
+                    format_output_paths(resolved_files, absolute, cwd)
+                )
                 if current_description not in description_groups:
                     description_groups[current_description] = []
                 description_groups[current_description].extend(formatted_files)
@@ -146,6 +123,7 @@ def _process_xfile_reference(
             else 0
         )
 
+        ref_excludes = excludes + collect_exclusions(ref_lines)
         ref_current_description = ""
         for ref_line in ref_lines[ref_start_idx:]:
             ref_stripped = ref_line.strip()
@@ -164,11 +142,11 @@ def _process_xfile_reference(
                 continue
 
             try:
-                resolved_files = resolve_target(ref_stripped)
+                resolved_files = resolve_target(ref_stripped, ref_excludes)
                 if resolved_files:
-                    formatted_files = [
-                        format_output_path(f, absolute, cwd) for f in resolved_files
-                    ]
+                    formatted_files = list(
+                        format_output_paths(resolved_files, absolute, cwd)
+                    )
                     if ref_current_description:
                         if ref_current_description not in description_groups:
                             description_groups[ref_current_description] = []
@@ -212,6 +190,9 @@ def _format_xfile_with_at_prefix(xfile_name: str, absolute: bool) -> str:
     if lines and lines[0].startswith("# ") and len(lines) > 1 and not lines[1].strip():
         start_idx = 2
 
+    # Exclusion lines apply to every target in the xfile
+    excludes = collect_exclusions(lines)
+
     # Process each target line and track which files came from which description
     cwd = Path.cwd()
     description_groups: dict[str, list[str]] = {}  # description -> list of files
@@ -244,16 +225,17 @@ def _format_xfile_with_at_prefix(xfile_name: str, absolute: bool) -> str:
             no_description_files,
             absolute,
             cwd,
+            excludes,
         ):
             continue
 
         # This is a regular target line - resolve it to files
         try:
-            resolved_files = resolve_target(stripped)
+            resolved_files = resolve_target(stripped, excludes)
             if resolved_files:
-                formatted_files = [
-                    format_output_path(f, absolute, cwd) for f in resolved_files
-                ]
+                formatted_files = list(
+                    format_output_paths(resolved_files, absolute, cwd)
+                )
 
                 if current_description:
                     # Add to description group
@@ -305,7 +287,7 @@ def _process_inline_target(
         if not resolved_files:
             return re.sub(inline_pattern, "@ERROR: No files found", line, count=1)
 
-        formatted_files = [format_output_path(f, absolute, cwd) for f in resolved_files]
+        formatted_files = list(format_output_paths(resolved_files, absolute, cwd))
 
         if len(formatted_files) == 1:
             return re.sub(inline_pattern, f"@{formatted_files[0]}", line, count=1)
@@ -366,6 +348,9 @@ def process_stdin_with_xfile_refs(absolute: bool) -> int:
 
         processed_lines.append(line)
 
+    # Persist @text sniff results for the next run
+    save_text_cache()
+
     # Output the processed content
     print("".join(processed_lines), end="")
 